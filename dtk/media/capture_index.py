@@ -0,0 +1,217 @@
+"""Persistent sidecar index of the RTP streams found in a capture.
+
+Extracting streams from a large capture means scanning every record. The
+result of a scan (per-flow packet columns, stream statistics and frame
+boundaries) is saved in a sidecar file next to the capture so later runs can
+skip the scan entirely.
+
+The sidecar is a small binary file::
+
+    magic (8 bytes) | header length (uint64 LE) | JSON header | arrays
+
+The JSON header records the capture's size, modification time and a content
+fingerprint, the key and statistics of each flow and the location of each
+array.
+Arrays are 64-byte aligned and are memory-mapped on load, so opening an index
+costs next to nothing until packet data is actually touched.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+from dataclasses import asdict, fields
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+import numpy as np
+
+from .flow_table import FlowKey
+from .rtp_extractor import RTPStreamInfo
+
+if TYPE_CHECKING:
+    from .packet_store import RTPPacketStore
+
+INDEX_MAGIC = b'DTKIDX\x00\x01'
+INDEX_SUFFIX = '.dtkidx'
+
+# Bump when the index layout or the meaning of stored statistics changes
+INDEX_VERSION = 4
+
+# Bytes hashed from each end of the capture for the content fingerprint
+FINGERPRINT_SPAN = 1 << 20
+
+_ALIGN = 64
+_HEADER_LENGTH = struct.Struct('<Q')
+
+
+def index_path(pcap_path: str) -> str:
+    """Get the sidecar index path for a capture.
+
+    Args:
+        pcap_path: Path to the capture file
+
+    Returns:
+        Path of the sidecar index
+    """
+    return str(pcap_path) + INDEX_SUFFIX
+
+
+def fingerprint(pcap_path: str) -> str:
+    """Fingerprint a capture's content without reading all of it.
+
+    Hashes the file size together with its first and last
+    FINGERPRINT_SPAN bytes.
+
+    Args:
+        pcap_path: Path to the capture file
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(pcap_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        digest.update(struct.pack('<Q', size))
+        digest.update(f.read(FINGERPRINT_SPAN))
+        if size > FINGERPRINT_SPAN:
+            f.seek(max(size - FINGERPRINT_SPAN, FINGERPRINT_SPAN))
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _capture_identity(pcap_path: str) -> dict:
+    """Describe the capture state an index is valid for."""
+    stat = os.stat(pcap_path)
+    return {
+        'version': INDEX_VERSION,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'fingerprint': fingerprint(pcap_path),
+    }
+
+
+def write_index(pcap_path: str, flows: Dict[FlowKey, 'RTPPacketStore'],
+                flow_info: Dict[FlowKey, RTPStreamInfo]) -> str:
+    """Write the sidecar index for an extracted capture.
+
+    The file is written under a temporary name and renamed into place, so a
+    concurrent reader never sees a partial index.
+
+    Args:
+        pcap_path: Path to the capture file
+        flows: Packet stores by flow, in sequence order
+        flow_info: Stream statistics by flow
+
+    Returns:
+        Path of the written index
+
+    Raises:
+        OSError: If the index cannot be written (e.g. read-only directory)
+    """
+    header = _capture_identity(pcap_path)
+    header['streams'] = []
+
+    arrays = []
+    offset = 0
+
+    def place(array: np.ndarray) -> list:
+        nonlocal offset
+        array = np.ascontiguousarray(array)
+        location = [offset, array.dtype.str, len(array)]
+        arrays.append((offset, array))
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+        return location
+
+    for key, store in flows.items():
+        header['streams'].append({
+            'flow': list(key),
+            'info': asdict(flow_info[key]),
+            'columns': {name: place(getattr(store, name)) for name in store.COLUMNS},
+            'frame_bounds': place(store.frame_bounds()),
+        })
+
+    encoded = json.dumps(header).encode()
+    data_start = len(INDEX_MAGIC) + _HEADER_LENGTH.size + len(encoded)
+    data_start += -data_start % _ALIGN
+
+    path = index_path(pcap_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(INDEX_MAGIC)
+            f.write(_HEADER_LENGTH.pack(len(encoded)))
+            f.write(encoded)
+            for array_offset, array in arrays:
+                f.seek(data_start + array_offset)
+                f.write(array.tobytes())
+            f.truncate(data_start + offset)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+def read_index(pcap_path: str, buffer: memoryview) -> Optional[
+        Tuple[Dict[FlowKey, 'RTPPacketStore'], Dict[FlowKey, RTPStreamInfo]]]:
+    """Load the sidecar index of a capture if it is present and current.
+
+    An index is only used when the capture's size, modification time and
+    content fingerprint all match the values recorded when it was written.
+
+    Args:
+        pcap_path: Path to the capture file
+        buffer: Buffer of the mapped capture, for the stores' payload views
+
+    Returns:
+        Tuple of (packet stores by flow, stream statistics by flow), in the
+        order they were written, or None if there is no usable index
+    """
+    from .packet_store import RTPPacketStore
+
+    path = index_path(pcap_path)
+    try:
+        with open(path, 'rb') as f:
+            if f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                return None
+            (header_length,) = _HEADER_LENGTH.unpack(f.read(_HEADER_LENGTH.size))
+            header = json.loads(f.read(header_length))
+
+            stat = os.stat(pcap_path)
+            if (header.get('version') != INDEX_VERSION
+                    or header.get('size') != stat.st_size
+                    or header.get('mtime_ns') != stat.st_mtime_ns
+                    or header.get('fingerprint') != fingerprint(pcap_path)):
+                return None
+
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError, struct.error):
+        return None
+
+    data_start = len(INDEX_MAGIC) + _HEADER_LENGTH.size + header_length
+    data_start += -data_start % _ALIGN
+
+    def load(location: list) -> np.ndarray:
+        array_offset, dtype, count = location
+        return np.frombuffer(data, dtype=np.dtype(dtype), count=count,
+                             offset=data_start + array_offset)
+
+    info_fields = {f.name for f in fields(RTPStreamInfo)}
+    flows = {}
+    flow_info = {}
+    try:
+        for entry in header['streams']:
+            key = FlowKey(*entry['flow'])
+            if set(entry['info']) != info_fields:
+                return None
+            columns = {name: load(loc) for name, loc in entry['columns'].items()}
+            store = RTPPacketStore.from_columns(
+                key.ssrc, buffer, columns, frame_bounds=load(entry['frame_bounds'])
+            )
+            flows[key] = store
+            flow_info[key] = RTPStreamInfo(**entry['info'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    return flows, flow_info
@@ -1,10 +1,43 @@
-"""ST 2110-20 Video decoder for uncompressed video streams."""
+"""ST 2110-20 Video decoder for uncompressed video streams.
+
+ST 2110-20 carries video as RFC 4175 payloads: a 2-byte extended sequence
+number followed by one or more 6-byte sample row data (SRD) headers, each
+giving the length, field, line number and pixel offset of a run of pixel
+groups, with a continuation bit set on every header but the last. The
+pixel data of the SRDs follows the headers, in order.
+"""
 
 import struct
 import numpy as np
 from dataclasses import dataclass
-from typing import Optional, List, Tuple
-from ..rtp_extractor import RTPPacketInfo, RTPStreamInfo
+from typing import Dict, Iterator, Optional, List, Sequence, Tuple, Union
+from ..frame_pool import FramePool
+from ..packet_store import RTPPacketInfo
+from ..rtp_extractor import RTPStreamInfo
+
+# Pixel group (pgroup) size as (bytes, pixels) by sampling and bit depth:
+# the smallest run of pixels whose samples end on a byte boundary
+PGROUPS = {
+    ('YCbCr-4:2:2', 8): (4, 2),
+    ('YCbCr-4:2:2', 10): (5, 2),
+    ('YCbCr-4:2:2', 12): (6, 2),
+    ('YCbCr-4:2:2', 16): (8, 2),
+    ('YCbCr-4:4:4', 8): (3, 1),
+    ('YCbCr-4:4:4', 10): (15, 4),
+    ('YCbCr-4:4:4', 12): (9, 2),
+    ('YCbCr-4:4:4', 16): (6, 1),
+    ('RGB', 8): (3, 1),
+    ('RGB', 10): (15, 4),
+    ('RGB', 12): (9, 2),
+    ('RGB', 16): (6, 1),
+}
+
+# RFC 4175 payload header sizes
+EXTENDED_SEQUENCE_SIZE = 2
+SRD_HEADER_SIZE = 6
+
+# Most SRD headers read from one packet (a 9000-byte jumbo frame holds fewer)
+MAX_SRDS_PER_PACKET = 64
 
 
 @dataclass
@@ -19,25 +52,343 @@ class VideoStreamParams:
     packing_mode: str = 'general'  # 'general' or 'block'
 
     @property
-    def bytes_per_pixel(self) -> int:
-        """Calculate bytes per pixel based on format and bit depth."""
-        if self.pixel_format == 'YCbCr-4:2:2':
-            # 4:2:2 has 2 bytes of Y, 1 byte of Cb, 1 byte of Cr per 2 pixels
-            components_per_pixel = 2  # Average
-        elif self.pixel_format == 'YCbCr-4:4:4':
-            components_per_pixel = 3  # Y, Cb, Cr
-        elif self.pixel_format == 'RGB':
-            components_per_pixel = 3  # R, G, B
-        else:
-            components_per_pixel = 3  # Default
-
-        bytes_per_component = (self.bit_depth + 7) // 8
-        return components_per_pixel * bytes_per_component
+    def bytes_per_pixel(self) -> float:
+        """Get the average packed size of one pixel in bytes (2.5 for 10-bit 4:2:2)."""
+        pgroup_bytes, pgroup_pixels = self.pgroup
+        return pgroup_bytes / pgroup_pixels
 
     @property
     def frame_size_bytes(self) -> int:
-        """Calculate expected frame size in bytes."""
-        return self.width * self.height * self.bytes_per_pixel
+        """Calculate expected frame size in bytes, as whole lines of pixel groups."""
+        return self.line_bytes * self.height
+
+    @property
+    def pgroup(self) -> Tuple[int, int]:
+        """Get the pixel group size as (bytes, pixels).
+
+        Raises:
+            ValueError: If the pixel format and bit depth have no pgroup
+        """
+        pgroup = PGROUPS.get((self.pixel_format, self.bit_depth))
+        if pgroup is None:
+            raise ValueError(f"Unsupported pixel format: {self.pixel_format} "
+                             f"{self.bit_depth}-bit")
+        return pgroup
+
+    @property
+    def line_bytes(self) -> int:
+        """Get the size of one line of packed pixel groups in bytes."""
+        pgroup_bytes, pgroup_pixels = self.pgroup
+        return -(-self.width // pgroup_pixels) * pgroup_bytes
+
+
+def parse_srd_headers(payload: Union[bytes, memoryview]
+                      ) -> Tuple[List[Tuple[int, int, int, int]], int]:
+    """Parse the RFC 4175 payload header of one ST 2110-20 packet.
+
+    Args:
+        payload: RTP payload
+
+    Returns:
+        Tuple of the (length, field, row, offset) of each SRD, and the
+        offset in the payload at which the pixel data of the first SRD
+        starts. Lengths are in bytes, offsets in pixels.
+    """
+    headers = []
+    position = EXTENDED_SEQUENCE_SIZE
+    while (position + SRD_HEADER_SIZE <= len(payload)
+           and len(headers) < MAX_SRDS_PER_PACKET):
+        length, row, offset = struct.unpack_from('!HHH', payload, position)
+        position += SRD_HEADER_SIZE
+        headers.append((length, row >> 15, row & 0x7FFF, offset & 0x7FFF))
+        if not offset & 0x8000:  # Continuation bit clear: last header
+            break
+    return headers, position
+
+
+def srd_table(data: np.ndarray, offsets: np.ndarray,
+              lengths: np.ndarray) -> Dict[str, np.ndarray]:
+    """Parse the SRD headers of many ST 2110-20 packets at once.
+
+    Headers are read in rounds, one SRD header of every packet still
+    carrying continued headers per round.
+
+    Args:
+        data: Buffer holding the payloads, as uint8
+        offsets: Offset of each payload in data
+        lengths: Length of each payload in bytes
+
+    Returns:
+        Dictionary of equally long arrays, one entry per SRD in packet
+        order: 'packet' (index into offsets), 'length' (bytes, clipped to
+        the payload), 'field', 'row', 'offset' (pixels) and 'start' (offset
+        of the SRD's pixel data in data)
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    ends = offsets + np.asarray(lengths, dtype=np.int64)
+    position = offsets + EXTENDED_SEQUENCE_SIZE
+    active = np.flatnonzero(position + SRD_HEADER_SIZE <= ends)
+
+    rounds = []
+    for _ in range(MAX_SRDS_PER_PACKET):
+        if not len(active):
+            break
+        at = position[active][:, None] + np.arange(SRD_HEADER_SIZE)
+        fields = data[at].astype(np.int64)
+        words = (fields[:, 0::2] << 8) | fields[:, 1::2]  # length, F + row, C + offset
+        rounds.append((active, words))
+        position[active] += SRD_HEADER_SIZE
+        continued = (words[:, 2] & 0x8000) != 0
+        active = active[continued & (position[active] + SRD_HEADER_SIZE <= ends[active])]
+
+    if not rounds:
+        empty = np.empty(0, dtype=np.int64)
+        names = ('packet', 'length', 'field', 'row', 'offset', 'start')
+        return {name: empty for name in names}
+
+    packet = np.concatenate([active for active, _ in rounds])
+    words = np.concatenate([words for _, words in rounds])
+    order = np.argsort(packet, kind='stable')  # Packet order, SRDs in header order
+    packet, words = packet[order], words[order]
+
+    # Pixel data of a packet's SRDs follows its last header, back to back
+    length = words[:, 0]
+    before = np.cumsum(length) - length
+    first = np.flatnonzero(np.concatenate(([True], packet[1:] != packet[:-1])))
+    within = before - np.repeat(before[first], np.diff(np.append(first, len(packet))))
+    start = position[packet] + within
+    return {
+        'packet': packet,
+        'length': np.clip(np.minimum(length, ends[packet] - start), 0, None),
+        'field': words[:, 1] >> 15,
+        'row': words[:, 1] & 0x7FFF,
+        'offset': words[:, 2] & 0x7FFF,
+        'start': start,
+    }
+
+
+def _unpack_columns(packed: np.ndarray, bit_depth: int, count: int, to_8bit: bool,
+                    targets: List[Tuple[np.ndarray, ...]],
+                    scratch: Optional[np.ndarray] = None):
+    """Unpack the samples at each position of fixed-size runs of samples.
+
+    Samples are packed back to back, most significant bit first, and runs
+    of count samples (a pgroup, say) start on a byte boundary: sample i of a
+    run is the big-endian 16-bit word at byte (i * bit_depth) // 8 of the
+    run, shifted right and masked. Each position is gathered from a strided
+    view of the buffer straight into its targets, so a frame takes a few
+    whole-array operations per position and no allocation.
+
+    Args:
+        packed: Lines of packed samples, uint8 of shape (height, line_bytes);
+                line_bytes must be a whole number of runs
+        bit_depth: Bits per sample (8, 10, 12 or 16)
+        count: Samples per run, making a whole number of bytes
+        to_8bit: Keep only the 8 most significant bits of each sample
+        targets: Arrays receiving each sample position, uint16 (uint8 with
+                 to_8bit) of shape (height, n) for the first n runs of each
+                 line; views into planes are fine. Extra arrays for a
+                 position get a copy of the first one's samples and should
+                 not overlap it.
+        scratch: uint16 array of shape (height, runs per line) for 8-bit
+                 output of 10/12-bit samples (allocated if needed)
+
+    Raises:
+        ValueError: If the bit depth is not supported
+    """
+    if bit_depth not in (8, 10, 12, 16):
+        raise ValueError(f"Unsupported bit depth: {bit_depth}")
+
+    run_bytes = count * bit_depth // 8
+    height, line_bytes = packed.shape
+    for i, arrays in enumerate(targets):
+        runs = max(target.shape[1] for target in arrays)
+        bit = i * bit_depth
+        if bit_depth == 8 or (bit_depth == 16 and to_8bit):
+            # Whole bytes (the most significant one for 16-bit)
+            column = packed[:, bit // 8::run_bytes]
+        else:
+            # Big-endian word holding the sample, at the same place in every run
+            words = np.ndarray((height, runs), dtype='>u2', buffer=packed,
+                               offset=bit // 8, strides=(packed.strides[0], run_bytes))
+            shift = 16 - bit_depth - bit % 8
+            if to_8bit:
+                if scratch is None:
+                    scratch = np.empty((height, line_bytes // run_bytes), dtype=np.uint16)
+                column = scratch[:, :runs]
+                # Truncating to uint8 on copy drops the bits of the preceding sample
+                np.right_shift(words, shift + bit_depth - 8, out=column)
+            else:
+                column = arrays[0]
+                np.right_shift(words[:, :column.shape[1]], shift, out=column)
+                if bit_depth < 16:
+                    column &= (1 << bit_depth) - 1
+
+        for target in arrays:
+            if target is not column:
+                np.copyto(target, column[:, :target.shape[1]], casting='unsafe')
+
+
+def copy_blocks(source: np.ndarray, src: np.ndarray, out: np.ndarray, dst: np.ndarray,
+                length: np.ndarray) -> int:
+    """Copy byte blocks between buffers, as few numpy copies as possible.
+
+    Consecutive blocks of equal length, equally spaced in both buffers (the
+    SRDs of in-order, equally sized packets, say) form a run that is copied
+    as one strided 2-D array assignment, which numpy performs without
+    holding the GIL. Blocks are copied in order, so a later block wins
+    where destinations overlap.
+
+    Args:
+        source: Buffer to read, uint8
+        src: Offset of each block in source
+        out: Contiguous buffer to write, uint8
+        dst: Offset of each block in out
+        length: Length of each block in bytes
+
+    Returns:
+        Number of bytes copied
+
+    Raises:
+        ValueError: If out is not contiguous
+    """
+    if not out.flags.c_contiguous:
+        raise ValueError("Output buffer must be contiguous")
+    count = len(src)
+    if not count:
+        return 0
+    src, dst, length = (np.asarray(a, dtype=np.int64) for a in (src, dst, length))
+
+    # A run continues while the length and both steps stay the same, and
+    # its destinations do not overlap
+    src_step, dst_step = np.diff(src), np.diff(dst)
+    joins = (length[1:] == length[:-1]) & (np.abs(dst_step) >= length[:-1])
+    joins[1:] &= (src_step[1:] == src_step[:-1]) & (dst_step[1:] == dst_step[:-1])
+    starts = np.flatnonzero(np.concatenate(([True], ~joins)))
+    sizes = np.diff(np.append(starts, count))
+    src_step = np.append(src_step, 0)[starts]
+    dst_step = np.append(dst_step, 0)[starts]
+
+    target = out.reshape(-1)
+    for first, size, src_stride, dst_stride in zip(starts.tolist(), sizes.tolist(),
+                                                   src_step.tolist(), dst_step.tolist()):
+        s, d, n = int(src[first]), int(dst[first]), int(length[first])
+        if size == 1:
+            target[d:d + n] = source[s:s + n]
+            continue
+        np.ndarray((size, n), dtype=np.uint8, buffer=target, offset=d,
+                   strides=(dst_stride, 1))[:] = np.ndarray(
+                       (size, n), dtype=np.uint8, buffer=source, offset=s,
+                       strides=(src_stride, 1))
+    return int(length.sum())
+
+
+def unpack_samples(packed: np.ndarray, bit_depth: int,
+                   to_8bit: bool = False) -> np.ndarray:
+    """Unpack big-endian bit-packed samples to one integer per sample.
+
+    ST 2110-20 packs samples back to back, most significant bit first, with
+    no padding inside a line: 10-bit samples take 5 bytes per 4 samples and
+    12-bit samples 3 bytes per 2.
+
+    Args:
+        packed: Lines of packed pixel groups, uint8 of shape (height,
+                line_bytes); line_bytes must be a whole number of pgroups
+        bit_depth: Bits per sample (8, 10, 12 or 16)
+        to_8bit: Keep only the 8 most significant bits of each sample
+
+    Returns:
+        uint16 array (uint8 with to_8bit) of shape (height, samples per line)
+
+    Raises:
+        ValueError: If the bit depth is not supported
+    """
+    if bit_depth not in (8, 10, 12, 16):
+        raise ValueError(f"Unsupported bit depth: {bit_depth}")
+    # Shortest run starting on a byte boundary: 4 samples of 10 bits, 2 of 12
+    count = 8 // int(np.gcd(bit_depth, 8)) if bit_depth in (10, 12) else 1
+    height, line_bytes = packed.shape
+    out = np.empty((height, line_bytes * 8 // bit_depth),
+                   dtype=np.uint8 if to_8bit else np.uint16)
+    _unpack_columns(packed, bit_depth, count, to_8bit,
+                    [(out[:, i::count],) for i in range(count)])
+    return out
+
+
+def unpack_planes(packed: np.ndarray, params: VideoStreamParams, to_8bit: bool = False,
+                  out: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+                  ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Unpack a frame of pixel groups into separate component planes.
+
+    Args:
+        packed: Frame of packed pixel groups, uint8 of shape (height,
+                line_bytes) as filled by ST211020Decoder.depacketize()
+        params: Video stream parameters
+        to_8bit: Keep the 8 most significant bits of each sample instead of
+                 full precision
+        out: Planes to unpack into, shaped and typed as the returned ones
+             (views, such as the channels of an interleaved frame, are
+             fine); allocated if None
+
+    Returns:
+        Planes (Y, Cb, Cr) or (R, G, B), each (height, width) except 4:2:2
+        chroma of (height, width / 2, rounded up); uint16 holding
+        bit_depth-bit values, or uint8 with to_8bit
+
+    Raises:
+        ValueError: If the pixel format or bit depth is not supported
+    """
+    if out is None:
+        dtype = np.uint8 if to_8bit else np.uint16
+        width = params.width
+        chroma = -(-width // 2) if params.pixel_format == 'YCbCr-4:2:2' else width
+        out = tuple(np.empty((params.height, plane_width), dtype=dtype)
+                    for plane_width in (width, chroma, chroma))
+    _unpack_frame(packed, params, to_8bit, [(plane,) for plane in out])
+    return tuple(out)
+
+
+def _unpack_frame(packed: np.ndarray, params: VideoStreamParams, to_8bit: bool,
+                  planes: List[Tuple[np.ndarray, ...]],
+                  scratch: Optional[np.ndarray] = None):
+    """Unpack a frame of pixel groups into planes given as one or more arrays each.
+
+    Args:
+        packed: Frame of packed pixel groups, as for unpack_planes()
+        params: Video stream parameters
+        to_8bit: Keep the 8 most significant bits of each sample
+        planes: Arrays receiving each plane (Y, Cb, Cr or R, G, B); extra
+                arrays for a plane get a copy, e.g. to repeat 4:2:2 chroma
+                over both pixels of a pair
+        scratch: Work buffer, see _unpack_columns()
+
+    Raises:
+        ValueError: If the pixel format or bit depth is not supported
+    """
+    pgroup_bytes, pgroup_pixels = params.pgroup
+    count = pgroup_bytes * 8 // params.bit_depth  # Samples per pgroup
+
+    # Samples of a pgroup are ordered C'B, Y', C'R, Y' for 4:2:2, C'B, Y',
+    # C'R for 4:4:4 and R, G, B for RGB (SMPTE ST 2110-20 section 6.2):
+    # (first sample, sample step) of each plane along a line
+    if params.pixel_format == 'YCbCr-4:2:2':
+        layout = ((1, 2), (0, 4), (2, 4))
+    elif params.pixel_format == 'YCbCr-4:4:4':
+        layout = ((1, 3), (0, 3), (2, 3))
+    elif params.pixel_format == 'RGB':
+        layout = ((0, 3), (1, 3), (2, 3))
+    else:
+        raise ValueError(f"Unsupported pixel format: {params.pixel_format}")
+
+    # Every sample position of a pgroup belongs to the same plane in all
+    # pgroups: sample first + k * step is every (count / step)th pixel of
+    # its plane, starting at pixel k
+    targets = [None] * count
+    for arrays, (first, step) in zip(planes, layout):
+        per_pgroup = count // step
+        for k in range(per_pgroup):
+            targets[first + k * step] = tuple(plane[:, k::per_pgroup] for plane in arrays)
+    _unpack_columns(packed, params.bit_depth, count, to_8bit, targets, scratch)
 
 
 class ST211020Decoder:
@@ -55,18 +406,34 @@ class ST211020Decoder:
     # Common frame rates
     COMMON_FRAME_RATES = [23.976, 24, 25, 29.97, 30, 50, 59.94, 60]
 
-    def __init__(self, params: Optional[VideoStreamParams] = None):
+    # Frames whose sizes are averaged to detect the video format
+    DETECT_FRAMES = 8
+
+    def __init__(self, params: Optional[VideoStreamParams] = None,
+                 pool_depth: Optional[int] = None, workers: int = 1):
         """Initialize video decoder.
 
         Args:
             params: Video stream parameters. If None, will auto-detect.
+            pool_depth: Number of released frames kept for reuse (see
+                        release()). Defaults to enough for the frames in
+                        flight: 2 * workers + 2.
+            workers: Number of threads decoding frames in parallel (see
+                     iter_frames())
         """
         self.params = params
         self.frames: List[np.ndarray] = []
+        self.frame_count = 0  # Frames decoded by the last decode() or iter_frames()
+        self.workers = max(int(workers), 1)
+        self.pool_depth = pool_depth if pool_depth is not None else 2 * self.workers + 2
+        self.frame_pool: Optional[FramePool] = None  # Decoded frame buffers
 
     def decode(self, packets: List[RTPPacketInfo], stream_info: RTPStreamInfo) -> List[np.ndarray]:
         """Decode RTP packets to video frames.
 
+        Holds every frame in memory; use iter_frames() to process long
+        streams one frame at a time.
+
         Args:
             packets: List of RTP packets containing video data
             stream_info: Information about the RTP stream
@@ -74,21 +441,197 @@ class ST211020Decoder:
         Returns:
             List of numpy arrays, each representing a video frame
         """
+        self.frames = list(self.iter_frames(packets, stream_info))
+        return self.frames
+
+    def iter_frames(self, packets: List[RTPPacketInfo],
+                    stream_info: RTPStreamInfo) -> Iterator[np.ndarray]:
+        """Decode RTP packets to video frames lazily.
+
+        Parameters are detected when called, so params is set before the
+        first frame is requested (an exporter needs the frame size and
+        rate up front). Each frame is depacketized and decoded only when
+        the iterator reaches it, so memory use does not grow with the
+        stream duration.
+
+        Frames come from frame_pool: a consumer that hands each frame back
+        with release() once done with it keeps the decoder from allocating
+        anything per frame.
+
+        With workers > 1, frames are decoded by a thread pool, up to two
+        per worker ahead of the consumer, and yielded in stream order.
+        Threads share the packets without copying them, and unpacking runs
+        in numpy operations that release the GIL.
+
+        Args:
+            packets: RTP packets containing video data
+            stream_info: Information about the RTP stream
+
+        Returns:
+            Iterator over frames as returned by decode()
+        """
         if self.params is None:
             self.params = self._detect_params(packets, stream_info)
+        self.frame_count = 0
+
+        # Buffers are shared by the decoding threads: pools are set up here
+        shape = (self.params.height, self.params.width, 3)
+        if self.frame_pool is None or self.frame_pool.shape != shape:
+            self.frame_pool = FramePool(shape, np.uint8, self.pool_depth)
+        height, line_bytes = self.params.height, self.params.line_bytes
+        work = (FramePool((height, line_bytes), np.uint8, self.workers),
+                FramePool((height, line_bytes // self.params.pgroup[0]), np.uint16,
+                          self.workers))
+
+        if self.workers > 1:
+            return self._iter_frames_parallel(packets, work)
+        return self._iter_frames(packets, work)
+
+    def _iter_frames(self, packets: List[RTPPacketInfo],
+                     work: Tuple[FramePool, FramePool]) -> Iterator[np.ndarray]:
+        """Decode frames one after the other."""
+        for start, stop in self._frame_ranges(packets):
+            frame = self._decode_range(packets, start, stop, work)
+            if frame is not None:
+                self.frame_count += 1
+                yield frame
+
+    def _iter_frames_parallel(self, packets: List[RTPPacketInfo],
+                              work: Tuple[FramePool, FramePool]) -> Iterator[np.ndarray]:
+        """Decode frames in a thread pool, yielding them in order."""
+        from collections import deque
+        from concurrent.futures import ThreadPoolExecutor
+
+        ahead = 2 * self.workers
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            try:
+                ranges = iter(self._frame_ranges(packets))
+                while True:
+                    # Keep the pool busy, then wait for the oldest frame
+                    for start, stop in ranges:
+                        pending.append(executor.submit(self._decode_range, packets, start,
+                                                       stop, work))
+                        if len(pending) >= ahead:
+                            break
+                    if not pending:
+                        break
+                    frame = pending.popleft().result()
+                    if frame is not None:
+                        self.frame_count += 1
+                        yield frame
+            finally:
+                # Stopped early: do not decode frames nobody will read
+                for future in pending:
+                    future.cancel()
+
+    def _decode_range(self, packets: List[RTPPacketInfo], start: int, stop: int,
+                      work: Tuple[FramePool, FramePool]) -> Optional[np.ndarray]:
+        """Depacketize and decode one frame in work buffers from the given pools.
+
+        Args:
+            packets: RTP packets of the stream
+            start: Index of the first packet of the frame
+            stop: Index after the last packet of the frame
+            work: Pools of packed frame buffers and unpacking scratch buffers
 
-        # Group packets into frames based on marker bit
-        frames_data = self._group_into_frames(packets)
+        Returns:
+            Decoded frame, or None if decode fails
+        """
+        packed_pool, scratch_pool = work
+        packed, scratch = packed_pool.acquire(), scratch_pool.acquire()
+        try:
+            packed.fill(0)  # Lost packets leave their pixels blank
+            self.depacketize(packets, packed, start, stop)
+            return self._decode_frame(packed, scratch)
+        finally:
+            packed_pool.release(packed)
+            scratch_pool.release(scratch)
 
-        # Decode each frame
-        self.frames = []
-        for frame_packets in frames_data:
-            frame_data = b''.join(pkt.payload for pkt in frame_packets)
-            frame = self._decode_frame(frame_data)
-            if frame is not None:
-                self.frames.append(frame)
+    def release(self, frame: np.ndarray):
+        """Hand a decoded frame back for reuse by later frames.
 
-        return self.frames
+        The frame must not be used afterwards: its buffer is overwritten by
+        a frame decoded later.
+
+        Args:
+            frame: Frame yielded by iter_frames() or returned by decode()
+        """
+        if self.frame_pool is not None:
+            self.frame_pool.release(frame)
+
+    def depacketize(self, packets: List[RTPPacketInfo], out: np.ndarray, start: int = 0,
+                    stop: Optional[int] = None) -> int:
+        """Copy the pixel groups of packets to their place in a frame buffer.
+
+        Each SRD is written to its line (its row number, or twice the row
+        number plus the field bit for interlaced video) at the byte position
+        of its pixel offset, so packet order does not matter and lost
+        packets leave their part of the buffer untouched. SRDs that do not
+        fit the buffer are clipped.
+
+        Packet stores have all SRD headers of the range parsed in one
+        vectorized pass (see srd_table), and pixel data is copied straight
+        from the capture buffer, in runs of equally spaced SRDs (see
+        copy_blocks).
+
+        Args:
+            packets: RTP packets of the stream
+            out: Frame buffer of packed pixel groups, uint8 of shape
+                 (height, line_bytes)
+            start: Index of the first packet of the frame
+            stop: Index after the last packet of the frame (default: end)
+
+        Returns:
+            Number of pixel data bytes written
+        """
+        if self.params is None:
+            raise ValueError("Video parameters not set")
+        pgroup_bytes, pgroup_pixels = self.params.pgroup
+        lines, line_bytes = out.shape
+
+        if hasattr(packets, 'payload_offset'):
+            source = np.frombuffer(packets.buffer, dtype=np.uint8)
+            table = srd_table(source, packets.payload_offset[start:stop],
+                              packets.payload_length[start:stop])
+            row, field, offset = table['row'], table['field'], table['offset']
+            length, src = table['length'], table['start']
+        else:
+            joined, rows = self._srd_rows(packets[start:stop])
+            source = np.frombuffer(joined, dtype=np.uint8)
+            row, field, offset, length, src = rows
+
+        line = row * 2 + field if self.params.interlaced else row
+        position = offset // pgroup_pixels * pgroup_bytes
+        length = np.minimum(length, line_bytes - position)
+        keep = (line < lines) & (length > 0)
+        dst = (line * line_bytes + position)[keep]
+        return copy_blocks(source, src[keep], out, dst, length[keep])
+
+    @staticmethod
+    def _srd_rows(packets: List[RTPPacketInfo]
+                  ) -> Tuple[memoryview, Tuple[np.ndarray, ...]]:
+        """Parse the SRDs of a list of packets into a joined payload buffer.
+
+        Args:
+            packets: RTP packets
+
+        Returns:
+            Tuple of the joined payloads, and (row, field, offset, length,
+            start) arrays with one entry per SRD, as for srd_table
+        """
+        payloads = [bytes(pkt.payload) for pkt in packets]
+        rows = []
+        base = 0
+        for payload in payloads:
+            headers, position = parse_srd_headers(payload)
+            for length, field, row, offset in headers:
+                available = max(min(length, len(payload) - position), 0)
+                rows.append((row, field, offset, available, base + position))
+                position += length
+            base += len(payload)
+        columns = np.array(rows, dtype=np.int64).reshape(-1, 5).T
+        return memoryview(b''.join(payloads)), tuple(columns)
 
     def _detect_params(self, packets: List[RTPPacketInfo],
                        stream_info: RTPStreamInfo) -> VideoStreamParams:
@@ -101,10 +644,36 @@ class ST211020Decoder:
         Returns:
             Detected video parameters
         """
-        # Get average frame size by looking at marker-delimited groups
-        frames_data = self._group_into_frames(packets)
-
-        if not frames_data:
+        # Get average frame size by looking at marker-delimited groups. Sizes
+        # count pixel data only (SRD lengths), not the payload headers, and
+        # come from a few frames so long streams are not parsed twice.
+        if hasattr(packets, 'frame_bounds'):
+            # Packet store: frame boundaries and sizes come from its columns
+            bounds = packets.frame_bounds()
+            frame_count = len(bounds) - 1
+            sample = self._size_sample(packets.marker[bounds[1:] - 1])
+            data = np.frombuffer(packets.buffer, dtype=np.uint8)
+            offsets = packets.payload_offset
+            lengths = packets.payload_length
+            total_size = 0
+            for i in sample:
+                rows = slice(bounds[i], bounds[i + 1])
+                table = srd_table(data, offsets[rows], lengths[rows])
+                total_size += int(table['length'].sum())
+            if frame_count:
+                first_arrival = int(packets.arrival_ns[bounds[0]]) / 1e9
+                last_arrival = int(packets.arrival_ns[bounds[-1] - 1]) / 1e9
+        else:
+            frames_data = self._group_into_frames(packets)
+            frame_count = len(frames_data)
+            sample = self._size_sample([frame[-1].marker for frame in frames_data])
+            total_size = sum(length for i in sample for pkt in frames_data[i]
+                             for length, _, _, _ in parse_srd_headers(pkt.payload)[0])
+            if frame_count:
+                first_arrival = frames_data[0][0].arrival_time
+                last_arrival = frames_data[-1][-1].arrival_time
+
+        if not frame_count:
             # Fallback to 1080p defaults
             return VideoStreamParams(
                 width=1920,
@@ -116,14 +685,12 @@ class ST211020Decoder:
             )
 
         # Calculate average frame size
-        avg_frame_size = sum(
-            sum(len(p.payload) for p in frame) for frame in frames_data
-        ) / len(frames_data)
+        avg_frame_size = total_size / len(sample)
 
         # Calculate frame rate from timestamps
-        if len(frames_data) > 1:
-            time_diff = frames_data[-1][-1].arrival_time - frames_data[0][0].arrival_time
-            frame_rate = (len(frames_data) - 1) / time_diff if time_diff > 0 else 25.0
+        if frame_count > 1:
+            time_diff = last_arrival - first_arrival
+            frame_rate = (frame_count - 1) / time_diff if time_diff > 0 else 25.0
             # Round to nearest common frame rate
             frame_rate = min(self.COMMON_FRAME_RATES, key=lambda x: abs(x - frame_rate))
         else:
@@ -163,6 +730,48 @@ class ST211020Decoder:
 
         return best_params
 
+    def _size_sample(self, complete: Sequence[bool]) -> List[int]:
+        """Pick the frames whose sizes are averaged to detect the format.
+
+        The first frame may have started before the capture did, so it is
+        skipped when another complete frame follows.
+
+        Args:
+            complete: Whether each frame ends with a marker packet
+
+        Returns:
+            Indices of at most DETECT_FRAMES frames, complete ones if any
+        """
+        indices = np.flatnonzero(np.asarray(complete, dtype=bool)).tolist()
+        if len(indices) > 1:
+            indices = indices[1:]
+        elif not indices:
+            indices = list(range(len(complete)))
+        return indices[:self.DETECT_FRAMES]
+
+    def _frame_ranges(self, packets: List[RTPPacketInfo]) -> Iterator[Tuple[int, int]]:
+        """Yield the packet index range of each frame.
+
+        Frames end at a packet with the marker bit set; for interlaced
+        video, where the marker ends each field, a frame spans two of these.
+        Packet stores provide their frame boundaries directly (precomputed
+        when loaded from a sidecar index).
+
+        Args:
+            packets: RTP packets in sequence order
+
+        Yields:
+            (start, stop) packet indices of one frame
+        """
+        if hasattr(packets, 'frame_bounds'):
+            bounds = packets.frame_bounds().tolist()
+        else:
+            sizes = [len(frame) for frame in self._group_into_frames(packets)]
+            bounds = np.concatenate(([0], np.cumsum(sizes, dtype=np.int64))).tolist()
+        if self.params.interlaced and len(bounds) > 2:
+            bounds = bounds[::2] + ([bounds[-1]] if len(bounds) % 2 == 0 else [])
+        yield from zip(bounds[:-1], bounds[1:])
+
     def _group_into_frames(self, packets: List[RTPPacketInfo]) -> List[List[RTPPacketInfo]]:
         """Group RTP packets into frames based on marker bit.
 
@@ -187,146 +796,56 @@ class ST211020Decoder:
 
         return frames
 
-    def _decode_frame(self, frame_data: bytes) -> Optional[np.ndarray]:
-        """Decode a single video frame.
+    def unpack_frame(self, packed: np.ndarray, to_8bit: bool = False,
+                     out: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+                     ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Unpack a depacketized frame into full-precision component planes.
 
         Args:
-            frame_data: Raw frame bytes
+            packed: Frame buffer filled by depacketize(), uint8 of shape
+                    (height, line_bytes)
+            to_8bit: Convert samples to 8 bits
+            out: Planes to unpack into (allocated if None)
 
         Returns:
-            Numpy array (height, width, channels) or None if decode fails
+            Planes (Y, Cb, Cr) or (R, G, B), see unpack_planes()
         """
         if self.params is None:
             raise ValueError("Video parameters not set")
+        return unpack_planes(packed, self.params, to_8bit, out)
 
-        try:
-            if self.params.pixel_format == 'YCbCr-4:2:2':
-                return self._decode_422(frame_data)
-            elif self.params.pixel_format == 'YCbCr-4:4:4':
-                return self._decode_444(frame_data)
-            elif self.params.pixel_format == 'RGB':
-                return self._decode_rgb(frame_data)
-            else:
-                raise ValueError(f"Unsupported pixel format: {self.params.pixel_format}")
-        except Exception as e:
-            # Return None for failed frames
-            return None
-
-    def _decode_422(self, data: bytes) -> np.ndarray:
-        """Decode YCbCr 4:2:2 frame.
-
-        Args:
-            data: Raw frame bytes
-
-        Returns:
-            Numpy array (height, width, 3) in YCbCr format
-        """
-        width, height = self.params.width, self.params.height
-        bit_depth = self.params.bit_depth
-
-        if bit_depth == 8:
-            # For 8-bit, UYVY packing: U Y V Y (4 bytes for 2 pixels)
-            expected_size = width * height * 2
-            if len(data) < expected_size:
-                # Pad with zeros if data is too short
-                data = data + b'\x00' * (expected_size - len(data))
-
-            # Decode UYVY
-            uyvy = np.frombuffer(data[:expected_size], dtype=np.uint8)
-            uyvy = uyvy.reshape(height, width // 2, 4)
-
-            # Extract Y, U, V components
-            y = np.zeros((height, width), dtype=np.uint8)
-            u = np.zeros((height, width), dtype=np.uint8)
-            v = np.zeros((height, width), dtype=np.uint8)
-
-            y[:, 0::2] = uyvy[:, :, 1]  # Y0
-            y[:, 1::2] = uyvy[:, :, 3]  # Y1
-            u[:, 0::2] = uyvy[:, :, 0]  # U
-            u[:, 1::2] = uyvy[:, :, 0]  # U (duplicate)
-            v[:, 0::2] = uyvy[:, :, 2]  # V
-            v[:, 1::2] = uyvy[:, :, 2]  # V (duplicate)
-
-            # Stack into YCbCr image
-            frame = np.stack([y, u, v], axis=2)
-
-        elif bit_depth == 10:
-            # 10-bit 4:2:2 is more complex, typically packed
-            # For simplicity, treat as 16-bit and scale down
-            expected_size = width * height * 2 * 2  # 2 components per pixel, 2 bytes each
-            if len(data) < expected_size:
-                data = data + b'\x00' * (expected_size - len(data))
-
-            # Simplified 10-bit decode - read as 16-bit big-endian
-            pixels = np.frombuffer(data[:expected_size], dtype='>u2')
-            pixels = (pixels >> 6).astype(np.uint8)  # Convert 10-bit to 8-bit
-
-            # Reshape and separate components (simplified)
-            frame = pixels.reshape(height, width, 2)
-            # Expand to 3 channels by duplicating chroma
-            y = frame[:, :, 0:1]
-            c = frame[:, :, 1:2]
-            frame = np.concatenate([y, c, c], axis=2)
-
-        else:
-            raise ValueError(f"Unsupported bit depth for 4:2:2: {bit_depth}")
-
-        return frame
-
-    def _decode_444(self, data: bytes) -> np.ndarray:
-        """Decode YCbCr 4:4:4 frame.
-
-        Args:
-            data: Raw frame bytes
-
-        Returns:
-            Numpy array (height, width, 3) in YCbCr format
-        """
-        width, height = self.params.width, self.params.height
-        bit_depth = self.params.bit_depth
-
-        expected_size = width * height * 3 * ((bit_depth + 7) // 8)
-
-        if len(data) < expected_size:
-            data = data + b'\x00' * (expected_size - len(data))
-
-        if bit_depth == 8:
-            pixels = np.frombuffer(data[:expected_size], dtype=np.uint8)
-            frame = pixels.reshape(height, width, 3)
-        else:
-            # For 10/12-bit, read as 16-bit and scale
-            pixels = np.frombuffer(data[:expected_size], dtype='>u2')
-            pixels = (pixels >> (bit_depth - 8)).astype(np.uint8)
-            frame = pixels.reshape(height, width, 3)
-
-        return frame
+    def _decode_frame(self, packed: np.ndarray,
+                      scratch: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """Decode a single video frame.
 
-    def _decode_rgb(self, data: bytes) -> np.ndarray:
-        """Decode RGB frame.
+        Samples are unpacked straight into the channels of a frame from
+        frame_pool.
 
         Args:
-            data: Raw frame bytes
+            packed: Frame buffer of packed pixel groups, uint8 of shape
+                    (height, line_bytes)
+            scratch: Work buffer, see _unpack_columns()
 
         Returns:
-            Numpy array (height, width, 3) in RGB format
+            8-bit numpy array (height, width, 3) in YCbCr or RGB format, 4:2:2
+            chroma repeated for both pixels of a pair, or None if decode fails
         """
-        width, height = self.params.width, self.params.height
-        bit_depth = self.params.bit_depth
-
-        expected_size = width * height * 3 * ((bit_depth + 7) // 8)
-
-        if len(data) < expected_size:
-            data = data + b'\x00' * (expected_size - len(data))
+        if self.params is None:
+            raise ValueError("Video parameters not set")
 
-        if bit_depth == 8:
-            pixels = np.frombuffer(data[:expected_size], dtype=np.uint8)
-            frame = pixels.reshape(height, width, 3)
+        frame = self.frame_pool.acquire()
+        if self.params.pixel_format == 'YCbCr-4:2:2':
+            # Chroma repeated for both pixels of a pair
+            planes = [(frame[:, :, 0],), (frame[:, 0::2, 1], frame[:, 1::2, 1]),
+                      (frame[:, 0::2, 2], frame[:, 1::2, 2])]
         else:
-            # For 10/12-bit, read as 16-bit and scale
-            pixels = np.frombuffer(data[:expected_size], dtype='>u2')
-            pixels = (pixels >> (bit_depth - 8)).astype(np.uint8)
-            frame = pixels.reshape(height, width, 3)
-
+            planes = [(frame[:, :, 0],), (frame[:, :, 1],), (frame[:, :, 2],)]
+        try:
+            _unpack_frame(packed, self.params, True, planes, scratch)
+        except ValueError:
+            # Return None for failed frames
+            self.release(frame)
+            return None
         return frame
 
     def get_video_info(self) -> dict:
@@ -335,7 +854,7 @@ class ST211020Decoder:
         Returns:
             Dictionary with video information
         """
-        if self.params is None or not self.frames:
+        if self.params is None or not self.frame_count:
             return {}
 
         return {
@@ -345,7 +864,7 @@ class ST211020Decoder:
             'bit_depth': self.params.bit_depth,
             'frame_rate': self.params.frame_rate,
             'interlaced': self.params.interlaced,
-            'num_frames': len(self.frames),
-            'duration_seconds': len(self.frames) / self.params.frame_rate,
+            'num_frames': self.frame_count,
+            'duration_seconds': self.frame_count / self.params.frame_rate,
             'resolution': f"{self.params.width}x{self.params.height}"
         }
@@ -4,7 +4,8 @@ import struct
 import numpy as np
 from dataclasses import dataclass
 from typing import Optional, List
-from ..rtp_extractor import RTPPacketInfo, RTPStreamInfo
+from ..packet_store import RTPPacketInfo
+from ..rtp_extractor import RTPStreamInfo
 
 
 @dataclass
@@ -2,8 +2,9 @@
 
 import struct
 from dataclasses import dataclass
-from typing import List, Optional, Dict, Tuple
-from ..rtp_extractor import RTPPacketInfo, RTPStreamInfo
+from typing import List, Optional, Dict, Tuple, Union
+from ..packet_store import RTPPacketInfo
+from ..rtp_extractor import RTPStreamInfo
 
 
 @dataclass
@@ -112,11 +113,12 @@ class ST211040Decoder:
 
         return self.anc_packets
 
-    def _parse_st2110_40_payload(self, payload: bytes, timestamp: float) -> List[ANCPacket]:
+    def _parse_st2110_40_payload(self, payload: Union[bytes, memoryview],
+                                 timestamp: float) -> List[ANCPacket]:
         """Parse ST 2110-40 RTP payload to extract ANC packets.
 
         Args:
-            payload: RTP payload bytes
+            payload: RTP payload bytes or memoryview
             timestamp: Packet timestamp
 
         Returns:
@@ -178,7 +180,8 @@ class ST211040Decoder:
         if len(data) < 4 + data_count:
             return None
 
-        user_data = data[3:3+data_count]
+        # Copy out the (small) user data so ANC packets don't pin the capture
+        user_data = bytes(data[3:3 + data_count])
         checksum = data[3+data_count] if len(data) > 3+data_count else 0
 
         return ANCPacket(
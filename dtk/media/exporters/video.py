@@ -1,9 +1,10 @@
 """Video exporter for MP4, MOV, and other formats using FFmpeg."""
 
+import itertools
 import subprocess
 import tempfile
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Iterable, List, Optional
 import numpy as np
 
 
@@ -26,6 +27,7 @@ class VideoExporter:
     def __init__(self):
         """Initialize video exporter."""
         self.last_export_path: Optional[str] = None
+        self.frames_written = 0  # Frames sent to FFmpeg by the last export
 
     def export(self, frames: List[np.ndarray], frame_rate: float, output_path: str,
                format: str = 'mp4', codec: str = 'h264', **kwargs) -> str:
@@ -50,6 +52,38 @@ class VideoExporter:
             ValueError: If format or codec is not supported
             RuntimeError: If FFmpeg fails
         """
+        return self.export_stream(frames, frame_rate, output_path, format, codec,
+                                  **kwargs)
+
+    def export_stream(self, frames: Iterable[np.ndarray], frame_rate: float,
+                      output_path: str, format: str = 'mp4', codec: str = 'h264',
+                      release: Optional[Callable[[np.ndarray], None]] = None,
+                      **kwargs) -> str:
+        """Export video frames to file as they are produced.
+
+        Frames are written to FFmpeg one at a time as the iterable yields
+        them (e.g. ST211020Decoder.iter_frames()), so memory use does not
+        depend on the number of frames. The frame size is taken from the
+        first frame.
+
+        Args:
+            frames: Iterable of numpy arrays (height, width, channels)
+            frame_rate: Frame rate in fps
+            output_path: Output file path
+            format: Output format ('mp4', 'mov', 'avi', 'mkv')
+            codec: Video codec ('h264', 'h265', 'prores', 'prores_ks')
+            release: Called with each frame once it has been written, e.g.
+                     ST211020Decoder.release to recycle frame buffers
+            **kwargs: Additional codec-specific options, as for export()
+
+        Returns:
+            Path to exported file
+
+        Raises:
+            ValueError: If format or codec is not supported, or there are no
+                        frames
+            RuntimeError: If FFmpeg fails
+        """
         format = format.lower()
         codec = codec.lower()
 
@@ -64,8 +98,12 @@ class VideoExporter:
         # Ensure output path has correct extension
         output_path = self._ensure_extension(output_path, format)
 
-        # Get frame dimensions
-        height, width, channels = frames[0].shape
+        # Get frame dimensions from the first frame
+        frames = iter(frames)
+        first = next(frames, None)
+        if first is None:
+            raise ValueError("No video frames to export")
+        height, width, channels = first.shape
 
         # Determine pixel format
         input_pixel_format = kwargs.get('pixel_format', 'rgb')
@@ -83,26 +121,39 @@ class VideoExporter:
             width, height, frame_rate, pix_fmt, codec, output_path, **kwargs
         )
 
-        # Run FFmpeg
+        # Run FFmpeg; its log goes to a file, as a pipe nobody reads would
+        # fill up and stall a long export
+        self.frames_written = 0
         try:
-            process = subprocess.Popen(
-                ffmpeg_cmd,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-
-            # Write frames to FFmpeg stdin
-            for frame in frames:
-                # Ensure frame is uint8
-                if frame.dtype != np.uint8:
-                    frame = frame.astype(np.uint8)
-                process.stdin.write(frame.tobytes())
-
-            stdout, stderr = process.communicate()
-
-            if process.returncode != 0:
-                raise RuntimeError(f"FFmpeg error: {stderr.decode('utf-8')}")
+            with tempfile.TemporaryFile() as log:
+                process = subprocess.Popen(
+                    ffmpeg_cmd,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.DEVNULL,
+                    stderr=log
+                )
+
+                # Write frames to FFmpeg stdin as they arrive
+                raw = np.empty(height * width * channels, dtype=np.uint8)
+                try:
+                    for frame in itertools.chain([first], frames):
+                        process.stdin.write(self._frame_bytes(frame, pix_fmt, raw))
+                        self.frames_written += 1
+                        if release is not None:
+                            release(frame)
+                except BrokenPipeError:
+                    pass  # FFmpeg exited early: its log says why
+                finally:
+                    try:
+                        process.stdin.close()
+                    except BrokenPipeError:
+                        pass
+                    process.wait()
+
+                if process.returncode != 0:
+                    log.seek(0)
+                    error = log.read().decode('utf-8', 'replace')
+                    raise RuntimeError(f"FFmpeg error: {error}")
 
         except Exception as e:
             raise RuntimeError(f"Failed to export video: {str(e)}")
@@ -110,6 +161,38 @@ class VideoExporter:
         self.last_export_path = output_path
         return output_path
 
+    @staticmethod
+    def _frame_bytes(frame: np.ndarray, pix_fmt: str, out: np.ndarray) -> memoryview:
+        """Lay out one frame as FFmpeg expects for the input pixel format.
+
+        Args:
+            frame: Frame of shape (height, width, 3)
+            pix_fmt: FFmpeg input pixel format
+            out: uint8 buffer of the raw frame size, reused across frames for
+                 the planar formats
+
+        Returns:
+            Raw frame bytes: interleaved for rgb24, one plane after another
+            for the planar YUV formats (4:2:2 chroma from even pixels)
+        """
+        # Ensure frame is uint8
+        if frame.dtype != np.uint8:
+            frame = frame.astype(np.uint8)
+        height, width, _ = frame.shape
+        if pix_fmt == 'yuv422p':
+            chroma = frame[:, 0::2]
+            luma_size, chroma_size = height * width, chroma.shape[0] * chroma.shape[1]
+            out[:luma_size].reshape(height, width)[:] = frame[:, :, 0]
+            for i in (1, 2):
+                start = luma_size + (i - 1) * chroma_size
+                plane = out[start:start + chroma_size].reshape(chroma.shape[:2])
+                plane[:] = chroma[:, :, i]
+            return memoryview(out[:luma_size + 2 * chroma_size])
+        if pix_fmt == 'yuv444p':
+            out.reshape(3, height, width)[:] = frame.transpose(2, 0, 1)
+            return memoryview(out)
+        return memoryview(np.ascontiguousarray(frame)).cast('B')
+
     def _ensure_extension(self, path: str, format: str) -> str:
         """Ensure file path has correct extension.
 
@@ -0,0 +1,134 @@
+"""Flow selection applied while a capture is scanned."""
+
+import ipaddress
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Set, Tuple
+
+import numpy as np
+
+
+def ip_key(address: str) -> bytes:
+    """Convert an IP address to the 16-byte form used by flow_addresses().
+
+    Args:
+        address: IPv4 or IPv6 address
+
+    Returns:
+        16 address bytes (IPv4 addresses in IPv4-mapped IPv6 form)
+    """
+    ip = ipaddress.ip_address(address)
+    if ip.version == 4:
+        ip = ipaddress.IPv6Address(b'\x00' * 10 + b'\xff\xff' + ip.packed)
+    return ip.packed
+
+
+def parse_destination(text: str) -> Tuple[str, Optional[int]]:
+    """Parse an ``IP[:PORT]`` destination (IPv6 as ``[addr]:port``).
+
+    Args:
+        text: Destination string, e.g. "239.1.1.1:20000" or "[ff0e::1]:5004"
+
+    Returns:
+        Tuple of (address, port or None)
+
+    Raises:
+        ValueError: If the address or port is invalid
+    """
+    if text.startswith('['):
+        address, _, rest = text[1:].partition(']')
+        port = rest[1:] if rest.startswith(':') else None
+    elif text.count(':') == 1:
+        address, port = text.split(':')
+    else:
+        address, port = text, None
+
+    ipaddress.ip_address(address)  # Validate
+    if port is None:
+        return address, None
+    port_value = int(port)
+    if not 0 <= port_value <= 0xFFFF:
+        raise ValueError(f"Invalid port: {port}")
+    return address, port_value
+
+
+@dataclass
+class FlowFilter:
+    """Select which RTP flows an extractor keeps.
+
+    Every criterion left as None matches everything; the criteria that are
+    set must all match. The filter is evaluated on the decoded header
+    columns of each batch of packets (see RTPStreamExtractor), before any
+    packet is added to a stream.
+
+    Example:
+        FlowFilter(stream_types={"audio"}, destinations={("239.1.1.1", 20000)})
+    """
+    ssrcs: Optional[Set[int]] = None
+    payload_types: Optional[Set[int]] = None
+    sources: Optional[Set[str]] = None  # Source IPs
+    # (IP, port or None for any)
+    destinations: Optional[Set[Tuple[str, Optional[int]]]] = None
+    vlans: Optional[Set[int]] = None  # -1 selects untagged frames
+    stream_types: Optional[Set[str]] = None
+
+    @property
+    def needs_flow_addresses(self) -> bool:
+        """Whether the filter looks at addresses, ports or VLANs."""
+        return (self.sources is not None or self.destinations is not None
+                or self.vlans is not None)
+
+    def mask(self, headers: Dict[str, np.ndarray],
+             stream_type_of: Optional[Callable[[int, int], str]] = None) -> np.ndarray:
+        """Evaluate the filter over a batch of decoded packets.
+
+        Args:
+            headers: Header columns ('ssrc' and 'payload_type', plus
+                'src_ip', 'dst_ip', 'dst_port' and 'vlan' when
+                needs_flow_addresses)
+            stream_type_of: Maps (SSRC, payload type) to a stream type;
+                required when stream_types is set
+
+        Returns:
+            Boolean array, True for packets to keep
+        """
+        ssrc = headers['ssrc']
+        payload_type = headers['payload_type']
+        keep = np.ones(len(ssrc), dtype=bool)
+
+        if self.ssrcs is not None:
+            keep &= np.isin(ssrc, list(self.ssrcs))
+        if self.payload_types is not None:
+            keep &= np.isin(payload_type, list(self.payload_types))
+        if self.vlans is not None:
+            keep &= np.isin(headers['vlan'], list(self.vlans))
+
+        if self.sources is not None:
+            src_ip = headers['src_ip']
+            matched = np.zeros(len(ssrc), dtype=bool)
+            for address in self.sources:
+                matched |= src_ip == np.void(ip_key(address))
+            keep &= matched
+
+        if self.destinations is not None:
+            matched = np.zeros(len(ssrc), dtype=bool)
+            dst_ip = headers['dst_ip']
+            for address, port in self.destinations:
+                hit = dst_ip == np.void(ip_key(address))
+                if port is not None:
+                    hit &= headers['dst_port'] == port
+                matched |= hit
+            keep &= matched
+
+        if self.stream_types is not None:
+            if stream_type_of is None:
+                raise ValueError("stream_type_of is required to filter by stream type")
+            # Stream type depends only on (SSRC, payload type): resolve once per pair
+            pairs = (ssrc.astype(np.uint64) << 8) | payload_type
+            unique, inverse = np.unique(pairs, return_inverse=True)
+            wanted = np.array([
+                stream_type_of(int(pair) >> 8, int(pair) & 0xFF) in self.stream_types
+                for pair in unique.tolist()
+            ], dtype=bool)
+            keep &= wanted[inverse.reshape(-1)]
+
+        return keep
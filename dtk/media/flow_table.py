@@ -0,0 +1,190 @@
+"""Identification of RTP flows by addresses, port, SSRC and VLAN."""
+
+import ipaddress
+import struct
+from typing import Dict, List, NamedTuple
+
+import numpy as np
+
+from .flow_filter import ip_key
+
+# Packed binary form of a flow key, zero-padded to six 64-bit words so a
+# batch of keys can be hashed as integers
+FLOW_KEY_DTYPE = np.dtype({
+    'names': ['src_ip', 'dst_ip', 'dst_port', 'ssrc', 'vlan'],
+    'formats': ['V16', 'V16', '>u2', '>u4', '>i4'],
+    'offsets': [0, 16, 32, 34, 38],
+    'itemsize': 48,
+})
+
+# The same packed form for a single packet
+_FLOW_KEY = struct.Struct('>16s16sHIi6x')
+
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def ip_text(raw: bytes) -> str:
+    """Format a 16-byte address from flow_addresses().
+
+    Args:
+        raw: Address bytes (IPv4 in IPv4-mapped IPv6 form)
+
+    Returns:
+        Dotted IPv4 or IPv6 text, or "" for an unknown (all-zero) address
+    """
+    if raw == bytes(16):
+        return ''
+    address = ipaddress.IPv6Address(raw)
+    return str(address.ipv4_mapped or address)
+
+
+def ip_bytes(text: str) -> bytes:
+    """Convert an address from a FlowKey back to its 16-byte form.
+
+    Args:
+        text: Address as formatted by ip_text()
+
+    Returns:
+        16 address bytes, all zero for an unknown ("") address
+    """
+    return ip_key(text) if text else bytes(16)
+
+
+class FlowKey(NamedTuple):
+    """Identity of an RTP flow.
+
+    Addresses are "" when unknown (e.g. datagrams fed without their IP
+    header); vlan is -1 for untagged frames.
+    """
+    src_ip: str
+    dst_ip: str
+    dst_port: int
+    ssrc: int
+    vlan: int = -1
+
+
+class FlowTable:
+    """Assign compact integer IDs to flows.
+
+    Packed keys are hashed to 64-bit digests with a few vectorized integer
+    operations. A batch of packets is reduced to its distinct digests, which
+    are looked up in a sorted array of known digests with one searchsorted
+    call; only flows not seen before go through Python, where a dict keyed
+    by the packed bytes assigns their ID. Matches are verified against the
+    packed keys, so digest collisions cost speed, never correctness. IDs are
+    assigned in order of first appearance, and the table stays fast with
+    thousands of flows.
+    """
+
+    def __init__(self):
+        """Initialize an empty table."""
+        self._ids: Dict[bytes, int] = {}
+        self._packed: List[bytes] = []
+        self.keys: List[FlowKey] = []
+        # Packed keys by flow ID as words, and known digests (sorted) with their IDs
+        self._words = np.empty((0, FLOW_KEY_DTYPE.itemsize // 8), dtype=np.uint64)
+        self._digests = np.empty(0, dtype=np.uint64)
+        self._digest_ids = np.empty(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _register(self, packed: bytes) -> int:
+        """Add a flow given its packed key and return its new ID."""
+        src_ip, dst_ip, dst_port, ssrc, vlan = _FLOW_KEY.unpack(packed)
+        flow_id = self._ids[packed] = len(self.keys)
+        self._packed.append(packed)
+        self.keys.append(FlowKey(ip_text(src_ip), ip_text(dst_ip), dst_port, ssrc, vlan))
+        return flow_id
+
+    def flow_id(self, src_ip: bytes, dst_ip: bytes, dst_port: int, ssrc: int,
+                vlan: int) -> int:
+        """Look up (registering it if needed) the flow of a single packet.
+
+        Args:
+            src_ip: 16-byte source address (see pcap_reader.flow_address)
+            dst_ip: 16-byte destination address
+            dst_port: UDP destination port
+            ssrc: RTP SSRC
+            vlan: Outer VLAN ID, -1 if untagged
+
+        Returns:
+            Flow ID
+        """
+        packed = _FLOW_KEY.pack(src_ip, dst_ip, dst_port, ssrc, vlan)
+        flow_id = self._ids.get(packed)
+        if flow_id is None:
+            flow_id = self._register(packed)
+        return flow_id
+
+    def flow_ids(self, headers: Dict[str, np.ndarray]) -> np.ndarray:
+        """Look up (registering new flows as needed) the flow of each packet.
+
+        Args:
+            headers: Header columns with 'src_ip', 'dst_ip', 'dst_port',
+                'ssrc' and 'vlan' (as yielded by scan_rtp_headers)
+
+        Returns:
+            int64 array with the flow ID of each packet
+        """
+        count = len(headers['ssrc'])
+        if not count:
+            return np.empty(0, dtype=np.int64)
+
+        packed = np.zeros(count, dtype=FLOW_KEY_DTYPE)
+        for name in FLOW_KEY_DTYPE.names:
+            packed[name] = headers[name]
+        words = packed.view(np.uint64).reshape(count, -1)
+
+        digest = words[:, 0].copy()
+        for column in range(1, words.shape[1]):
+            digest ^= words[:, column]
+            digest *= _HASH_MULTIPLIER
+            digest ^= digest >> np.uint64(32)
+
+        unique, first, inverse = np.unique(digest, return_index=True, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        if not np.array_equal(words, words[first[inverse]]):
+            # Digest collision within the batch: group by the packed keys instead
+            raw = packed.view(f'V{FLOW_KEY_DTYPE.itemsize}')
+            _, first, inverse = np.unique(raw, return_index=True, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            unique = digest[first]
+
+        # Known flows: one vectorized lookup, verified against the packed keys
+        ids = np.full(len(first), -1, dtype=np.int64)
+        known = len(self._digests)
+        if known:
+            position = np.minimum(np.searchsorted(self._digests, unique), known - 1)
+            candidate = self._digest_ids[position]
+            found = (self._digests[position] == unique)
+            found &= (self._words[candidate] == words[first]).all(axis=1)
+            ids[found] = candidate[found]
+
+        missing = np.flatnonzero(ids < 0)
+        if len(missing):
+            missing = missing[np.argsort(first[missing])]  # First appearance order
+            for i in missing.tolist():
+                key = words[first[i]].tobytes()
+                flow_id = self._ids.get(key)
+                if flow_id is None:
+                    flow_id = self._register(key)
+                ids[i] = flow_id
+            self._remember(unique[missing], ids[missing])
+
+        return ids[inverse]
+
+    def _remember(self, digests: np.ndarray, flow_ids: np.ndarray):
+        """Add digests of newly looked-up flows to the sorted digest index."""
+        if len(self._words) < len(self._packed):
+            added = np.frombuffer(b''.join(self._packed[len(self._words):]),
+                                  dtype=np.uint64).reshape(-1, self._words.shape[1])
+            self._words = np.concatenate([self._words, added])
+
+        # Keep the first flow seen for a digest; colliding flows use the dict
+        new = ~np.isin(digests, self._digests)
+        digests, unique_rows = np.unique(digests[new], return_index=True)
+        flow_ids = flow_ids[new][unique_rows]
+        position = np.searchsorted(self._digests, digests)
+        self._digests = np.insert(self._digests, position, digests)
+        self._digest_ids = np.insert(self._digest_ids, position, flow_ids)
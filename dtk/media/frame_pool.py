@@ -0,0 +1,81 @@
+"""Pool of reusable fixed-shape frame buffers.
+
+Decoding video at full rate allocates and frees a frame-sized array per
+frame, and for 4K that is gigabytes per second of allocator work. A
+FramePool hands out buffers of one shape and takes them back once their
+consumer is done with them, so a decoder whose frames are released reuses
+the same few buffers for the whole stream.
+"""
+
+import threading
+from collections import deque
+from typing import Tuple
+
+import numpy as np
+
+
+class FramePool:
+    """Free list of numpy buffers of one shape and dtype.
+
+    acquire() never blocks: when no released buffer is available it
+    allocates a new one, so consumers that keep their frames (a list of
+    decoded frames, say) work unchanged and only lose the reuse. Released
+    buffers are kept up to the pool depth and dropped beyond it.
+
+    A released buffer is handed out again as is: its contents must not be
+    used after release(), and acquire() does not clear it. The pool may be
+    shared by threads.
+    """
+
+    def __init__(self, shape: Tuple[int, ...], dtype=np.uint8, depth: int = 4):
+        """Initialize an empty pool.
+
+        Args:
+            shape: Shape of the buffers
+            dtype: Data type of the buffers
+            depth: Most released buffers kept for reuse
+
+        Raises:
+            ValueError: If depth is negative
+        """
+        if depth < 0:
+            raise ValueError(f"Pool depth must not be negative: {depth}")
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.depth = depth
+        self.allocated = 0  # Buffers created by the pool so far
+        self._free = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> np.ndarray:
+        """Get a buffer, reusing a released one when available.
+
+        Returns:
+            Buffer of the pool's shape and dtype, with undefined contents
+        """
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+            self.allocated += 1
+        return np.empty(self.shape, dtype=self.dtype)
+
+    def release(self, buffer: np.ndarray):
+        """Return a buffer to the pool.
+
+        Args:
+            buffer: Buffer obtained from acquire()
+
+        Raises:
+            ValueError: If the buffer does not have the pool's shape and dtype
+        """
+        if buffer.shape != self.shape or buffer.dtype != self.dtype:
+            raise ValueError(f"Buffer of shape {buffer.shape} ({buffer.dtype}) does not "
+                             f"belong to a pool of {self.shape} ({self.dtype})")
+        with self._lock:
+            kept = any(free is buffer for free in self._free)
+            if len(self._free) < self.depth and not kept:
+                self._free.append(buffer)
+
+    def __len__(self) -> int:
+        """Get the number of released buffers ready for reuse."""
+        return len(self._free)
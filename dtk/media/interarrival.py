@@ -0,0 +1,161 @@
+"""Packet arrival statistics of an RTP stream: jitter, gaps and drift.
+
+All statistics are computed with vectorized passes over the arrival time
+and RTP timestamp columns of an extracted stream (see RTPPacketStore), in
+arrival order:
+
+- RFC 3550 interarrival jitter (section 6.4.1), the running estimate
+  J += (|D| - J) / 16 of the variation of the transit time.
+- A histogram of the gaps between consecutive packets, in power-of-two
+  buckets of nanoseconds.
+- The drift of the RTP clock relative to the capture clock, from a least
+  squares fit of RTP time against arrival time.
+"""
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from .online_stats import LOG_BUCKETS, iter_log_buckets, log_buckets
+
+if TYPE_CHECKING:
+    from .packet_store import RTPPacketStore
+
+# Default RTP clock rates by stream type (ST 2110-20/-40: 90 kHz, ST 2110-30: 48 kHz)
+CLOCK_RATES = {
+    "video": 90000,
+    "meta": 90000,
+    "audio": 48000,
+}
+DEFAULT_CLOCK_RATE = 90000
+
+# Gap histogram buckets: bucket b holds gaps in [2^(b-1), 2^b) ns, bucket 0 holds 0
+GAP_BUCKETS = LOG_BUCKETS
+
+# Block length of the chunked jitter recursion (see rfc3550_jitter)
+_JITTER_BLOCK = 256
+
+
+@dataclass
+class ArrivalStats:
+    """Arrival timing statistics of one stream."""
+    clock_rate: int  # RTP clock rate the timestamps were interpreted with
+    jitter_ns: float  # RFC 3550 interarrival jitter after the last packet
+    max_jitter_ns: float  # Highest value the jitter estimate reached
+    gap_min_ns: int  # Shortest gap between consecutive arrivals
+    gap_mean_ns: float
+    gap_max_ns: int
+    gap_histogram: np.ndarray  # Gap counts per bucket (GAP_BUCKETS entries)
+    drift_ppm: Optional[float]  # RTP clock error vs the capture clock, None if unknown
+
+    def gap_buckets(self) -> Iterator[Tuple[int, int, int]]:
+        """Iterate over the non-empty gap histogram buckets.
+
+        Yields:
+            Tuples of (lowest gap, highest gap, count), gaps in nanoseconds
+        """
+        return iter_log_buckets(self.gap_histogram)
+
+    def as_dict(self) -> Dict:
+        """Get the statistics as JSON-serializable values."""
+        return {
+            'clock_rate': self.clock_rate,
+            'jitter_ns': self.jitter_ns,
+            'max_jitter_ns': self.max_jitter_ns,
+            'gap_min_ns': self.gap_min_ns,
+            'gap_mean_ns': self.gap_mean_ns,
+            'gap_max_ns': self.gap_max_ns,
+            'gap_histogram': [list(bucket) for bucket in self.gap_buckets()],
+            'drift_ppm': self.drift_ppm,
+        }
+
+
+def rfc3550_jitter(transit_delta: np.ndarray, initial: float = 0.0) -> np.ndarray:
+    """Run the RFC 3550 jitter estimator over a sequence of transit deltas.
+
+    The recursion J(i) = J(i-1) + (|D(i)| - J(i-1)) / 16 is a first order
+    filter. It is evaluated in blocks: within a block, as a cumulative sum
+    weighted by powers of 16/15; across blocks, each block's final value
+    carries over decayed by (15/16)^k. The carry from more than two blocks
+    back is below float64 resolution and is dropped.
+
+    Args:
+        transit_delta: D(i), the change of transit time between consecutive
+                       packets, in RTP timestamp units
+        initial: Jitter estimate before the first delta, to continue an
+                 earlier run
+
+    Returns:
+        float64 jitter estimate after each packet
+    """
+    count = len(transit_delta)
+    block = _JITTER_BLOCK
+    padded = np.zeros(-(-count // block) * block)
+    padded[:count] = np.abs(transit_delta) / 16
+    padded = padded.reshape(-1, block)
+
+    steps = np.arange(block)
+    grow = (16 / 15) ** steps
+    local = np.cumsum(padded * grow, axis=1) / grow  # Each block starting from J = 0
+
+    decay = (15 / 16) ** block
+    ends = local[:, -1].copy()
+    ends[1:] += local[:-1, -1] * decay
+    ends[2:] += local[:-2, -1] * decay * decay
+    carry = np.concatenate(([0.0], ends[:-1]))
+    jitter = local + carry[:, None] * (15 / 16) ** (steps + 1)
+    jitter = jitter.reshape(-1)[:count]
+    if initial:
+        jitter += initial * (15 / 16) ** np.arange(1, count + 1)
+    return jitter
+
+
+def arrival_stats(store: 'RTPPacketStore',
+                  clock_rate: int = DEFAULT_CLOCK_RATE) -> ArrivalStats:
+    """Compute the arrival timing statistics of a stream.
+
+    Args:
+        store: Packets of the stream
+        clock_rate: RTP clock rate in Hz (see CLOCK_RATES)
+
+    Returns:
+        Arrival statistics
+
+    Raises:
+        ValueError: If the stream has fewer than two packets
+    """
+    if len(store) < 2:
+        raise ValueError("At least two packets are needed for arrival statistics")
+
+    order = np.argsort(store.arrival_ns, kind='stable')
+    arrival = store.arrival_ns[order]
+    # Unwrap the 32-bit RTP timestamps along arrival order
+    steps = np.diff(store.timestamp[order].astype(np.int64))
+    steps = ((steps + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+
+    gaps = np.diff(arrival)
+    transit_delta = gaps * (clock_rate / 1e9) - steps
+    jitter = rfc3550_jitter(transit_delta) * (1e9 / clock_rate)
+
+    histogram = np.bincount(log_buckets(gaps), minlength=GAP_BUCKETS)
+
+    # Least squares slope of RTP time against arrival time
+    elapsed = (arrival - arrival[0]) / 1e9
+    rtp_time = np.concatenate(([0], np.cumsum(steps))) / clock_rate
+    elapsed -= elapsed.mean()
+    spread = float(np.dot(elapsed, elapsed))
+    drift = None
+    if spread > 0:
+        drift = (float(np.dot(elapsed, rtp_time - rtp_time.mean())) / spread - 1) * 1e6
+
+    return ArrivalStats(
+        clock_rate=clock_rate,
+        jitter_ns=float(jitter[-1]),
+        max_jitter_ns=float(jitter.max()),
+        gap_min_ns=int(gaps.min()),
+        gap_mean_ns=float(gaps.mean()),
+        gap_max_ns=int(gaps.max()),
+        gap_histogram=histogram,
+        drift_ppm=drift,
+    )
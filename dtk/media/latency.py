@@ -0,0 +1,142 @@
+"""Media latency of RTP streams (SMPTE ST 2110-10).
+
+ST 2110-10 ties the RTP clock of every stream to PTP: an RTP timestamp is
+the media clock (90 kHz for video and ancillary data, 48 kHz for audio)
+counted since the PTP epoch, modulo 2^32. Projecting a packet's timestamp
+back to PTP time gives the instant its content was sampled, and the
+difference to the packet's arrival is the latency through the sender and
+network.
+
+Latency is computed per packet with one vectorized pass over the arrival
+and timestamp arrays of an extracted stream, and summarised per frame
+(packets sharing an RTP timestamp) by the latency of the frame's first
+packet.
+"""
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .packet_store import RTPPacketStore
+
+# Percentiles reported by default
+PERCENTILES = (1.0, 50.0, 99.0, 99.9)
+
+# Frames whose latency is further than OUTLIER_SIGMAS robust standard
+# deviations (and at least MIN_OUTLIER_NS) from the median are outliers
+OUTLIER_SIGMAS = 5.0
+MIN_OUTLIER_NS = 1000.0
+
+
+@dataclass
+class LatencyReport:
+    """Media latency of one stream.
+
+    Per-packet arrays are in the order of the store the report was built
+    from (sequence order); frames are the runs of packets sharing an RTP
+    timestamp, delimited by frame_bounds.
+    """
+    clock_rate: int  # RTP clock rate the timestamps were interpreted with
+    latency_ns: np.ndarray  # Arrival minus media time of each packet
+    min_ns: float
+    mean_ns: float
+    max_ns: float
+    percentiles: Dict[float, float]  # Latency by percentile
+    frame_bounds: np.ndarray  # Packet index boundaries of the frames
+    frame_timestamp: np.ndarray  # RTP timestamp of each frame
+    frame_latency_ns: np.ndarray  # Latency of each frame's first packet
+    outliers: np.ndarray  # Indices of the outlier frames
+    threshold_ns: float  # Largest deviation from the median frame latency not flagged
+    ptp: bool  # Whether packet times were mapped from PTP messages
+
+    @property
+    def median_frame_latency_ns(self) -> float:
+        """Get the median of the frame latencies."""
+        return float(np.median(self.frame_latency_ns))
+
+
+def media_latency(times_ns: np.ndarray, timestamps: np.ndarray,
+                  clock_rate: int) -> np.ndarray:
+    """Get the time between the media instant of RTP timestamps and PTP times.
+
+    The RTP clock reading at each time is computed exactly in int64, and the
+    timestamp taken as the nearest instant with the same reading modulo
+    2^32, so latencies of up to 2^31 clock ticks either way are recovered.
+
+    Args:
+        times_ns: PTP times in nanoseconds since the PTP epoch
+        timestamps: RTP timestamps
+        clock_rate: RTP clock rate in Hz
+
+    Returns:
+        float64 latency in nanoseconds (negative if a packet arrived before
+        its media time)
+    """
+    seconds, nanoseconds = np.divmod(np.asarray(times_ns, dtype=np.int64), 1_000_000_000)
+    scaled = nanoseconds * clock_rate
+    ticks = (seconds & 0xFFFFFFFF) * clock_rate + scaled // 1_000_000_000
+    elapsed = ticks - np.asarray(timestamps, dtype=np.int64)
+    elapsed = ((elapsed + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+    # Whole ticks plus the time past the last tick, in units of 1 / clock_rate ns
+    return (elapsed * 1_000_000_000 + scaled % 1_000_000_000) / clock_rate
+
+
+def analyze_latency(store: 'RTPPacketStore', clock_rate: int = 90000,
+                    leap_seconds: int = 37, percentiles: Sequence[float] = PERCENTILES,
+                    sigmas: float = OUTLIER_SIGMAS) -> LatencyReport:
+    """Analyze the media latency of a stream.
+
+    Packet times come from the store's PTP time map when it has one (see
+    RTPStreamExtractor use_ptp). Otherwise the capture clock is assumed to
+    be locked to PTP and to run on UTC, and leap_seconds is added to reach
+    PTP (TAI) time.
+
+    Outlier frames are those whose latency is further from the median frame
+    latency than sigmas robust standard deviations (1.4826 times the median
+    absolute deviation), and at least MIN_OUTLIER_NS.
+
+    Args:
+        store: Packets of the stream in sequence order
+        clock_rate: RTP clock rate in Hz (see interarrival.CLOCK_RATES)
+        leap_seconds: TAI - UTC offset applied to capture clock times
+        percentiles: Percentiles of the packet latency to report
+        sigmas: Outlier threshold in robust standard deviations
+
+    Returns:
+        Latency report of the stream
+
+    Raises:
+        ValueError: If the stream has no packets
+    """
+    if not len(store):
+        raise ValueError("No packets to analyze latency of")
+
+    ptp = store.ptp_ns
+    times = ptp if ptp is not None else store.arrival_ns + leap_seconds * 1_000_000_000
+    latency = media_latency(times, store.timestamp, clock_rate)
+
+    timestamp = store.timestamp
+    starts = np.concatenate(([0], np.flatnonzero(timestamp[1:] != timestamp[:-1]) + 1))
+    bounds = np.append(starts, len(store)).astype(np.int64)
+    frame_latency = latency[starts]
+
+    median = np.median(frame_latency)
+    deviation = np.abs(frame_latency - median)
+    threshold = max(sigmas * 1.4826 * float(np.median(deviation)), MIN_OUTLIER_NS)
+
+    return LatencyReport(
+        clock_rate=clock_rate,
+        latency_ns=latency,
+        min_ns=float(latency.min()),
+        mean_ns=float(latency.mean()),
+        max_ns=float(latency.max()),
+        percentiles=dict(zip(percentiles, np.percentile(latency, percentiles).tolist())),
+        frame_bounds=bounds,
+        frame_timestamp=timestamp[starts],
+        frame_latency_ns=frame_latency,
+        outliers=np.flatnonzero(deviation > threshold),
+        threshold_ns=threshold,
+        ptp=ptp is not None,
+    )
@@ -0,0 +1,183 @@
+"""Constant-memory running statistics.
+
+Building blocks for statistics over captures of any duration: each keeps
+a fixed amount of state however many values it has seen, and accepts
+values either as numpy batches (update, merged with Chan's parallel
+formulas) or one at a time (add, Welford's method), so the same code serves
+capture scans and live sources.
+
+- RunningStats: count, mean, variance, extremes and a histogram in
+  power-of-two buckets.
+- RunningRegression: least squares slope of y against x.
+"""
+
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+# Histogram buckets: bucket b holds values in [2^(b-1), 2^b), bucket 0 holds
+# values below 1 (including zero and negative values)
+LOG_BUCKETS = 64
+
+
+def log_buckets(values: np.ndarray) -> np.ndarray:
+    """Get the power-of-two histogram bucket of each value.
+
+    Args:
+        values: Non-negative values (anything below 1 goes to bucket 0)
+
+    Returns:
+        Bucket indices in [0, LOG_BUCKETS)
+    """
+    # frexp's exponent is the bit length of an integer, exact below 2^53
+    exponent = np.frexp(np.maximum(np.asarray(values, dtype=np.float64), 0.0))[1]
+    return np.clip(exponent, 0, LOG_BUCKETS - 1)
+
+
+def iter_log_buckets(counts: np.ndarray) -> Iterator[Tuple[int, int, int]]:
+    """Iterate over the non-empty buckets of a power-of-two histogram.
+
+    Args:
+        counts: Count per bucket (LOG_BUCKETS entries)
+
+    Yields:
+        Tuples of (lowest value, highest value, count); values are integers
+    """
+    for bucket in np.flatnonzero(counts).tolist():
+        low = 1 << (bucket - 1) if bucket else 0
+        yield low, (1 << bucket) - 1 if bucket else 0, int(counts[bucket])
+
+
+class RunningStats:
+    """Count, mean, variance, extremes and log histogram of a value stream."""
+
+    def __init__(self):
+        """Initialize empty statistics."""
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0  # Sum of squared deviations from the mean
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.histogram = np.zeros(LOG_BUCKETS, dtype=np.int64)
+
+    @property
+    def variance(self) -> float:
+        """Get the population variance (0 for fewer than two values)."""
+        return self._m2 / self.count if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        """Get the population standard deviation."""
+        return self.variance ** 0.5
+
+    def update(self, values: np.ndarray):
+        """Add a batch of values.
+
+        Args:
+            values: Values to add
+        """
+        values = np.asarray(values, dtype=np.float64)
+        count = len(values)
+        if not count:
+            return
+
+        mean = float(values.mean())
+        m2 = float(np.square(values - mean).sum())
+        total = self.count + count
+        delta = mean - self.mean
+        self._m2 += m2 + delta * delta * self.count * count / total
+        self.mean += delta * count / total
+        self.count = total
+
+        low, high = float(values.min()), float(values.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        self.histogram += np.bincount(log_buckets(values), minlength=LOG_BUCKETS)
+
+    def add(self, value: float):
+        """Add a single value in O(1).
+
+        Args:
+            value: Value to add
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        bucket = int(value).bit_length() if value >= 1 else 0
+        self.histogram[min(bucket, LOG_BUCKETS - 1)] += 1
+
+    def buckets(self) -> Iterator[Tuple[int, int, int]]:
+        """Iterate over the non-empty histogram buckets (see iter_log_buckets)."""
+        return iter_log_buckets(self.histogram)
+
+    def as_dict(self) -> Dict:
+        """Get the statistics as JSON-serializable values."""
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'std': self.std,
+            'min': self.min,
+            'max': self.max,
+            'histogram': [list(bucket) for bucket in self.buckets()],
+        }
+
+
+class RunningRegression:
+    """Least squares fit of y against x over a stream of points."""
+
+    def __init__(self):
+        """Initialize an empty fit."""
+        self.count = 0
+        self._mean_x = 0.0
+        self._mean_y = 0.0
+        self._sxx = 0.0  # Sum of squared x deviations
+        self._sxy = 0.0  # Sum of x deviation times y deviation
+
+    @property
+    def slope(self) -> Optional[float]:
+        """Get the slope of the fit, or None while x has not varied."""
+        return self._sxy / self._sxx if self._sxx > 0 else None
+
+    def update(self, x: np.ndarray, y: np.ndarray):
+        """Add a batch of points.
+
+        Args:
+            x: x coordinates
+            y: y coordinates, as many as x
+        """
+        count = len(x)
+        if not count:
+            return
+
+        mean_x, mean_y = float(np.mean(x)), float(np.mean(y))
+        dx = np.asarray(x, dtype=np.float64) - mean_x
+        sxx = float(np.dot(dx, dx))
+        sxy = float(np.dot(dx, np.asarray(y, dtype=np.float64) - mean_y))
+        self._merge(count, mean_x, mean_y, sxx, sxy)
+
+    def add(self, x: float, y: float):
+        """Add a single point in O(1).
+
+        Args:
+            x: x coordinate
+            y: y coordinate
+        """
+        self._merge(1, x, y, 0.0, 0.0)
+
+    def _merge(self, count: int, mean_x: float, mean_y: float, sxx: float, sxy: float):
+        """Combine the fit with the sums of another set of points."""
+        total = self.count + count
+        dx = mean_x - self._mean_x
+        dy = mean_y - self._mean_y
+        weight = self.count * count / total
+        self._sxx += sxx + dx * dx * weight
+        self._sxy += sxy + dx * dy * weight
+        self._mean_x += dx * count / total
+        self._mean_y += dy * count / total
+        self.count = total
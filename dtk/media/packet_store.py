@@ -0,0 +1,387 @@
+"""Columnar (structure-of-arrays) storage for the packets of an RTP stream."""
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .sequence import extend_sequence_numbers, in_order_permutation
+
+if TYPE_CHECKING:
+    from .ptp import PTPTimeMap
+
+
+@dataclass
+class RTPPacketInfo:
+    """Information about an RTP packet."""
+    sequence: int
+    timestamp: int
+    ssrc: int
+    payload_type: int
+    marker: bool
+    payload: Union[bytes, memoryview]  # View into the mapped capture if read from a pcap
+    arrival_time: float  # Packet arrival time in seconds
+    ptp_timestamp: Optional[int] = None  # Arrival time as PTP time in ns, if mapped
+    arrival_ns: int = 0  # Packet arrival time in nanoseconds (exact)
+
+
+def _column(name: str, doc: str) -> property:
+    """Build a read-only property exposing the filled part of a column."""
+    def getter(self) -> np.ndarray:
+        return self._columns[name][:self._size]
+    return property(getter, doc=doc)
+
+
+class RTPPacketStore:
+    """Compact per-SSRC packet storage.
+
+    Header fields are kept in one numpy array per field instead of one
+    RTPPacketInfo object per packet. Payloads are not copied: each packet
+    records an offset and length into ``buffer``, a single contiguous buffer
+    shared by every stream read from the same capture (normally a view of
+    the memory-mapped capture file). Stores created without a buffer own
+    one instead, and packets are added with append_packet(), which copies
+    their payloads into it (used for live sources whose buffers are reused).
+
+    Iterating or indexing the store yields RTPPacketInfo objects built on
+    the fly, so code written against List[RTPPacketInfo] keeps working.
+
+    When ``time_map`` is set (see ptp.PTPTimeMap), arrival times are also
+    available as PTP time through ptp_ns and each packet's ptp_timestamp.
+    """
+
+    COLUMNS = {
+        'sequence': np.uint16,
+        'timestamp': np.uint32,
+        'marker': np.bool_,
+        'payload_type': np.uint8,
+        'arrival_ns': np.int64,
+        'payload_offset': np.int64,
+        'payload_length': np.uint32,
+    }
+
+    sequence = _column('sequence', "RTP sequence numbers")
+    timestamp = _column('timestamp', "RTP timestamps")
+    marker = _column('marker', "RTP marker bits")
+    payload_type = _column('payload_type', "RTP payload types")
+    arrival_ns = _column('arrival_ns',
+                         "Packet arrival times in nanoseconds since the epoch")
+    payload_offset = _column('payload_offset', "Payload offsets into the buffer")
+    payload_length = _column('payload_length', "Payload lengths in bytes")
+
+    def __init__(self, ssrc: int,
+                 buffer: Union[bytes, bytearray, memoryview, None] = None,
+                 capacity: int = 1024):
+        """Initialize an empty store.
+
+        Args:
+            ssrc: SSRC of the stream
+            buffer: Buffer the payload offsets refer to, or None for a store
+                    that owns its payload buffer (see append_packet)
+            capacity: Initial number of packets to allocate room for
+        """
+        self.ssrc = ssrc
+        self._owned = buffer is None
+        self._used = 0  # Bytes of an owned buffer in use
+        self.buffer = bytearray(64 * 1024) if buffer is None else buffer
+        self._view = memoryview(self.buffer)
+        self._size = 0
+        self._columns = {
+            name: np.empty(max(capacity, 1), dtype=dtype)
+            for name, dtype in self.COLUMNS.items()
+        }
+        self._frame_bounds: Optional[np.ndarray] = None
+        self._extended_sequence: Optional[np.ndarray] = None
+        self._sorted_size = 0  # Leading packets known to be in sequence order
+        # Cached (map, ptp_ns)
+        self._ptp_ns: Optional[Tuple['PTPTimeMap', np.ndarray]] = None
+        self.time_map: Optional['PTPTimeMap'] = None
+
+    @classmethod
+    def from_columns(cls, ssrc: int, buffer: Union[bytes, bytearray, memoryview],
+                     columns: Dict[str, np.ndarray],
+                     frame_bounds: Optional[np.ndarray] = None) -> 'RTPPacketStore':
+        """Build a store around existing column arrays without copying them.
+
+        Args:
+            ssrc: SSRC of the stream
+            buffer: Buffer the payload offsets refer to
+            columns: One equally long array per entry of COLUMNS
+            frame_bounds: Precomputed result of frame_bounds(), if known
+
+        Returns:
+            Store holding the given packets
+        """
+        store = cls(ssrc, buffer, capacity=1)
+        size = len(columns['sequence'])
+        for name, dtype in cls.COLUMNS.items():
+            column = columns[name]
+            if column.dtype != dtype or len(column) != size:
+                raise ValueError(f"Column {name!r} does not match the store layout")
+            store._columns[name] = column
+        store._size = size
+        store._frame_bounds = frame_bounds
+        return store
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def arrival_time(self) -> np.ndarray:
+        """Packet arrival times in seconds, as float64 (derived from arrival_ns)."""
+        return self.arrival_ns / 1e9
+
+    @property
+    def ptp_ns(self) -> Optional[np.ndarray]:
+        """Packet arrival times as PTP time in nanoseconds, or None without a time map.
+
+        Mapped for all packets at once on first access and cached until the
+        packets change.
+        """
+        if self.time_map is None or not len(self.time_map):
+            return None
+        if self._ptp_ns is None or self._ptp_ns[0] is not self.time_map:
+            self._ptp_ns = self.time_map, self.time_map.to_ptp(self.arrival_ns)
+        return self._ptp_ns[1]
+
+    def __iter__(self) -> Iterator[RTPPacketInfo]:
+        for i in range(self._size):
+            yield self._packet(i)
+
+    def __getitem__(self, index: Union[int, slice]
+                    ) -> Union[RTPPacketInfo, List[RTPPacketInfo]]:
+        if isinstance(index, slice):
+            return [self._packet(i) for i in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("packet index out of range")
+        return self._packet(index)
+
+    def _packet(self, i: int) -> RTPPacketInfo:
+        """Build the RTPPacketInfo compatibility view for packet i."""
+        cols = self._columns
+        offset = int(cols['payload_offset'][i])
+        arrival_ns = int(cols['arrival_ns'][i])
+        ptp_ns = self.ptp_ns
+        return RTPPacketInfo(
+            sequence=int(cols['sequence'][i]),
+            timestamp=int(cols['timestamp'][i]),
+            ssrc=self.ssrc,
+            payload_type=int(cols['payload_type'][i]),
+            marker=bool(cols['marker'][i]),
+            payload=self._view[offset:offset + int(cols['payload_length'][i])],
+            arrival_time=arrival_ns / 1e9,
+            ptp_timestamp=None if ptp_ns is None else int(ptp_ns[i]),
+            arrival_ns=arrival_ns
+        )
+
+    @property
+    def capacity(self) -> int:
+        """Number of packets the columns can hold without growing."""
+        return len(self._columns['sequence'])
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the header columns (excluding the payload buffer)."""
+        return sum(col.nbytes for col in self._columns.values())
+
+    def _grow(self, needed: int):
+        """Grow all columns to hold at least ``needed`` packets."""
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        for name, col in self._columns.items():
+            grown = np.empty(capacity, dtype=col.dtype)
+            grown[:self._size] = col[:self._size]
+            self._columns[name] = grown
+
+    def append(self, sequence: int, timestamp: int, marker: bool, payload_type: int,
+               arrival_ns: int, payload_offset: int, payload_length: int):
+        """Append one packet.
+
+        Args:
+            sequence: RTP sequence number
+            timestamp: RTP timestamp
+            marker: RTP marker bit
+            payload_type: RTP payload type
+            arrival_ns: Packet arrival time in nanoseconds
+            payload_offset: Offset of the payload in the buffer
+            payload_length: Payload length in bytes
+        """
+        i = self._size
+        if i == self.capacity:
+            self._grow(i + 1)
+        cols = self._columns
+        cols['sequence'][i] = sequence
+        cols['timestamp'][i] = timestamp
+        cols['marker'][i] = marker
+        cols['payload_type'][i] = payload_type
+        cols['arrival_ns'][i] = arrival_ns
+        cols['payload_offset'][i] = payload_offset
+        cols['payload_length'][i] = payload_length
+        self._size = i + 1
+        self._frame_bounds = None
+        self._extended_sequence = None
+        self._ptp_ns = None
+
+    def append_packet(self, sequence: int, timestamp: int, marker: bool,
+                      payload_type: int, arrival_ns: int,
+                      payload: Union[bytes, memoryview]):
+        """Append one packet, copying its payload into the store's own buffer.
+
+        Only valid for stores created without a buffer. When the buffer is
+        full it is replaced by one twice as large; payload views handed out
+        earlier keep referring to the old buffer and stay valid.
+
+        Args:
+            sequence: RTP sequence number
+            timestamp: RTP timestamp
+            marker: RTP marker bit
+            payload_type: RTP payload type
+            arrival_ns: Packet arrival time in nanoseconds
+            payload: Payload bytes
+
+        Raises:
+            ValueError: If the store refers to an external buffer
+        """
+        if not self._owned:
+            raise ValueError("append_packet() requires a store that owns its buffer")
+
+        offset = self._used
+        end = offset + len(payload)
+        if end > len(self.buffer):
+            size = len(self.buffer)
+            while size < end:
+                size *= 2
+            grown = bytearray(size)
+            grown[:offset] = self._view[:offset]
+            self.buffer = grown
+            self._view = memoryview(grown)
+        self._view[offset:end] = payload
+        self._used = end
+        self.append(sequence, timestamp, marker, payload_type, arrival_ns, offset,
+                    len(payload))
+
+    def extend(self, sequence: np.ndarray, timestamp: np.ndarray, marker: np.ndarray,
+               payload_type: np.ndarray, arrival_ns: np.ndarray,
+               payload_offset: np.ndarray, payload_length: np.ndarray):
+        """Append a block of packets given as column arrays.
+
+        Args:
+            sequence: RTP sequence numbers
+            timestamp: RTP timestamps
+            marker: RTP marker bits
+            payload_type: RTP payload types
+            arrival_ns: Packet arrival times in nanoseconds
+            payload_offset: Offsets of the payloads in the buffer
+            payload_length: Payload lengths in bytes
+        """
+        count = len(sequence)
+        start = self._size
+        if start + count > self.capacity:
+            self._grow(start + count)
+        cols = self._columns
+        cols['sequence'][start:start + count] = sequence
+        cols['timestamp'][start:start + count] = timestamp
+        cols['marker'][start:start + count] = marker
+        cols['payload_type'][start:start + count] = payload_type
+        cols['arrival_ns'][start:start + count] = arrival_ns
+        cols['payload_offset'][start:start + count] = payload_offset
+        cols['payload_length'][start:start + count] = payload_length
+        self._size = start + count
+        self._frame_bounds = None
+        self._extended_sequence = None
+        self._ptp_ns = None
+
+    def reorder(self, order: np.ndarray):
+        """Permute all packets.
+
+        Args:
+            order: Index array giving the new packet order
+        """
+        for name, col in self._columns.items():
+            self._columns[name] = col[:self._size][order]
+        self._size = len(order)
+        self._sorted_size = 0
+        self._frame_bounds = None
+        self._extended_sequence = None
+        self._ptp_ns = None
+
+    @property
+    def extended_sequence(self) -> np.ndarray:
+        """Extended (rollover-corrected) sequence numbers, as int64.
+
+        Computed from the current packet order, so only meaningful in arrival
+        or sequence order.
+        """
+        if self._extended_sequence is None:
+            self._extended_sequence = extend_sequence_numbers(self.sequence)
+        return self._extended_sequence
+
+    def sort_by_sequence(self):
+        """Sort packets by extended sequence number.
+
+        Expects packets in arrival order. Sequence numbers are unwrapped
+        across 2^16 rollovers first, so streams longer than 65536 packets
+        keep their order, and late packets are inserted into the in-order
+        run instead of sorting the whole stream. Equal numbers keep their
+        arrival order.
+
+        Returns at once if no packet was added since the last sort, and
+        only permutes the columns when some packet is out of order.
+        """
+        if self._sorted_size == self._size:
+            return
+        extended = self.extended_sequence
+        if (extended[1:] < extended[:-1]).any():
+            order = in_order_permutation(extended)
+            self.reorder(order)
+            self._extended_sequence = extended[order]
+        self._sorted_size = self._size
+
+    def frame_bounds(self) -> np.ndarray:
+        """Get the packet index boundaries of marker-delimited frames.
+
+        Frame i spans packets ``bounds[i]:bounds[i + 1]``. A trailing run of
+        packets without a marker counts as a final, incomplete frame.
+
+        Returns:
+            int64 array of frame boundaries (number of frames + 1 entries)
+        """
+        if self._frame_bounds is None:
+            ends = np.flatnonzero(self.marker) + 1
+            if self._size and (not len(ends) or ends[-1] != self._size):
+                ends = np.append(ends, self._size)
+            self._frame_bounds = np.concatenate(([0], ends)).astype(np.int64)
+        return self._frame_bounds
+
+    def payload(self, index: int) -> memoryview:
+        """Get a zero-copy view of one packet's payload.
+
+        Args:
+            index: Packet index
+
+        Returns:
+            Payload view into the buffer
+        """
+        offset = int(self._columns['payload_offset'][index])
+        length = int(self._columns['payload_length'][index])
+        return self._view[offset:offset + length]
+
+    def payload_data(self, start: int = 0, stop: Optional[int] = None) -> bytes:
+        """Concatenate payloads in packet order.
+
+        Args:
+            start: Index of the first packet
+            stop: Index after the last packet (default: end of the store)
+
+        Returns:
+            Concatenated payload bytes
+        """
+        view = self._view
+        offsets = self.payload_offset[start:stop].tolist()
+        lengths = self.payload_length[start:stop].tolist()
+        return b''.join(
+            view[offset:offset + length] for offset, length in zip(offsets, lengths)
+        )
@@ -0,0 +1,709 @@
+"""Lightweight pcap/pcapng record reader and raw header parsing.
+
+This module reads capture records and locates UDP payloads directly from
+the record bytes with ``struct``, without dissecting packets through Scapy
+or copying them out of the memory-mapped capture.
+It is the fast path used by :class:`~dtk.media.rtp_extractor.RTPStreamExtractor`;
+anything it does not understand is reported back so the caller can fall
+back to full Scapy dissection.
+"""
+
+import math
+import mmap
+import os
+import struct
+from typing import Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+# pcap magic numbers (as read little-endian)
+PCAP_MAGIC_USEC = 0xA1B2C3D4
+PCAP_MAGIC_NSEC = 0xA1B23C4D
+PCAP_MAGIC_USEC_SWAPPED = 0xD4C3B2A1
+PCAP_MAGIC_NSEC_SWAPPED = 0x4D3CB2A1
+
+# pcapng block types
+PCAPNG_SHB = 0x0A0D0D0A
+PCAPNG_IDB = 0x00000001
+PCAPNG_PB = 0x00000002  # Obsolete Packet Block
+PCAPNG_SPB = 0x00000003
+PCAPNG_EPB = 0x00000006
+PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+
+# pcapng IDB options
+IF_TSRESOL = 9
+IF_TSOFFSET = 14
+
+# Link types handled by the fast path
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+LINKTYPE_LINUX_SLL2 = 276
+
+# Shortest record of each link type that can hold its link-layer header
+MIN_RECORD_LENGTH = {
+    LINKTYPE_NULL: 4,
+    LINKTYPE_ETHERNET: 14,
+    LINKTYPE_RAW: 20,
+    LINKTYPE_LINUX_SLL: 16,
+    LINKTYPE_IPV4: 20,
+    LINKTYPE_IPV6: 40,
+    LINKTYPE_LINUX_SLL2: 20,
+}
+
+# EtherTypes
+ETH_P_IP = 0x0800
+ETH_P_IPV6 = 0x86DD
+ETH_P_8021Q = 0x8100
+ETH_P_8021AD = 0x88A8
+ETH_P_QINQ = 0x9100
+ETH_P_MPLS_UC = 0x8847
+ETH_P_MPLS_MC = 0x8848
+VLAN_ETHERTYPES = (ETH_P_8021Q, ETH_P_8021AD, ETH_P_QINQ)
+
+# IP protocol numbers
+IPPROTO_UDP = 17
+IPPROTO_IPIP = 4
+IPPROTO_IPV6 = 41
+IPPROTO_GRE = 47
+IPV6_EXTENSION_HEADERS = (0, 43, 60)  # Hop-by-hop, routing, destination options
+
+# Returned by udp_payload_bounds() when the record uses an encapsulation the
+# fast path does not decode (unknown link type, GRE, MPLS, ...). Callers should
+# hand such records to Scapy instead of dropping them.
+NEEDS_DISSECTION = "needs-dissection"
+
+_U16 = struct.Struct('!H')
+_IPV4_HEADER = struct.Struct('!BxHHHxB')  # ver/ihl, total len, id, frag, proto
+_V4_MAPPED = b'\x00' * 10 + b'\xff\xff'  # Prefix of IPv4-mapped IPv6 addresses
+
+
+class PcapFormatError(ValueError):
+    """Raised when a capture file is not a readable pcap or pcapng file."""
+
+
+class CaptureReader:
+    """Iterate over the records of a pcap or pcapng file.
+
+    The capture is memory-mapped and each record is returned as a memoryview
+    slice into the mapping, so record and payload bytes are never copied while
+    reading. Views stay valid for as long as they are referenced, even after
+    the reader is closed.
+
+    Example:
+        with CaptureReader("capture.pcap") as reader:
+            for timestamp, linktype, data in reader:
+                ...
+    """
+
+    def __init__(self, path: str):
+        """Open and map a capture file.
+
+        Args:
+            path: Path to the pcap or pcapng file
+
+        Raises:
+            PcapFormatError: If the file is not a pcap or pcapng capture
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < 4:
+                raise PcapFormatError(f"File too short to be a capture: {path}")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if hasattr(mmap, 'MADV_SEQUENTIAL'):
+            # Records are consumed front to back; let the kernel read ahead
+            # aggressively and drop pages behind us.
+            self._mmap.madvise(mmap.MADV_SEQUENTIAL)
+        self._view = memoryview(self._mmap)
+        # Handed out by the buffer property; one object, so stores built
+        # from the same capture can tell they share it
+        self._buffer = self._view[:]
+        self._prologue = None
+        self._time_range = None  # First and last pcap timestamps, see _pcap_time_range()
+        # Offset where reading should resume: just past the last complete
+        # record read by records()
+        self.position = 0
+
+        (magic_le,) = struct.unpack_from('<I', self._mmap, 0)
+        if magic_le == PCAPNG_SHB:
+            self.format = 'pcapng'
+        elif magic_le in (PCAP_MAGIC_USEC, PCAP_MAGIC_NSEC,
+                          PCAP_MAGIC_USEC_SWAPPED, PCAP_MAGIC_NSEC_SWAPPED):
+            self.format = 'pcap'
+        else:
+            self.close()
+            raise PcapFormatError(
+                f"Unrecognized capture format (magic {magic_le:#010x}): {path}")
+
+    def __enter__(self) -> 'CaptureReader':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """Release the mapping.
+
+        If record views handed out by the reader are still referenced, the
+        mapping is released once the last of them is garbage collected.
+        """
+        self._buffer = None
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+    @property
+    def buffer(self) -> memoryview:
+        """View of the whole mapped capture; record offsets index into it."""
+        return self._buffer
+
+    def __iter__(self) -> Iterator[Tuple[int, int, memoryview]]:
+        """Iterate over capture records.
+
+        Yields:
+            Tuples of (timestamp in nanoseconds, link type, record view)
+        """
+        view = self._view
+        for ts, linktype, start, end in self.records():
+            yield ts, linktype, view[start:end]
+
+    def records(self, start: Optional[int] = None,
+                stop: Optional[int] = None) -> Iterator[Tuple[int, int, int, int]]:
+        """Iterate over capture records by position.
+
+        Args:
+            start: File offset of the first record to read. Must be a record
+                boundary, such as one returned by split(). Defaults to the
+                first record.
+            stop: Records starting at or after this file offset are not read.
+                Defaults to the end of the file.
+
+        Yields:
+            Tuples of (timestamp in nanoseconds since the epoch, link type,
+            start offset, end offset) where the offsets locate the record
+            data within ``buffer``. Timestamps are exact integers at the
+            capture's own resolution (pcap microseconds or nanoseconds,
+            pcapng if_tsresol and if_tsoffset).
+
+        After iteration, ``position`` is the offset just past the last
+        complete record (or block), where reading a file that is still
+        being written should resume.
+        """
+        stop = len(self._mmap) if stop is None else min(stop, len(self._mmap))
+        self.position = start or 0
+        if self.format == 'pcap':
+            return self._iter_pcap(start, stop)
+        return self._iter_pcapng(start, stop)
+
+    def split(self, count: int) -> List[Tuple[int, int]]:
+        """Split the capture into record-aligned byte ranges.
+
+        Split points are found by jumping to evenly spaced offsets and
+        resynchronizing on the next position where a chain of valid record
+        headers starts, so the whole file does not have to be walked.
+
+        Args:
+            count: Desired number of ranges
+
+        Returns:
+            List of (start, stop) offsets suitable for records(). Fewer ranges
+            than requested are returned for small captures.
+        """
+        size = len(self._mmap)
+        first = self._first_record_offset()
+        bounds = [first]
+        for i in range(1, max(count, 1)):
+            pos = self._resync(max(first + (size - first) * i // count, bounds[-1] + 1))
+            if pos is None:
+                break
+            if pos > bounds[-1]:
+                bounds.append(pos)
+        bounds.append(size)
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def _first_record_offset(self) -> int:
+        """Offset of the first record (pcap) or block after the prologue (pcapng)."""
+        if self.format == 'pcap':
+            return 24
+        return self._pcapng_prologue()[2]
+
+    def _resync(self, pos: int, chain: int = 8) -> Optional[int]:
+        """Find the first record boundary at or after pos.
+
+        A position is accepted when ``chain`` consecutive valid record
+        headers (or the end of the file) follow from it.
+
+        Args:
+            pos: File offset to start searching from
+            chain: Number of consecutive valid headers required
+
+        Returns:
+            Offset of the record boundary, or None if none was found
+        """
+        size = len(self._mmap)
+        if self.format == 'pcap':
+            endian, frac_ns, linktype, snaplen = self._pcap_header()
+            unpack_header = struct.Struct(endian + 'IIII').unpack_from
+            max_len = snaplen or 0x40000
+            min_len = MIN_RECORD_LENGTH.get(linktype, 1)
+            frac_units = 1_000_000_000 // frac_ns
+            first_ts, last_ts = self._pcap_time_range()
+            step = 1
+
+            # An all-zero header would otherwise pass as an empty record, so a
+            # chain could start inside any zero-filled payload: records must
+            # be non-empty and their timestamps valid for the resolution,
+            # within the capture's time range and non-decreasing.
+            def next_record(p, prev_ts):
+                if p + 16 > size:
+                    return None, prev_ts
+                ts_sec, ts_frac, caplen, orig_len = unpack_header(self._mmap, p)
+                ts = ts_sec * frac_units + ts_frac
+                if (caplen < min_len or caplen > max_len or caplen > orig_len
+                        or ts_frac >= frac_units or ts < prev_ts
+                        or (last_ts is not None and ts > last_ts)):
+                    return None, prev_ts
+                return p + 16 + caplen, ts
+
+            start_state = first_ts
+        else:
+            endian = self._pcapng_prologue()[0]
+            block_header = struct.Struct(endian + 'II')
+            trailer = struct.Struct(endian + 'I')
+            known_blocks = (PCAPNG_IDB, PCAPNG_PB, PCAPNG_SPB, PCAPNG_EPB, 4, 5)
+            pos = (pos + 3) & ~3  # Blocks are 32-bit aligned
+            step = 4
+
+            def next_record(p, state):
+                if p + 12 > size:
+                    return None, state
+                block_type, block_len = block_header.unpack_from(self._mmap, p)
+                if (block_type not in known_blocks or block_len < 12 or block_len % 4
+                        or p + block_len > size):
+                    return None, state
+                if trailer.unpack_from(self._mmap, p + block_len - 4)[0] != block_len:
+                    return None, state
+                return p + block_len, state
+
+            start_state = None
+
+        while pos < size:
+            p, state = pos, start_state
+            for _ in range(chain):
+                p, state = next_record(p, state)
+                if p is None or p == size:
+                    break
+            if p is not None:
+                return pos
+            pos += step
+        return None
+
+    def _pcap_time_range(self) -> Tuple[int, Optional[int]]:
+        """Get the timestamps of the first and last records of a pcap file.
+
+        The last record is found by resynchronizing near the end of the file
+        and walking to it, so only the tail of the capture is read.
+
+        Returns:
+            Tuple of (first, last) timestamps in the file's own units
+            (seconds times the fraction resolution plus the fraction); last
+            is None if the end of the file could not be resynchronized
+        """
+        if self._time_range is None:
+            endian, frac_ns, _, snaplen = self._pcap_header()
+            record_header = struct.Struct(endian + 'IIII')
+            frac_units = 1_000_000_000 // frac_ns
+            size = len(self._mmap)
+            if size < 40:
+                return 0, None
+            ts_sec, ts_frac, _, _ = record_header.unpack_from(self._mmap, 24)
+            first = ts_sec * frac_units + ts_frac
+
+            # Bound the search by the first timestamp only while looking for
+            # the last one
+            self._time_range = (first, None)
+            tail = self._resync(max(24, size - 4 * (snaplen or 0x40000)))
+            last = None
+            if tail is not None:
+                position = self.position
+                for ts, _, _, _ in self._iter_pcap(tail, size):
+                    last = ts // frac_ns if last is None else max(last, ts // frac_ns)
+                self.position = position
+            self._time_range = (first, last)
+        return self._time_range
+
+    def _pcap_header(self) -> Tuple[str, int, int, int]:
+        """Decode the pcap global header.
+
+        Returns:
+            Tuple of (struct byte-order prefix, nanoseconds per timestamp
+            fraction unit, link type, snapshot length)
+        """
+        buf = self._mmap
+        (magic,) = struct.unpack_from('<I', buf, 0)
+        endian = '<' if magic in (PCAP_MAGIC_USEC, PCAP_MAGIC_NSEC) else '>'
+        frac_ns = 1 if magic in (PCAP_MAGIC_NSEC, PCAP_MAGIC_NSEC_SWAPPED) else 1000
+        snaplen, linktype = struct.unpack_from(endian + 'II', buf, 16)
+        return endian, frac_ns, linktype & 0x0FFFFFFF, snaplen
+
+    def _iter_pcap(self, start: Optional[int],
+                   stop: int) -> Iterator[Tuple[int, int, int, int]]:
+        """Iterate over records of a classic pcap file."""
+        buf = self._mmap
+        size = len(buf)
+        if size < 24:
+            return
+
+        endian, frac_ns, linktype, _ = self._pcap_header()
+        unpack_from = struct.Struct(endian + 'IIII').unpack_from
+        pos = 24 if start is None else start
+        self.position = pos
+
+        while pos + 16 <= size and pos < stop:
+            ts_sec, ts_frac, caplen, _ = unpack_from(buf, pos)
+            start = pos + 16
+            pos = start + caplen
+            if pos > size:
+                return  # Truncated final record
+            self.position = pos
+            yield ts_sec * 1_000_000_000 + ts_frac * frac_ns, linktype, start, pos
+
+    def _pcapng_prologue(self) -> Tuple[str, List[Tuple[int, int, int, int]], int]:
+        """Read the section header and interface blocks preceding the first packet.
+
+        Returns:
+            Tuple of (struct byte-order prefix, interface list, offset of the
+            first block after the prologue)
+        """
+        if self._prologue is None:
+            endian = '<'
+            interfaces = []
+            pos = 0
+            for block in self._iter_blocks(0):
+                block_type, block_pos, block_len, endian, interfaces = block
+                if block_type in (PCAPNG_EPB, PCAPNG_SPB, PCAPNG_PB):
+                    pos = block_pos
+                    break
+                pos = block_pos + block_len
+            self._prologue = (endian, list(interfaces), pos)
+        return self._prologue
+
+    def _iter_blocks(self, pos: int, endian: str = '<',
+                     interfaces: Optional[list] = None) -> Iterator[tuple]:
+        """Walk pcapng blocks, tracking section byte order and interfaces.
+
+        Yields:
+            Tuples of (block type, block offset, block length, byte-order
+            prefix, interface list)
+        """
+        buf = self._mmap
+        size = len(buf)
+        interfaces = [] if interfaces is None else interfaces
+
+        while pos + 12 <= size:
+            (block_type,) = struct.unpack_from(endian + 'I', buf, pos)
+            if block_type == PCAPNG_SHB:
+                # Byte order is defined by the section header itself
+                (bom,) = struct.unpack_from('<I', buf, pos + 8)
+                endian = '<' if bom == PCAPNG_BYTE_ORDER_MAGIC else '>'
+                interfaces = []
+            (block_len,) = struct.unpack_from(endian + 'I', buf, pos + 4)
+            if block_len < 12 or pos + block_len > size:
+                return
+            if block_type == PCAPNG_IDB:
+                body = buf[pos + 8:pos + block_len - 4]
+                interfaces.append(self._parse_idb(body, endian))
+            self.position = pos + block_len
+            yield block_type, pos, block_len, endian, interfaces
+            pos += block_len
+
+    def _iter_pcapng(self, start: Optional[int],
+                     stop: int) -> Iterator[Tuple[int, int, int, int]]:
+        """Iterate over packet records of a pcapng file.
+
+        When starting mid-file, interfaces are taken from the blocks that
+        precede the first packet; interface blocks appearing later in the
+        file are only seen by a reader that walks past them.
+        """
+        buf = self._mmap
+        if start is None:
+            blocks = self._iter_blocks(0)
+        else:
+            endian, interfaces, _ = self._pcapng_prologue()
+            self.position = start
+            blocks = self._iter_blocks(start, endian, list(interfaces))
+
+        for block_type, pos, block_len, endian, interfaces in blocks:
+            if pos >= stop:
+                self.position = pos
+                return
+            body = pos + 8
+
+            if block_type == PCAPNG_EPB:
+                if_id, ts_high, ts_low, caplen = struct.unpack_from(endian + 'IIII', buf,
+                                                                    body)
+                if if_id >= len(interfaces):
+                    continue
+                linktype, numerator, denominator, offset = interfaces[if_id]
+                ts = ((ts_high << 32) | ts_low) * numerator // denominator + offset
+                yield ts, linktype, body + 20, body + 20 + caplen
+
+            elif block_type == PCAPNG_SPB:
+                if not interfaces:
+                    continue
+                (orig_len,) = struct.unpack_from(endian + 'I', buf, body)
+                caplen = min(orig_len, block_len - 16)
+                yield 0, interfaces[0][0], body + 4, body + 4 + caplen
+
+            elif block_type == PCAPNG_PB:
+                if_id, _, ts_high, ts_low, caplen = struct.unpack_from(endian + 'HHIII',
+                                                                       buf, body)
+                if if_id >= len(interfaces):
+                    continue
+                linktype, numerator, denominator, offset = interfaces[if_id]
+                ts = ((ts_high << 32) | ts_low) * numerator // denominator + offset
+                yield ts, linktype, body + 20, body + 20 + caplen
+
+    @staticmethod
+    def _parse_idb(body: bytes, endian: str) -> Tuple[int, int, int, int]:
+        """Parse an Interface Description Block body.
+
+        Timestamps of the interface convert to nanoseconds as
+        ``ticks * numerator // denominator + offset``, in integer arithmetic
+        so no resolution is lost.
+
+        Args:
+            body: Block body (without type, length and trailing length)
+            endian: struct byte-order prefix for the section
+
+        Returns:
+            Tuple of (link type, numerator, denominator, offset in
+            nanoseconds)
+        """
+        (linktype,) = struct.unpack(endian + 'H', body[:2])
+        denominator = 1_000_000  # Ticks per second (default: microseconds)
+        offset = 0
+
+        pos = 8
+        while pos + 4 <= len(body):
+            code, length = struct.unpack(endian + 'HH', body[pos:pos + 4])
+            if code == 0:
+                break
+            value = body[pos + 4:pos + 4 + length]
+            if code == IF_TSRESOL and length >= 1:
+                resol = value[0]
+                denominator = 2 ** (resol & 0x7F) if resol & 0x80 else 10 ** resol
+            elif code == IF_TSOFFSET and length >= 8:
+                (offset,) = struct.unpack(endian + 'q', value[:8])
+            pos += 4 + ((length + 3) & ~3)
+
+        divisor = math.gcd(1_000_000_000, denominator)
+        return (linktype, 1_000_000_000 // divisor, denominator // divisor,
+                offset * 1_000_000_000)
+
+
+def udp_payload_bounds(data: Union[bytes, memoryview],
+                       linktype: int) -> Union[Tuple[int, int], str, None]:
+    """Locate the UDP payload inside a captured frame.
+
+    Parses link layer (Ethernet with any number of 802.1Q/802.1ad tags, Linux
+    cooked capture, BSD loopback or raw IP), IPv4/IPv6 and UDP headers directly
+    from the record bytes.
+
+    Args:
+        data: Record bytes as captured
+        linktype: pcap link type of the record
+
+    Returns:
+        (start, end) offsets of the UDP payload within ``data``, None if the
+        record is not a complete, unfragmented UDP datagram, or
+        NEEDS_DISSECTION if the encapsulation is not handled by the fast path.
+    """
+    located = locate_udp(data, linktype)
+    if located is None or located is NEEDS_DISSECTION:
+        return located
+    return located[0], located[1]
+
+
+def locate_udp(data: Union[bytes, memoryview],
+               linktype: int) -> Union[Tuple[int, int, int, int], str, None]:
+    """Locate the UDP payload and the flow headers inside a captured frame.
+
+    Same parsing as udp_payload_bounds(), additionally reporting where the IP
+    header starts and the VLAN the frame was tagged with, so flow addresses
+    can be read later (see flow_addresses()).
+
+    Args:
+        data: Record bytes as captured
+        linktype: pcap link type of the record
+
+    Returns:
+        (start, end, ip_offset, vlan) where start/end bound the UDP payload,
+        ip_offset is the offset of the IP header and vlan the outermost VLAN
+        ID (-1 if untagged); or None / NEEDS_DISSECTION as for
+        udp_payload_bounds()
+    """
+    unpack_u16 = _U16.unpack_from
+    size = len(data)
+    vlan = -1
+
+    # Link layer -> (offset of network header, ethertype)
+    if linktype == LINKTYPE_ETHERNET:
+        if size < 14:
+            return None
+        pos = 12
+        (ethertype,) = unpack_u16(data, pos)
+        while ethertype in VLAN_ETHERTYPES:
+            pos += 4
+            if size < pos + 2:
+                return None
+            if vlan < 0:
+                vlan = unpack_u16(data, pos - 2)[0] & 0x0FFF
+            (ethertype,) = unpack_u16(data, pos)
+        pos += 2
+    elif linktype in (LINKTYPE_RAW, LINKTYPE_IPV4, LINKTYPE_IPV6):
+        if size < 1:
+            return None
+        pos = 0
+        ethertype = ETH_P_IPV6 if data[0] >> 4 == 6 else ETH_P_IP
+    elif linktype == LINKTYPE_LINUX_SLL:
+        if size < 16:
+            return None
+        (ethertype,) = unpack_u16(data, 14)
+        pos = 16
+    elif linktype == LINKTYPE_LINUX_SLL2:
+        if size < 20:
+            return None
+        (ethertype,) = unpack_u16(data, 0)
+        pos = 20
+    elif linktype == LINKTYPE_NULL:
+        if size < 4:
+            return None
+        # Address family is in host byte order of the capturing machine
+        family = data[0] or data[3]
+        ethertype = ETH_P_IP if family == 2 else ETH_P_IPV6
+        pos = 4
+    else:
+        return NEEDS_DISSECTION
+
+    # Network layer -> (offset of UDP header, end of IP datagram)
+    ip_offset = pos
+    if ethertype == ETH_P_IP:
+        if size < pos + 20:
+            return None
+        ver_ihl, total_len, _, frag, proto = _IPV4_HEADER.unpack_from(data, pos)
+        if ver_ihl >> 4 != 4:
+            return None
+        if proto != IPPROTO_UDP:
+            if proto in (IPPROTO_GRE, IPPROTO_IPIP, IPPROTO_IPV6):
+                return NEEDS_DISSECTION
+            return None
+        if frag & 0x3FFF:
+            return None  # Fragmented datagram
+        ip_end = min(pos + total_len, size)
+        pos += (ver_ihl & 0x0F) * 4
+    elif ethertype == ETH_P_IPV6:
+        if size < pos + 40:
+            return None
+        (payload_len,) = unpack_u16(data, pos + 4)
+        next_header = data[pos + 6]
+        ip_end = min(pos + 40 + payload_len, size)
+        pos += 40
+        while next_header in IPV6_EXTENSION_HEADERS:
+            if size < pos + 2:
+                return None
+            next_header = data[pos]
+            pos += (data[pos + 1] + 1) * 8
+        if next_header != IPPROTO_UDP:
+            if next_header in (IPPROTO_GRE, IPPROTO_IPIP, IPPROTO_IPV6):
+                return NEEDS_DISSECTION
+            return None
+    elif ethertype in (ETH_P_MPLS_UC, ETH_P_MPLS_MC):
+        return NEEDS_DISSECTION
+    else:
+        return None
+
+    # Transport layer
+    if ip_end < pos + 8:
+        return None
+    (udp_len,) = unpack_u16(data, pos + 4)
+    end = pos + udp_len if udp_len >= 8 else ip_end
+    if end > ip_end:
+        return None  # Truncated capture (snaplen)
+    return pos + 8, end, ip_offset, vlan
+
+
+def flow_address(data: Union[bytes, memoryview], ip_offset: int,
+                 payload_offset: int) -> Tuple[bytes, bytes, int]:
+    """Read the addresses and destination port of one UDP datagram.
+
+    Single-packet counterpart of flow_addresses(), for live sources.
+
+    Args:
+        data: Frame bytes
+        ip_offset: Offset of the IP header in data (negative if unknown)
+        payload_offset: Offset of the UDP payload in data
+
+    Returns:
+        Tuple of (16-byte source address, 16-byte destination address,
+        destination port)
+    """
+    src = dst = bytes(16)
+    if ip_offset >= 0:
+        version = data[ip_offset] >> 4
+        if version == 4:
+            src = _V4_MAPPED + bytes(data[ip_offset + 12:ip_offset + 16])
+            dst = _V4_MAPPED + bytes(data[ip_offset + 16:ip_offset + 20])
+        elif version == 6:
+            src = bytes(data[ip_offset + 8:ip_offset + 24])
+            dst = bytes(data[ip_offset + 24:ip_offset + 40])
+    (dst_port,) = _U16.unpack_from(data, payload_offset - 6)
+    return src, dst, dst_port
+
+
+def flow_addresses(buffer: np.ndarray, ip_offsets: np.ndarray, payload_offsets: np.ndarray
+                   ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Read the addresses and destination ports of many UDP datagrams.
+
+    Addresses are returned as 16-byte values; IPv4 addresses are stored in
+    their IPv4-mapped IPv6 form (``::ffff:a.b.c.d``) so both families share
+    one column. Unknown IP header offsets (negative) give all-zero addresses.
+
+    Args:
+        buffer: uint8 array holding the records (e.g. the mapped capture)
+        ip_offsets: Offset of each datagram's IP header in buffer
+        payload_offsets: Offset of each datagram's UDP payload in buffer
+
+    Returns:
+        Tuple of (source addresses, destination addresses, destination
+        ports), the addresses as 'V16' arrays and the ports as uint16
+    """
+    ip_offsets = np.asarray(ip_offsets, dtype=np.int64)
+    payload_offsets = np.asarray(payload_offsets, dtype=np.int64)
+    count = len(ip_offsets)
+    src = np.zeros((count, 16), dtype=np.uint8)
+    dst = np.zeros((count, 16), dtype=np.uint8)
+
+    known = np.flatnonzero(ip_offsets >= 0)
+    version = buffer[ip_offsets[known]] >> 4
+
+    v4 = known[version == 4]
+    pos = ip_offsets[v4][:, None]
+    src[v4, 10:12] = dst[v4, 10:12] = 0xFF
+    src[v4, 12:] = buffer[pos + 12 + np.arange(4)]
+    dst[v4, 12:] = buffer[pos + 16 + np.arange(4)]
+
+    v6 = known[version == 6]
+    pos = ip_offsets[v6][:, None]
+    src[v6] = buffer[pos + 8 + np.arange(16)]
+    dst[v6] = buffer[pos + 24 + np.arange(16)]
+
+    port = payload_offsets - 6  # Destination port field of the UDP header
+    dst_port = (buffer[port].astype(np.uint16) << 8) | buffer[port + 1]
+    return src.view('V16').reshape(-1), dst.view('V16').reshape(-1), dst_port
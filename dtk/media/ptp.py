@@ -0,0 +1,207 @@
+"""Mapping of capture arrival times to PTP (IEEE 1588-2008) time.
+
+ST 2110 senders timestamp media against a PTP grandmaster. A capture that
+also holds the grandmaster's Sync (and, for two-step clocks, Follow_Up)
+messages tells, for each Sync, the PTP time at which the master sent it
+and the time the capture clock saw it arrive. PTPTimeMap decodes those
+messages once and converts any arrival time to PTP time by interpolating
+between the neighbouring Syncs, which also follows any drift of the
+capture clock.
+
+The path delay from the grandmaster to the capture point is not known
+from Sync messages alone and is not compensated; on a LAN it is usually
+well below a microsecond.
+"""
+
+import struct
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from .pcap_reader import CaptureReader, LINKTYPE_ETHERNET, VLAN_ETHERTYPES, locate_udp
+
+# EtherType of PTP carried directly over Ethernet (IEEE 1588 annex F)
+ETH_P_1588 = 0x88F7
+
+# UDP ports of PTP event (Sync) and general (Follow_Up) messages (annexes D, E)
+PTP_EVENT_PORT = 319
+PTP_GENERAL_PORT = 320
+
+# PTP message types
+PTP_SYNC = 0x0
+PTP_FOLLOW_UP = 0x8
+
+# Flag field: twoStepFlag (first octet, bit 1)
+_TWO_STEP = 0x0200
+
+# Common header and the timestamp that follows it: message type,
+# version, length, domain, flags, correction, port identity, sequence ID,
+# timestamp seconds (48 bits) and nanoseconds
+_PTP_MESSAGE = struct.Struct('!BBHBxHq4x10sHxxHIL')
+
+_U16 = struct.Struct('!H')
+
+
+def locate_ptp(data: Union[bytes, memoryview], linktype: int) -> Optional[int]:
+    """Locate a PTP message inside a captured frame.
+
+    PTP over Ethernet (EtherType 0x88F7, possibly VLAN tagged) and over
+    UDP/IPv4 or UDP/IPv6 (ports 319 and 320) are recognized.
+
+    Args:
+        data: Record bytes as captured
+        linktype: pcap link type of the record
+
+    Returns:
+        Offset of the PTP message in data, or None if the record does not
+        carry one
+    """
+    if linktype == LINKTYPE_ETHERNET and len(data) >= 14:
+        pos = 12
+        (ethertype,) = _U16.unpack_from(data, pos)
+        while ethertype in VLAN_ETHERTYPES and len(data) >= pos + 6:
+            pos += 4
+            (ethertype,) = _U16.unpack_from(data, pos)
+        if ethertype == ETH_P_1588:
+            return pos + 2
+
+    located = locate_udp(data, linktype)
+    if located is None or isinstance(located, str):
+        return None
+    start = located[0]
+    (port,) = _U16.unpack_from(data, start - 6)  # UDP destination port
+    return start if port in (PTP_EVENT_PORT, PTP_GENERAL_PORT) else None
+
+
+def decode_ptp_timing(message: Union[bytes, memoryview]
+                      ) -> Optional[Tuple[int, int, bool, bytes, int, int, int]]:
+    """Decode the fields of a Sync or Follow_Up message needed for timing.
+
+    Args:
+        message: PTP message bytes, starting at the common header
+
+    Returns:
+        Tuple of (message type, domain, two-step flag, source port identity,
+        sequence ID, origin timestamp in nanoseconds, correction in
+        nanoseconds), or None for other messages and other PTP versions
+    """
+    if len(message) < _PTP_MESSAGE.size:
+        return None
+    (kind, version, _, domain, flags, correction, port, sequence_id,
+     seconds_high, seconds_low, nanoseconds) = _PTP_MESSAGE.unpack_from(message)
+    kind &= 0x0F
+    if version & 0x0F != 2 or kind not in (PTP_SYNC, PTP_FOLLOW_UP):
+        return None
+    timestamp = ((seconds_high << 32) | seconds_low) * 1_000_000_000 + nanoseconds
+    # The correction field is in 2^-16 ns
+    return (kind, domain, bool(flags & _TWO_STEP), port, sequence_id, timestamp,
+            correction >> 16)
+
+
+class PTPTimeMap:
+    """Sorted table of (arrival time, PTP time) pairs from one PTP master.
+
+    Arrival times are converted with to_ptp(), a vectorized interpolation
+    over the table: the offset between PTP time and the capture clock is
+    interpolated linearly between the Syncs around each arrival time and
+    held constant before the first and after the last one.
+    """
+
+    def __init__(self, arrival_ns: np.ndarray, ptp_ns: np.ndarray):
+        """Initialize a map from matched Sync arrivals and PTP times.
+
+        Args:
+            arrival_ns: Capture arrival times of the Syncs in nanoseconds
+            ptp_ns: PTP time (nanoseconds since the PTP epoch) at which the
+                    master sent each Sync
+        """
+        arrival_ns = np.asarray(arrival_ns, dtype=np.int64)
+        ptp_ns = np.asarray(ptp_ns, dtype=np.int64)
+        order = np.argsort(arrival_ns, kind='stable')
+        self.arrival_ns = arrival_ns[order]
+        self.ptp_ns = ptp_ns[order]
+        # Interpolate in float64 relative to the first Sync, so no precision is lost
+        self._base = int(self.arrival_ns[0]) if len(order) else 0
+        self._x = (self.arrival_ns - self._base).astype(np.float64)
+        self._offset = (self.ptp_ns - self.arrival_ns).astype(np.float64)
+
+    def __len__(self) -> int:
+        return len(self.arrival_ns)
+
+    @classmethod
+    def from_capture(cls, reader: CaptureReader,
+                     domain: Optional[int] = None) -> 'PTPTimeMap':
+        """Build the map from the Sync and Follow_Up messages of a capture.
+
+        Two-step Syncs are matched with their Follow_Up by source port
+        identity and sequence ID. When several masters are captured, the
+        one that sent the most Syncs (in the requested domain, or in the
+        domain of the first Sync) is used.
+
+        Args:
+            reader: Open capture
+            domain: PTP domain to use (default: that of the first Sync)
+
+        Returns:
+            Map built from the capture; empty if it holds no usable Syncs
+        """
+        buffer = reader.buffer
+        pending: Dict[Tuple[int, bytes, int], Tuple[int, int]] = {}
+        samples: Dict[Tuple[int, bytes], Tuple[list, list]] = {}
+
+        for arrival_ns, linktype, start, end in reader.records():
+            record = buffer[start:end]
+            offset = locate_ptp(record, linktype)
+            if offset is None:
+                continue
+            decoded = decode_ptp_timing(record[offset:])
+            if decoded is None:
+                continue
+            (kind, message_domain, two_step, port, sequence_id, timestamp,
+             correction) = decoded
+            if domain is None:
+                domain = message_domain
+            if message_domain != domain:
+                continue
+
+            if kind == PTP_SYNC:
+                if two_step:
+                    pending[message_domain, port, sequence_id] = arrival_ns, correction
+                    continue
+                sync_arrival = arrival_ns
+            else:
+                sync = pending.pop((message_domain, port, sequence_id), None)
+                if sync is None:
+                    continue
+                sync_arrival, sync_correction = sync
+                correction += sync_correction
+
+            arrivals, times = samples.setdefault((message_domain, port), ([], []))
+            arrivals.append(sync_arrival)
+            times.append(timestamp + correction)
+
+        if not samples:
+            return cls(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+        arrivals, times = max(samples.values(), key=lambda sample: len(sample[0]))
+        return cls(np.array(arrivals, dtype=np.int64), np.array(times, dtype=np.int64))
+
+    def to_ptp(self, arrival_ns: Union[int, np.ndarray]) -> Union[int, np.ndarray]:
+        """Convert capture arrival times to PTP time.
+
+        Args:
+            arrival_ns: Arrival time(s) in nanoseconds since the epoch
+
+        Returns:
+            PTP time(s) in nanoseconds since the PTP epoch, as an int for a
+            scalar argument and an int64 array otherwise
+
+        Raises:
+            ValueError: If the map is empty
+        """
+        if not len(self):
+            raise ValueError("No PTP Sync messages to map arrival times with")
+        values = np.asarray(arrival_ns, dtype=np.int64)
+        elapsed = (values - self._base).astype(np.float64)
+        offset = np.interp(elapsed, self._x, self._offset)
+        mapped = values + np.rint(offset).astype(np.int64)
+        return int(mapped) if mapped.ndim == 0 else mapped
@@ -1,25 +1,252 @@
 """RTP stream extraction and reassembly from pcap files."""
 
+import os
 import struct
+from array import array
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple, Literal
-from collections import defaultdict
+from typing import (Callable, Dict, Iterator, List, Optional, Tuple, Literal, Union,
+                    TYPE_CHECKING)
+
+import numpy as np
+
+from .flow_table import FlowKey, FlowTable, ip_bytes
+# RTPPacketInfo lived here before the columnar store; keep it importable
+from .packet_store import RTPPacketInfo, RTPPacketStore  # noqa: F401
+from .pcap_reader import (CaptureReader, flow_address, flow_addresses, locate_udp,
+                          NEEDS_DISSECTION)
+
+if TYPE_CHECKING:
+    from .flow_filter import FlowFilter
+    from .interarrival import ArrivalStats
+    from .ptp import PTPTimeMap
+    from .st2022_7 import MergeStats
+    from .stream_stats import StreamAccumulator
+
+# Fixed 12-byte RTP header: V/P/X/CC, M/PT, sequence, timestamp, SSRC
+_RTP_FIXED_HEADER = struct.Struct('!BBHII')
+
+# The same fixed header as a numpy structured dtype, for batch decoding
+RTP_HEADER_DTYPE = np.dtype([
+    ('vpxcc', 'u1'),
+    ('mpt', 'u1'),
+    ('sequence', '>u2'),
+    ('timestamp', '>u4'),
+    ('ssrc', '>u4'),
+])
+
+
+def decode_rtp_headers(buffer: np.ndarray, offsets: np.ndarray,
+                       lengths: np.ndarray) -> Dict[str, np.ndarray]:
+    """Decode the RTP headers of many UDP payloads in one call.
+
+    Vectorized counterpart of RTPStreamExtractor._parse_rtp_from_udp: the
+    fixed headers are gathered into an (n, 12) byte matrix and viewed through
+    RTP_HEADER_DTYPE, then CSRC lists, header extensions and padding are
+    applied to compute each payload's bounds.
+
+    Args:
+        buffer: uint8 array holding the UDP payloads (e.g. the mapped capture)
+        offsets: Offset of each UDP payload in buffer
+        lengths: Length of each UDP payload
+
+    Returns:
+        Dictionary of arrays with one entry per valid RTP packet: 'index'
+        (position in the input), 'sequence', 'timestamp', 'ssrc',
+        'payload_type', 'marker', 'payload_offset' and 'payload_length'
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+
+    # Only payloads long enough for a fixed header can be RTP
+    index = np.flatnonzero(lengths >= 12)
+    offsets = offsets[index]
+    lengths = lengths[index]
+
+    raw = buffer[offsets[:, None] + np.arange(12)]
+    fixed = raw.view(RTP_HEADER_DTYPE).reshape(-1)
+
+    vpxcc = fixed['vpxcc']
+    valid = (vpxcc >> 6) == 2
+    header_size = 12 + (vpxcc & 0x0F).astype(np.int64) * 4
+    valid &= header_size <= lengths
+
+    # Header extension: 16-bit profile, 16-bit length in 32-bit words
+    ext_flag = (vpxcc & 0x10) != 0
+    valid &= ~ext_flag | (header_size + 4 <= lengths)
+    has_ext = valid & ext_flag
+    ext_pos = offsets[has_ext] + header_size[has_ext]
+    ext_words = (buffer[ext_pos + 2].astype(np.int64) << 8) | buffer[ext_pos + 3]
+    header_size[has_ext] += 4 + ext_words * 4
+    valid &= header_size <= lengths
+
+    # Padding: last byte gives the number of padding octets
+    payload_length = lengths - header_size
+    has_pad = valid & ((vpxcc & 0x20) != 0) & (payload_length > 0)
+    pad = buffer[offsets[has_pad] + lengths[has_pad] - 1].astype(np.int64)
+    pad[pad > payload_length[has_pad]] = 0
+    payload_length[has_pad] -= pad
+
+    fixed = fixed[valid]
+    mpt = fixed['mpt']
+    return {
+        'index': index[valid],
+        'sequence': fixed['sequence'].astype(np.uint16),
+        'timestamp': fixed['timestamp'].astype(np.uint32),
+        'ssrc': fixed['ssrc'].astype(np.uint32),
+        'payload_type': mpt & 0x7F,
+        'marker': (mpt & 0x80) != 0,
+        'payload_offset': offsets[valid] + header_size[valid],
+        'payload_length': payload_length[valid],
+    }
 
-# Stream type literal
-StreamType = Literal["audio", "video", "meta", "unknown"]
 
+def scan_rtp_headers(reader: CaptureReader, start: Optional[int] = None,
+                     stop: Optional[int] = None, batch_size: int = 65536,
+                     flow_filter: Optional['FlowFilter'] = None,
+                     stream_type_of: Optional[Callable[[int, int], str]] = None
+                     ) -> Iterator[Dict[str, np.ndarray]]:
+    """Locate UDP payloads in a capture range and decode their RTP headers.
+
+    UDP payload locations are collected per block of records and their RTP
+    headers decoded in one vectorized pass per block.
+
+    Args:
+        reader: Open capture
+        start: File offset of the first record (see CaptureReader.records)
+        stop: File offset at which to stop reading records
+        batch_size: Number of UDP payloads decoded per pass
+        flow_filter: Optional filter; packets it rejects are dropped from
+            each block right after header decoding
+        stream_type_of: Stream type resolver passed to FlowFilter.mask
+
+    Yields:
+        Dictionaries as returned by decode_rtp_headers, with added
+        'arrival_ns' (int64 nanoseconds), 'vlan', 'src_ip', 'dst_ip' and
+        'dst_port' columns.
+        Offsets are absolute within reader.buffer.
+    """
+    buffer = reader.buffer
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    offsets = array('q')
+    lengths = array('q')
+    arrivals = array('q')
+    ip_offsets = array('q')
+    vlans = array('i')
+
+    def apply_filter(headers):
+        keep = flow_filter.mask(headers, stream_type_of)
+        if keep.all():
+            return headers
+        return {name: column[keep] for name, column in headers.items()}
+
+    def decode():
+        headers = decode_rtp_headers(
+            data,
+            np.frombuffer(offsets, dtype=np.int64),
+            np.frombuffer(lengths, dtype=np.int64)
+        )
+        index = headers['index']
+        headers['arrival_ns'] = np.frombuffer(arrivals, dtype=np.int64)[index]
+        headers['vlan'] = np.frombuffer(vlans, dtype=np.int32)[index]
+        pending = flow_filter
+        if pending is not None and not pending.needs_flow_addresses:
+            # Drop rejected packets before looking up their addresses
+            headers = apply_filter(headers)
+            index = headers['index']
+            pending = None
+        headers['src_ip'], headers['dst_ip'], headers['dst_port'] = flow_addresses(
+            data,
+            np.frombuffer(ip_offsets, dtype=np.int64)[index],
+            np.frombuffer(offsets, dtype=np.int64)[index]
+        )
+        if pending is not None:
+            headers = apply_filter(headers)
+        return headers
+
+    for arrival_ns, linktype, record_start, record_end in reader.records(start, stop):
+        record = buffer[record_start:record_end]
+        located = locate_udp(record, linktype)
+        if located is None:
+            continue
+        if located is NEEDS_DISSECTION:
+            located = RTPStreamExtractor._dissect_udp_payload(record, linktype)
+            if located is None:
+                continue
+
+        udp_start, udp_end, ip_offset, vlan = located
+        offsets.append(record_start + udp_start)
+        lengths.append(udp_end - udp_start)
+        arrivals.append(arrival_ns)
+        ip_offsets.append(record_start + ip_offset if ip_offset >= 0 else -1)
+        vlans.append(vlan)
+
+        if len(offsets) >= batch_size:
+            yield decode()
+            offsets, lengths, arrivals = array('q'), array('q'), array('q')
+            ip_offsets, vlans = array('q'), array('i')
+
+    if offsets:
+        yield decode()
+
+
+def group_rows(keys: np.ndarray) -> Iterator[Tuple[int, np.ndarray]]:
+    """Group rows of a batch by key (e.g. flow ID).
+
+    A stable sort keeps arrival order within each group.
+
+    Args:
+        keys: Integer key of each row
+
+    Yields:
+        Tuples of (key, row indices), in increasing key order
+    """
+    order = np.argsort(keys, kind='stable')
+    unique, starts = np.unique(keys[order], return_index=True)
+    bounds = np.append(starts, len(order))
+    for i, key in enumerate(unique.tolist()):
+        yield key, order[bounds[i]:bounds[i + 1]]
+
+
+def _extract_shard(pcap_path: str, start: int, stop: int, batch_size: int,
+                   flow_filter: Optional['FlowFilter'] = None,
+                   stream_type_of: Optional[Callable[[int, int], str]] = None
+                   ) -> Dict['FlowKey', Dict[str, np.ndarray]]:
+    """Extract the RTP packets of one capture range (process pool worker).
+
+    Args:
+        pcap_path: Path to the capture file
+        start: File offset of the first record of the range
+        stop: File offset at which the range ends
+        batch_size: Number of UDP payloads decoded per pass
+        flow_filter: Optional filter applied while scanning
+        stream_type_of: Stream type resolver for the filter
+
+    Returns:
+        Dictionary mapping each flow, in order of first appearance, to
+        column arrays in arrival order, keyed by RTPPacketStore.COLUMNS.
+        Payload offsets are absolute file offsets.
+    """
+
+    table = FlowTable()
+    chunks: Dict[int, Dict[str, list]] = {}
+    with CaptureReader(pcap_path) as reader:
+        for headers in scan_rtp_headers(reader, start, stop, batch_size,
+                                        flow_filter, stream_type_of):
+            for flow_id, rows in group_rows(table.flow_ids(headers)):
+                columns = chunks.setdefault(
+                    flow_id, {name: [] for name in RTPPacketStore.COLUMNS})
+                for name in RTPPacketStore.COLUMNS:
+                    columns[name].append(headers[name][rows])
+
+    return {
+        table.keys[flow_id]: {name: np.concatenate(parts)
+                              for name, parts in columns.items()}
+        for flow_id, columns in chunks.items()
+    }
 
-@dataclass
-class RTPPacketInfo:
-    """Information about an RTP packet."""
-    sequence: int
-    timestamp: int
-    ssrc: int
-    payload_type: int
-    marker: bool
-    payload: bytes
-    arrival_time: float  # Packet arrival time in seconds
-    ptp_timestamp: Optional[int] = None  # PTP timestamp if available
+
+# Stream type literal
+StreamType = Literal["audio", "video", "meta", "unknown"]
 
 
 @dataclass
@@ -34,20 +261,33 @@ class RTPStreamInfo:
     last_timestamp: int
     packets_lost: int
     packets_out_of_order: int
-    start_time: float
-    end_time: float
+    start_ns: int  # Arrival time of the first packet, nanoseconds since the epoch
+    end_ns: int  # Arrival time of the last packet
     stream_type: StreamType = "unknown"
     has_ptp: bool = False
+    sequence_cycles: int = 0  # Complete 2^16 sequence cycles from first_seq to last_seq
+
+    @property
+    def start_time(self) -> float:
+        """Get the arrival time of the first packet in seconds."""
+        return self.start_ns / 1e9
+
+    @property
+    def end_time(self) -> float:
+        """Get the arrival time of the last packet in seconds."""
+        return self.end_ns / 1e9
 
     @property
     def duration(self) -> float:
         """Get stream duration in seconds."""
-        return self.end_time - self.start_time
+        return (self.end_ns - self.start_ns) / 1e9
 
     @property
     def packet_loss_rate(self) -> float:
         """Calculate packet loss rate as percentage."""
-        total_expected = (self.last_seq - self.first_seq + 1) & 0xFFFF
+        total_expected = (
+            (self.sequence_cycles << 16) + ((self.last_seq - self.first_seq) & 0xFFFF) + 1
+        )
         if total_expected == 0:
             return 0.0
         return (self.packets_lost / total_expected) * 100.0
@@ -64,6 +304,9 @@ class RTPStreamExtractor:
         # Dynamic payload types can vary
     }
 
+    # Number of UDP payloads whose RTP headers are decoded per vectorized pass
+    BATCH_SIZE = 65536
+
     # Payload type to stream type mapping for auto-detection
     PAYLOAD_TYPE_TO_STREAM_TYPE = {
         # ST 2110-20 Video (typically 96)
@@ -98,40 +341,84 @@ class RTPStreamExtractor:
         self,
         use_ptp: bool = False,
         stream_type_override: Optional[Dict[int, StreamType]] = None,
-        payload_type_override: Optional[Dict[int, StreamType]] = None
+        payload_type_override: Optional[Dict[int, StreamType]] = None,
+        workers: int = 1,
+        use_index: bool = False,
+        flow_filter: Optional['FlowFilter'] = None,
+        header_only: bool = False,
+        ptp_domain: Optional[int] = None
     ):
         """Initialize RTP stream extractor.
 
         Args:
-            use_ptp: Whether to extract and use PTP timestamps
+            use_ptp: Whether to map packet arrival times to PTP time using
+                     the PTP Sync messages in the capture
             stream_type_override: Optional dict mapping SSRC to forced stream type.
                                  If specified, overrides auto-detection for those SSRCs.
                                  Example: {0x12345678: "audio", 0x87654321: "video"}
             payload_type_override: Optional dict mapping payload type to forced stream type.
                                   Overrides the default payload type mapping.
                                   Example: {98: "audio", 100: "video"}
+            workers: Number of processes used to scan the capture. Values
+                     above 1 split the file into record-aligned ranges that
+                     are scanned in parallel.
+            use_index: Whether to load streams from the capture's sidecar
+                       index when it is current, and to write one after a
+                       full scan (see capture_index).
+            flow_filter: Optional FlowFilter restricting which flows are
+                         kept. Rejected packets are dropped as soon as their
+                         headers are decoded and never reach a stream.
+            header_only: Keep only running per-flow statistics (see
+                         stream_stats.StreamAccumulator). stream_info is
+                         filled but no packets are kept in streams, so
+                         memory use does not grow with the capture.
+            ptp_domain: PTP domain whose master is used with use_ptp
+                        (default: the domain of the first Sync message)
+
+        Packets are grouped into flows keyed by (source IP, destination IP,
+        destination port, SSRC, VLAN), so streams sharing an SSRC (such as
+        the two legs of an ST 2022-7 pair) stay apart. flows and flow_info
+        hold every flow; streams and stream_info are views by SSRC that keep
+        the first flow seen for each SSRC.
         """
         self.use_ptp = use_ptp
+        self.ptp_domain = ptp_domain
+        self.ptp_map: Optional['PTPTimeMap'] = None
         self.stream_type_override = stream_type_override or {}
         self.payload_type_override = payload_type_override or {}
-        self.streams: Dict[int, List[RTPPacketInfo]] = defaultdict(list)
+        self.workers = max(int(workers), 1)
+        self.use_index = use_index
+        self.flow_filter = flow_filter
+        self.header_only = header_only
+        self._flow_table = FlowTable()
+        self._accumulators: Dict[FlowKey, 'StreamAccumulator'] = {}
+        self.flows: Dict[FlowKey, 'RTPPacketStore'] = {}
+        self.flow_info: Dict[FlowKey, RTPStreamInfo] = {}
+        self.streams: Dict[int, 'RTPPacketStore'] = {}
         self.stream_info: Dict[int, RTPStreamInfo] = {}
+        self._capture: Optional[CaptureReader] = None
 
-    def _parse_rtp_from_udp(self, udp_payload: bytes) -> Optional[Tuple[dict, bytes]]:
+    def _parse_rtp_from_udp(self, udp_payload: Union[bytes, memoryview]
+                            ) -> Optional[Tuple[dict, Union[bytes, memoryview]]]:
         """Parse RTP header from UDP payload.
 
         Args:
-            udp_payload: Raw UDP payload bytes
+            udp_payload: Raw UDP payload bytes or memoryview
 
         Returns:
-            Tuple of (RTP header dict, payload bytes) or None if not valid RTP
+            Tuple of (RTP header dict, payload) or None if not valid RTP. The
+            payload is a slice of the same type as udp_payload, so views are
+            not copied.
         """
         # Need at least 12 bytes for minimum RTP header
         if len(udp_payload) < 12:
             return None
 
+        # Decode the fixed header in one pass
+        (first_byte, second_byte, sequence, timestamp,
+         ssrc) = _RTP_FIXED_HEADER.unpack_from(udp_payload)
+
         # Parse first byte: V(2), P(1), X(1), CC(4)
-        first_byte = udp_payload[0]
         version = (first_byte >> 6) & 0x03
         padding = (first_byte >> 5) & 0x01
         extension = (first_byte >> 4) & 0x01
@@ -142,15 +429,9 @@ class RTPStreamExtractor:
             return None
 
         # Parse second byte: M(1), PT(7)
-        second_byte = udp_payload[1]
         marker = (second_byte >> 7) & 0x01
         payload_type = second_byte & 0x7F
 
-        # Parse rest of fixed header
-        sequence = struct.unpack('!H', udp_payload[2:4])[0]
-        timestamp = struct.unpack('!I', udp_payload[4:8])[0]
-        ssrc = struct.unpack('!I', udp_payload[8:12])[0]
-
         # Calculate header size
         header_size = 12  # Base header
 
@@ -198,114 +479,486 @@ class RTPStreamExtractor:
             'payload_type': payload_type,
             'sequence': sequence,
             'timestamp': timestamp,
-            'ssrc': ssrc
+            'ssrc': ssrc,
+            'header_size': header_size
         }
 
         return rtp_header, payload
 
-    def extract_from_pcap(self, pcap_path: str) -> Dict[int, List[RTPPacketInfo]]:
+    def extract_from_pcap(self, pcap_path: str) -> Dict[int, 'RTPPacketStore']:
         """Extract all RTP streams from a pcap file.
 
+        The capture is streamed one record at a time (pcap or pcapng), so
+        only the RTP packets that are kept contribute to memory usage; the
+        capture itself is never loaded as a whole.
+
+        Link, network and transport headers are parsed directly from the
+        record bytes. Only records using an encapsulation the raw parser does
+        not handle (e.g. GRE/ERSPAN, MPLS or unknown link types) are dissected
+        with Scapy.
+
+        The capture is memory-mapped and packets are kept in a columnar
+        RTPPacketStore per flow whose payloads are offsets into the mapping
+        rather than copies. The mapping stays open until close() is called
+        or another capture is extracted.
+
+        With workers > 1 the capture is split into record-aligned ranges
+        that are scanned by a process pool and merged per flow.
+
+        With use_index the scan is skipped entirely when the capture has a
+        current sidecar index, and an index is written after an unfiltered
+        scan.
+
+        With a flow_filter, rejected packets are dropped batch by batch right
+        after their headers are decoded, so unwanted flows cost only header
+        parsing.
+
+        Packets are grouped per flow (see flows); the returned dictionary
+        holds the first flow of each SSRC.
+
+        With header_only, only stream_info is filled and the returned
+        dictionary is empty. Header-only scans always run in this process.
+
+        With use_ptp, the capture's PTP Sync messages are decoded in a
+        separate pass after the RTP scan and packet arrival times are mapped
+        to PTP time (see ptp.PTPTimeMap and RTPPacketStore.ptp_ns).
+
         Args:
             pcap_path: Path to the pcap file
 
         Returns:
-            Dictionary mapping SSRC to list of RTP packets
+            Dictionary mapping SSRC to the stream's packet store
         """
-        from scapy.all import rdpcap, UDP, IP
-        from scapy.layers.rtp import RTP
+        self._reset()
+
+        flow_filter = self.flow_filter
+        self._capture = CaptureReader(pcap_path)
+        if self.use_index and self._load_index(pcap_path):
+            if flow_filter is not None:
+                self._filter_streams(flow_filter)
+            if self.header_only:
+                self.flows.clear()
+            if self.use_ptp:
+                self._map_ptp_time()
+            self._index_by_ssrc()
+            return self.streams
+
+        if self.header_only:
+            for headers in scan_rtp_headers(self._capture, batch_size=self.BATCH_SIZE,
+                                            flow_filter=flow_filter,
+                                            stream_type_of=self._detect_stream_type):
+                self._accumulate_batch(headers)
+            self.flush()
+            if self.use_ptp:
+                self._map_ptp_time()
+            return self.streams
+
+        ranges = self._capture.split(self.workers) if self.workers > 1 else []
+
+        if len(ranges) > 1:
+            self._extract_parallel(pcap_path, ranges)
+        else:
+            for headers in scan_rtp_headers(self._capture, batch_size=self.BATCH_SIZE,
+                                            flow_filter=flow_filter,
+                                            stream_type_of=self._detect_stream_type):
+                self._ingest_batch(headers)
 
-        self.streams.clear()
-        self.stream_info.clear()
+        # Sort packets by sequence number and analyze streams
+        for key, store in self.flows.items():
+            store.sort_by_sequence()
+            self.flow_info[key] = self._analyze_stream(store)
+        self._index_by_ssrc()
+
+        if self.use_index and flow_filter is None:
+            from .capture_index import write_index
+            try:
+                write_index(pcap_path, self.flows, self.flow_info)
+            except OSError:
+                pass  # The index is only an optimization
+
+        if self.use_ptp:
+            self._map_ptp_time()
+        return self.streams
 
-        packets = rdpcap(pcap_path)
-
-        for pkt in packets:
-            # First, try to check if Scapy already parsed RTP
-            if pkt.haslayer(RTP):
-                rtp = pkt[RTP]
-                arrival_time = float(pkt.time)
-
-                # Extract PTP timestamp if requested
-                ptp_timestamp = None
-                if self.use_ptp:
-                    ptp_timestamp = self._extract_ptp_timestamp(pkt)
-
-                # Create RTP packet info
-                rtp_info = RTPPacketInfo(
-                    sequence=rtp.sequence,
-                    timestamp=rtp.timestamp,
-                    ssrc=rtp.sourcesync,
-                    payload_type=rtp.payload_type,
-                    marker=bool(rtp.marker),
-                    payload=bytes(rtp.payload),
-                    arrival_time=arrival_time,
-                    ptp_timestamp=ptp_timestamp
-                )
-
-                self.streams[rtp.sourcesync].append(rtp_info)
-
-            # If not, try to manually parse RTP from UDP payload (for ST 2110)
-            elif pkt.haslayer(UDP):
-                udp = pkt[UDP]
-                udp_payload = bytes(udp.payload)
-
-                # Try to parse RTP from UDP payload
-                rtp_data = self._parse_rtp_from_udp(udp_payload)
-                if rtp_data is None:
-                    continue
-
-                rtp_header, payload = rtp_data
-                arrival_time = float(pkt.time)
-
-                # Extract PTP timestamp if requested
-                ptp_timestamp = None
-                if self.use_ptp:
-                    ptp_timestamp = self._extract_ptp_timestamp(pkt)
-
-                # Create RTP packet info
-                rtp_info = RTPPacketInfo(
-                    sequence=rtp_header['sequence'],
-                    timestamp=rtp_header['timestamp'],
-                    ssrc=rtp_header['ssrc'],
-                    payload_type=rtp_header['payload_type'],
-                    marker=rtp_header['marker'],
-                    payload=payload,
-                    arrival_time=arrival_time,
-                    ptp_timestamp=ptp_timestamp
-                )
-
-                self.streams[rtp_header['ssrc']].append(rtp_info)
+    def _map_ptp_time(self):
+        """Map the arrival times of the extracted flows to PTP time.
 
-        # Sort packets by sequence number and analyze streams
-        for ssrc in self.streams:
-            self.streams[ssrc].sort(key=lambda p: p.sequence)
-            self.stream_info[ssrc] = self._analyze_stream(self.streams[ssrc])
+        The capture's Sync and Follow_Up messages are decoded once into
+        ptp_map, which is attached to every packet store; flows are marked
+        has_ptp when the capture holds usable Syncs.
+        """
+        from .ptp import PTPTimeMap
+
+        self.ptp_map = PTPTimeMap.from_capture(self._capture, self.ptp_domain)
+        if not len(self.ptp_map):
+            return
+        for store in self.flows.values():
+            store.time_map = self.ptp_map
+        for info in self.flow_info.values():
+            info.has_ptp = True
+
+    def follow_pcap(self, pcap_path: str, interval: float = 1.0,
+                    idle_timeout: Optional[float] = None
+                    ) -> Iterator[Dict[int, RTPStreamInfo]]:
+        """Follow a capture file that is still being written, like ``tail -f``.
+
+        Each time the file has grown, only the newly appended records are
+        parsed, resuming after the last complete record, and the running
+        per-flow statistics are updated. Packets are not kept (as in
+        header_only mode), so memory use stays bounded however long the
+        capture runs. If the file shrinks (e.g. it was truncated and
+        restarted), statistics are reset and reading starts over.
 
-        return self.streams
+        Args:
+            pcap_path: Path to the capture file
+            interval: Seconds to wait between checks for new data
+            idle_timeout: Stop after the file has not grown for this many
+                          seconds (default: follow forever)
+
+        Yields:
+            Updated stream information (as get_stream_info()) after the
+            initial read and after each read of new data
+        """
+        import time
+        from .pcap_reader import PcapFormatError
+
+        self._reset()
+
+        position = 0
+        size = -1
+        idle = 0.0
+        while True:
+            current = os.path.getsize(pcap_path)
+            if current < size:
+                # Capture restarted: start over
+                self._reset()
+                position = 0
+
+            if current != size:
+                try:
+                    reader = CaptureReader(pcap_path)
+                except PcapFormatError:
+                    if current >= 64:
+                        raise
+                    reader = None  # File header not written yet
+
+                if reader is not None:
+                    with reader:
+                        batches = scan_rtp_headers(
+                            reader, start=position or None, batch_size=self.BATCH_SIZE,
+                            flow_filter=self.flow_filter,
+                            stream_type_of=self._detect_stream_type)
+                        for headers in batches:
+                            self._accumulate_batch(headers)
+                        position = reader.position
+
+                    size = current
+                    idle = 0.0
+                    yield self.flush()
+
+            elif idle_timeout is not None and idle >= idle_timeout:
+                return
+
+            time.sleep(interval)
+            idle += interval
+
+    def _load_index(self, pcap_path: str) -> bool:
+        """Populate flows from the capture's sidecar index.
+
+        Stream types are re-detected so the current overrides apply.
+
+        Args:
+            pcap_path: Path to the capture file
+
+        Returns:
+            True if a current index was loaded
+        """
+        from .capture_index import read_index
+
+        loaded = read_index(pcap_path, self._capture.buffer)
+        if loaded is None:
+            return False
+
+        flows, flow_info = loaded
+        self.flows.update(flows)
+        self.flow_info.update(flow_info)
+        for key, info in self.flow_info.items():
+            info.stream_type = self._detect_stream_type(key.ssrc, info.payload_type)
+        return True
+
+    def _filter_streams(self, flow_filter: 'FlowFilter'):
+        """Apply a filter to already extracted flows.
+
+        Args:
+            flow_filter: Filter to apply
+        """
+        for key in list(self.flows):
+            store = self.flows[key]
+            count = len(store)
+            keep = flow_filter.mask(
+                {'ssrc': np.full(count, key.ssrc, dtype=np.uint32),
+                 'payload_type': store.payload_type,
+                 'vlan': np.full(count, key.vlan, dtype=np.int32),
+                 'src_ip': np.full(count, np.void(ip_bytes(key.src_ip))),
+                 'dst_ip': np.full(count, np.void(ip_bytes(key.dst_ip))),
+                 'dst_port': np.full(count, key.dst_port, dtype=np.uint16)},
+                self._detect_stream_type
+            )
+            if keep.all():
+                continue
+            if not keep.any():
+                del self.flows[key]
+                del self.flow_info[key]
+                continue
+            store.reorder(np.flatnonzero(keep))
+            self.flow_info[key] = self._analyze_stream(store)
+
+    def _extract_parallel(self, pcap_path: str, ranges: List[Tuple[int, int]]):
+        """Scan capture ranges in worker processes and merge their packets.
+
+        Shards are merged in file order, so each stream's packets end up in
+        the same arrival order a serial scan produces. Loss and reordering are
+        computed afterwards on the merged stream, so flows crossing shard
+        boundaries are counted correctly.
+
+        Args:
+            pcap_path: Path to the capture file
+            ranges: Record-aligned (start, stop) offsets, in file order
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        buffer = self._capture.buffer
+        # A fresh extractor (no open capture) can be pickled to the workers
+        stream_type_of = type(self)(
+            stream_type_override=self.stream_type_override,
+            payload_type_override=self.payload_type_override
+        )._detect_stream_type
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(ranges))) as pool:
+            futures = [
+                pool.submit(_extract_shard, pcap_path, start, stop, self.BATCH_SIZE,
+                            self.flow_filter, stream_type_of)
+                for start, stop in ranges
+            ]
+            # Payload offsets are file offsets, valid in this process' mapping too
+            for future in futures:
+                for key, columns in future.result().items():
+                    store = self.flows.get(key)
+                    if store is None:
+                        store = self.flows[key] = RTPPacketStore(
+                            key.ssrc, buffer, capacity=len(columns['sequence']))
+                    store.extend(**columns)
+
+    def _ingest_batch(self, headers: Dict[str, np.ndarray]):
+        """Append a block of decoded RTP headers to their streams.
+
+        Args:
+            headers: Dictionary as yielded by scan_rtp_headers
+        """
+
+        buffer = self._capture.buffer
+        keys = self._flow_table.keys
+        for flow_id, rows in group_rows(self._flow_table.flow_ids(headers)):
+            key = keys[flow_id]
+            store = self.flows.get(key)
+            if store is None:
+                store = RTPPacketStore(key.ssrc, buffer, capacity=len(rows))
+                self.flows[key] = store
+            store.extend(**{name: headers[name][rows] for name in RTPPacketStore.COLUMNS})
+
+    def feed(self, buffer: Union[bytes, memoryview], arrival_ns: int,
+             linktype: Optional[int] = None) -> bool:
+        """Add one packet from a live source.
+
+        Per-flow statistics are updated in O(1). Unless the extractor is in
+        header_only mode, the packet is also appended to its stream, with
+        the payload copied, since live buffers are usually reused.
+
+        Feeding starts a live session: it cannot be mixed with streams
+        extracted from a capture file, and extract_from_pcap() discards
+        everything fed so far. Datagrams carry no addresses or VLAN, so all
+        datagrams with the same SSRC belong to one flow, and flow filter
+        criteria on addresses and VLANs only match raw frames.
+
+        Args:
+            buffer: UDP payload (datagram), or a raw frame if linktype is given
+            arrival_ns: Arrival time in nanoseconds since the epoch
+            linktype: pcap link type of a raw frame (e.g. 1 for Ethernet)
+
+        Returns:
+            True if the packet was accepted as RTP and passed the flow filter
 
-    def _extract_ptp_timestamp(self, packet) -> Optional[int]:
-        """Extract PTP timestamp from packet if available.
+        Raises:
+            ValueError: If streams extracted from a capture file are loaded
+        """
+        if self._capture is not None:
+            raise ValueError("feed() cannot add packets to streams extracted from a "
+                             "capture file")
+
+        ip_offset = vlan = -1
+        if linktype is not None:
+            located = locate_udp(buffer, linktype)
+            if located is NEEDS_DISSECTION:
+                located = self._dissect_udp_payload(buffer, linktype)
+            if located is None or located is NEEDS_DISSECTION:
+                return False
+            start, end, ip_offset, vlan = located
+            datagram = memoryview(buffer)[start:end]
+        else:
+            start = 0
+            datagram = buffer
+
+        parsed = self._parse_rtp_from_udp(datagram)
+        if parsed is None:
+            return False
+        header, payload = parsed
+        ssrc = header['ssrc']
+        payload_type = header['payload_type']
+
+        if ip_offset >= 0:
+            src_ip, dst_ip, dst_port = flow_address(buffer, ip_offset, start)
+        else:
+            src_ip = dst_ip = bytes(16)
+            dst_port = 0
+
+        if self.flow_filter is not None:
+            headers = {
+                'ssrc': np.array([ssrc], dtype=np.uint32),
+                'payload_type': np.array([payload_type], dtype=np.uint8),
+                'vlan': np.array([vlan], dtype=np.int32),
+                'src_ip': np.array([src_ip], dtype='V16'),
+                'dst_ip': np.array([dst_ip], dtype='V16'),
+                'dst_port': np.array([dst_port], dtype=np.uint16),
+            }
+            if not self.flow_filter.mask(headers, self._detect_stream_type)[0]:
+                return False
+
+        flow_id = self._flow_table.flow_id(src_ip, dst_ip, dst_port, ssrc, vlan)
+        key = self._flow_table.keys[flow_id]
+        accumulator = self._accumulators.get(key)
+        if accumulator is None:
+            accumulator = self._new_accumulator(key, payload_type)
+        accumulator.add(header['sequence'], header['timestamp'], payload_type, arrival_ns,
+                        len(payload))
+
+        if not self.header_only:
+            store = self.flows.get(key)
+            if store is None:
+                store = self.flows[key] = RTPPacketStore(ssrc)
+                self.streams.setdefault(ssrc, store)
+            store.append_packet(header['sequence'], header['timestamp'], header['marker'],
+                                payload_type, arrival_ns, payload)
+        return True
+
+    def flush(self) -> Dict[int, RTPStreamInfo]:
+        """Bring streams and stream_info up to date with the packets fed so far.
+
+        stream_info is rebuilt from the O(1) running counters, and retained
+        streams are put in sequence order. Streams with no new packets are
+        skipped; for the others, checking the order is a linear pass over
+        their sequence numbers, and every column is copied only when
+        packets arrived out of order (see RTPPacketStore.sort_by_sequence).
+
+        Returns:
+            Stream information by SSRC (as get_stream_info())
+        """
+        for key, accumulator in self._accumulators.items():
+            self.flow_info[key] = accumulator.stream_info(
+                self._detect_stream_type(key.ssrc, accumulator.payload_type))
+        for store in self.flows.values():
+            store.sort_by_sequence()
+        self._index_by_ssrc()
+        return self.get_stream_info()
+
+    def _new_accumulator(self, key: FlowKey, payload_type: int) -> 'StreamAccumulator':
+        """Start the running statistics of a flow, at its stream type's clock rate.
+
+        Args:
+            key: Flow
+            payload_type: Payload type of the flow's first packet
+
+        Returns:
+            Empty accumulator, registered for the flow
+        """
+        from .interarrival import CLOCK_RATES, DEFAULT_CLOCK_RATE
+        from .stream_stats import StreamAccumulator
+
+        stream_type = self._detect_stream_type(key.ssrc, payload_type)
+        clock_rate = CLOCK_RATES.get(stream_type, DEFAULT_CLOCK_RATE)
+        accumulator = StreamAccumulator(key.ssrc, clock_rate)
+        self._accumulators[key] = accumulator
+        return accumulator
+
+    def _accumulate_batch(self, headers: Dict[str, np.ndarray]):
+        """Update the running statistics of each stream with a block of headers.
+
+        Args:
+            headers: Dictionary as yielded by scan_rtp_headers
+        """
+        keys = self._flow_table.keys
+        for flow_id, rows in group_rows(self._flow_table.flow_ids(headers)):
+            key = keys[flow_id]
+            accumulator = self._accumulators.get(key)
+            if accumulator is None:
+                payload_type = int(headers['payload_type'][rows[0]])
+                accumulator = self._new_accumulator(key, payload_type)
+            accumulator.update(headers['sequence'][rows], headers['timestamp'][rows],
+                               headers['payload_type'][rows], headers['arrival_ns'][rows],
+                               headers['payload_length'][rows])
+
+    def close(self):
+        """Release the memory-mapped capture backing packet payloads.
+
+        Payload views still referenced elsewhere remain valid; the mapping is
+        released once the last of them is dropped.
+        """
+        if self._capture is not None:
+            self._capture.close()
+            self._capture = None
+
+    @staticmethod
+    def _dissect_udp_payload(record: memoryview,
+                             linktype: int) -> Optional[Tuple[int, int, int, int]]:
+        """Locate the UDP payload of a record using full Scapy dissection.
+
+        Fallback for records the raw header parser cannot decode.
 
         Args:
-            packet: Scapy packet
+            record: Raw record view
+            linktype: pcap link type of the record
 
         Returns:
-            PTP timestamp in nanoseconds or None
+            (start, end, ip_offset, vlan) as for pcap_reader.locate_udp, or
+            None. ip_offset is -1 if the inner IP header cannot be located.
         """
-        # Check if packet has PTP layer
-        try:
-            from dtk.custom_headers.PTP import PTPv2
-            if packet.haslayer(PTPv2):
-                ptp = packet[PTPv2]
-                # PTP timestamp is in seconds and nanoseconds
-                # Combine into total nanoseconds
-                if hasattr(ptp, 'seconds') and hasattr(ptp, 'nanoseconds'):
-                    return int(ptp.seconds) * 1_000_000_000 + int(ptp.nanoseconds)
-        except (ImportError, AttributeError):
-            pass
-
-        return None
+        from scapy.all import IP, UDP, Dot1Q, IPv6, conf
+
+        data = bytes(record)
+        pkt = conf.l2types.get(linktype, conf.raw_layer)(data)
+        if not pkt.haslayer(UDP):
+            return None
+
+        udp = pkt[UDP]
+        if not udp.payload:
+            return None
+
+        # Walk the headers down to UDP, adding up their lengths. Searching the
+        # record for the payload bytes would find the wrong place whenever
+        # they also appear later in the frame (zero-filled payloads, padding).
+        offset = 0
+        ip_offset = -1
+        layer = pkt
+        while not isinstance(layer, UDP):
+            if isinstance(layer, (IP, IPv6)):
+                ip_offset = offset  # The innermost IP header carries the datagram
+            offset += len(layer.self_build())
+            layer = layer.payload
+        start = offset + 8
+        end = offset + udp.len if udp.len and udp.len > 8 else len(data)
+        if end > len(data):
+            return None  # Truncated capture (snaplen)
+
+        vlan = pkt[Dot1Q].vlan if pkt.haslayer(Dot1Q) else -1
+        return start, end, ip_offset, vlan
 
     def _detect_stream_type(self, ssrc: int, payload_type: int) -> StreamType:
         """Detect stream type based on SSRC and payload type.
@@ -328,54 +981,71 @@ class RTPStreamExtractor:
         # Auto-detect based on default payload type mapping (lowest priority)
         return self.PAYLOAD_TYPE_TO_STREAM_TYPE.get(payload_type, "unknown")
 
-    def _analyze_stream(self, packets: List[RTPPacketInfo]) -> RTPStreamInfo:
+    def _reset(self):
+        """Forget all flows, statistics and the open capture."""
+        self._flow_table = FlowTable()
+        self._accumulators.clear()
+        self.flows.clear()
+        self.flow_info.clear()
+        self.streams.clear()
+        self.stream_info.clear()
+        self.ptp_map = None
+        self.close()
+
+    def _index_by_ssrc(self):
+        """Rebuild the per-SSRC views (streams, stream_info) from the flows."""
+        self.streams.clear()
+        self.stream_info.clear()
+        for key, info in self.flow_info.items():
+            if key.ssrc in self.stream_info:
+                continue
+            self.stream_info[key.ssrc] = info
+            if key in self.flows:
+                self.streams[key.ssrc] = self.flows[key]
+
+    def _analyze_stream(self, store: 'RTPPacketStore') -> RTPStreamInfo:
         """Analyze an RTP stream and gather statistics.
 
         Args:
-            packets: List of RTP packets in sequence order
+            store: Packets of the stream in sequence order
 
         Returns:
             Stream information and statistics
         """
-        if not packets:
+        if not len(store):
             raise ValueError("Cannot analyze empty stream")
 
-        first_pkt = packets[0]
-        last_pkt = packets[-1]
+        sequence = store.sequence
+        extended = store.extended_sequence
+        arrival = store.arrival_ns
 
-        # Count packet loss and out-of-order packets
-        packets_lost = 0
-        packets_out_of_order = 0
-        expected_seq = first_pkt.sequence
+        # Gaps between consecutive extended sequence numbers are losses
+        gaps = np.diff(extended) - 1
+        packets_lost = int(gaps[gaps > 0].sum())
 
-        for pkt in packets:
-            seq_diff = (pkt.sequence - expected_seq) & 0xFFFF
-            if seq_diff > 0:
-                packets_lost += seq_diff
-            elif seq_diff < 0:
-                packets_out_of_order += 1
-            expected_seq = (pkt.sequence + 1) & 0xFFFF
+        # Packets that arrived before a packet with a lower sequence number
+        packets_out_of_order = int(np.count_nonzero(np.diff(arrival) < 0))
 
-        # Check if stream has PTP timestamps
-        has_ptp = any(p.ptp_timestamp is not None for p in packets)
+        payload_type = int(store.payload_type[0])
 
         # Detect stream type (auto-detect or override)
-        stream_type = self._detect_stream_type(first_pkt.ssrc, first_pkt.payload_type)
+        stream_type = self._detect_stream_type(store.ssrc, payload_type)
 
         return RTPStreamInfo(
-            ssrc=first_pkt.ssrc,
-            payload_type=first_pkt.payload_type,
-            packet_count=len(packets),
-            first_seq=first_pkt.sequence,
-            last_seq=last_pkt.sequence,
-            first_timestamp=first_pkt.timestamp,
-            last_timestamp=last_pkt.timestamp,
+            ssrc=store.ssrc,
+            payload_type=payload_type,
+            packet_count=len(store),
+            first_seq=int(sequence[0]),
+            last_seq=int(sequence[-1]),
+            first_timestamp=int(store.timestamp[0]),
+            last_timestamp=int(store.timestamp[-1]),
             packets_lost=packets_lost,
             packets_out_of_order=packets_out_of_order,
-            start_time=first_pkt.arrival_time,
-            end_time=last_pkt.arrival_time,
+            start_ns=int(arrival[0]),
+            end_ns=int(arrival[-1]),
             stream_type=stream_type,
-            has_ptp=has_ptp
+            has_ptp=bool(store.time_map),
+            sequence_cycles=int(extended[-1] - extended[0]) >> 16
         )
 
     def get_stream_info(self, ssrc: Optional[int] = None) -> Dict[int, RTPStreamInfo]:
@@ -391,9 +1061,65 @@ class RTPStreamExtractor:
             return {ssrc: self.stream_info[ssrc]} if ssrc in self.stream_info else {}
         return self.stream_info.copy()
 
+    def get_arrival_stats(self, flow: FlowKey,
+                          clock_rate: Optional[int] = None) -> 'ArrivalStats':
+        """Get the jitter, inter-packet gap and drift statistics of a flow.
+
+        Computed from the flow's packets when they were kept, and otherwise
+        (header_only mode, follow_pcap(), live feeds without packets) from
+        its running statistics (see get_running_stats).
+
+        Args:
+            flow: Flow to analyze
+            clock_rate: RTP clock rate in Hz (default: by stream type, see
+                        interarrival.CLOCK_RATES). Running statistics always
+                        use the stream type's rate.
+
+        Returns:
+            Arrival statistics of the flow
+
+        Raises:
+            ValueError: If neither packets nor running statistics are
+                        available for the flow, or it has fewer than two
+                        packets
+        """
+        from .interarrival import CLOCK_RATES, DEFAULT_CLOCK_RATE, arrival_stats
+
+        if flow not in self.flows:
+            return self.get_running_stats(flow).arrival_stats()
+        if clock_rate is None:
+            stream_type = self.flow_info[flow].stream_type
+            clock_rate = CLOCK_RATES.get(stream_type, DEFAULT_CLOCK_RATE)
+        return arrival_stats(self.flows[flow], clock_rate)
+
+    def get_running_stats(self, flow: FlowKey) -> 'StreamAccumulator':
+        """Get the running statistics of a flow.
+
+        Running statistics are kept in header_only mode, by follow_pcap()
+        and for live feeds. Their memory use is constant per flow, however
+        long the capture: besides the counters behind stream_info, they
+        hold the gap, jitter and payload size distributions (mean, variance,
+        extremes and a power-of-two histogram each).
+
+        Args:
+            flow: Flow to look up
+
+        Returns:
+            Running statistics of the flow
+
+        Raises:
+            ValueError: If no running statistics are kept for the flow
+        """
+        accumulator = self._accumulators.get(flow)
+        if accumulator is None:
+            raise ValueError(f"No running statistics for flow {flow}")
+        return accumulator
+
     def get_payload_data(self, ssrc: int) -> bytes:
         """Get reassembled payload data for a stream.
 
+        Payload views are copied exactly once, into the returned buffer.
+
         Args:
             ssrc: SSRC of the stream
 
@@ -403,7 +1129,7 @@ class RTPStreamExtractor:
         if ssrc not in self.streams:
             raise ValueError(f"No stream found with SSRC {ssrc:#x}")
 
-        return b''.join(pkt.payload for pkt in self.streams[ssrc])
+        return self.streams[ssrc].payload_data()
 
     def get_payload_type_name(self, payload_type: int) -> str:
         """Get friendly name for payload type.
@@ -423,3 +1149,43 @@ class RTPStreamExtractor:
             List of (SSRC, StreamInfo) tuples
         """
         return sorted(self.stream_info.items())
+
+    def merge_flows(self, first: FlowKey, second: FlowKey, window: Optional[int] = None
+                    ) -> Tuple['RTPPacketStore', RTPStreamInfo, 'MergeStats']:
+        """Merge the two legs of an ST 2022-7 redundant flow.
+
+        The merged store holds one packet per sequence number in sequence
+        order and can be passed to the decoders like any extracted stream.
+
+        Args:
+            first: Flow of the first leg
+            second: Flow of the second leg
+            window: Reorder window in packets (default:
+                    st2022_7.DEFAULT_WINDOW)
+
+        Returns:
+            Tuple of (merged packet store, its stream info, merge statistics)
+
+        Raises:
+            ValueError: If a flow was not extracted or the legs' SSRCs differ
+        """
+        from .st2022_7 import DEFAULT_WINDOW, merge_flows
+
+        for key in (first, second):
+            if key not in self.flows:
+                raise ValueError(f"No packets extracted for flow {key}")
+        if first.ssrc != second.ssrc:
+            raise ValueError("Redundant legs must share an SSRC")
+
+        merged, stats = merge_flows(self.flows[first], self.flows[second],
+                                    window or DEFAULT_WINDOW)
+        merged.time_map = self.flows[first].time_map
+        return merged, self._analyze_stream(merged), stats
+
+    def list_flows(self) -> List[Tuple[FlowKey, RTPStreamInfo]]:
+        """Get list of all flows sorted by SSRC, then by addresses and VLAN.
+
+        Returns:
+            List of (FlowKey, StreamInfo) tuples
+        """
+        return sorted(self.flow_info.items(), key=lambda item: (item[0].ssrc, item[0]))
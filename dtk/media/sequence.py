@@ -0,0 +1,80 @@
+"""Extended RTP sequence numbers and near-sorted packet ordering.
+
+RTP carries 16-bit sequence numbers that wrap every 65536 packets; a few
+seconds of high-rate video wrap them many times over. These helpers unwrap
+them into monotonic extended numbers and order packets by them cheaply,
+relying on arrival order being almost sorted already.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+
+def extend_sequence_numbers(sequence: np.ndarray,
+                            previous: Optional[int] = None) -> np.ndarray:
+    """Unwrap 16-bit RTP sequence numbers into extended sequence numbers.
+
+    Vectorized form of the RFC 3550 (appendix A.1) cycle counter: each step
+    between consecutive packets is taken as the shortest signed distance
+    modulo 2^16, and the running sum adds the rollover cycles. Without
+    ``previous``, extended numbers are shifted by whole cycles so none is
+    negative; either way ``extended & 0xFFFF == sequence`` always holds.
+
+    Args:
+        sequence: Sequence numbers in arrival order
+        previous: Extended number of the packet that arrived just before
+            the first one, to continue unwrapping across batches
+
+    Returns:
+        int64 array of extended sequence numbers
+    """
+    sequence = np.asarray(sequence, dtype=np.int64)
+    if not len(sequence):
+        return sequence
+    extended = np.empty_like(sequence)
+    if previous is None:
+        first = sequence[0]
+    else:
+        first = previous + ((((sequence[0] - previous) + 0x8000) & 0xFFFF) - 0x8000)
+    steps = ((np.diff(sequence) + 0x8000) & 0xFFFF) - 0x8000
+    extended[0] = first
+    np.cumsum(steps, out=extended[1:])
+    extended[1:] += first
+    if previous is None:
+        lowest = int(extended.min())
+        if lowest < 0:
+            extended += (-lowest + 0xFFFF) >> 16 << 16
+    return extended
+
+
+def in_order_permutation(keys: np.ndarray) -> np.ndarray:
+    """Order packets by key, exploiting that arrival order is nearly sorted.
+
+    Packets that arrived no later than every packet before them already
+    form a sorted run. Only the remaining late packets are sorted and
+    inserted into that run, so the cost is linear in the number of packets
+    plus O(k log n) for k late packets, instead of a full comparison sort.
+    Equal keys keep their arrival order.
+
+    Args:
+        keys: Sort keys (e.g. extended sequence numbers) in arrival order
+
+    Returns:
+        Index array giving the packets in key order
+    """
+    keys = np.asarray(keys)
+    if len(keys) < 2:
+        return np.arange(len(keys))
+
+    running_max = np.maximum.accumulate(keys)
+    late = np.zeros(len(keys), dtype=bool)
+    late[1:] = keys[1:] < running_max[:-1]
+    if not late.any():
+        return np.arange(len(keys))
+
+    in_order = np.flatnonzero(~late)
+    late_packets = np.flatnonzero(late)
+    late_packets = late_packets[np.argsort(keys[late_packets], kind='stable')]
+    positions = np.searchsorted(keys[in_order], keys[late_packets], side='right')
+    return np.insert(in_order, positions, late_packets)
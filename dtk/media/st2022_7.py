@@ -0,0 +1,245 @@
+"""SMPTE ST 2022-7 seamless protection switching: merging redundant legs.
+
+ST 2022-7 sends the same RTP packets (same SSRC, sequence numbers and
+payloads) over two independent network paths. A receiver reconstructs the
+stream by taking each sequence number from whichever leg delivers it first,
+so a packet lost on one leg is "rescued" by the other.
+"""
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .sequence import extend_sequence_numbers
+
+if TYPE_CHECKING:
+    from .packet_store import RTPPacketStore
+
+# Default reorder window in packets. It bounds the merge state and must
+# cover the differential delay between the legs (in packets) plus any
+# reordering within a leg.
+DEFAULT_WINDOW = 8192
+
+
+@dataclass
+class LegStats:
+    """Per-leg statistics of a seamless merge."""
+    packets_received: int = 0
+    packets_lost: int = 0  # Merged sequence numbers this leg did not deliver
+    packets_rescued: int = 0  # Merged packets only this leg delivered
+
+
+@dataclass
+class MergeStats:
+    """Statistics of a seamless merge."""
+    packet_count: int = 0  # Packets in the merged stream
+    packets_lost: int = 0  # Sequence numbers missing on both legs
+    packets_late: int = 0  # Dropped: arrived after their slot left the window
+    legs: List[LegStats] = field(default_factory=lambda: [LegStats(), LegStats()])
+
+
+class SeamlessMerger:
+    """Merge the two legs of an ST 2022-7 flow with a bounded reorder window.
+
+    Packets are pushed in batches of column arrays (as in RTPPacketStore),
+    each batch from one leg and in that leg's arrival order. Packets are
+    held until the highest sequence number seen is ``window`` ahead of them;
+    they are then emitted in sequence order, one packet per sequence number
+    (the earliest arrival, from either leg), and any sequence number neither
+    leg delivered is counted as lost. Memory use is bounded by the window,
+    independent of the stream length.
+
+    Example:
+        merger = SeamlessMerger()
+        for leg, columns in batches:
+            merged = merger.push(leg, columns)
+            ...
+        merged = merger.finish()
+    """
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        """Initialize a merger.
+
+        Args:
+            window: Reorder window in packets
+
+        Raises:
+            ValueError: If the window is not positive
+        """
+        if window < 1:
+            raise ValueError("Reorder window must be at least one packet")
+        self.window = window
+        self.stats = MergeStats()
+        self._last: List[Optional[int]] = [None, None]  # Last extended number per leg
+        self._highest: Optional[int] = None
+        self._next: Optional[int] = None  # First extended number not yet emitted
+        self._pending: Optional[Dict[str, np.ndarray]] = None
+
+    def push(self, leg: int, columns: Dict[str, np.ndarray],
+             extended: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """Add a batch of packets from one leg.
+
+        Args:
+            leg: Leg index, 0 or 1
+            columns: Column arrays keyed by RTPPacketStore.COLUMNS, in the
+                leg's arrival order
+            extended: Extended sequence numbers of the packets, if already
+                known on a scale shared by both legs (otherwise the sequence
+                numbers are unwrapped here)
+
+        Returns:
+            Packets that left the window, as returned by finish()
+        """
+        if leg not in (0, 1):
+            raise ValueError(f"Invalid leg: {leg}")
+        count = len(columns['sequence'])
+        if not count:
+            return self._emit(None)
+
+        if extended is None:
+            previous = self._last[leg] if self._last[leg] is not None else self._highest
+            extended = extend_sequence_numbers(columns['sequence'], previous)
+            if previous is None:
+                # Start one cycle up so early packets of the other leg stay non-negative
+                extended = extended + 0x10000
+        self._last[leg] = int(extended[-1])
+        self.stats.legs[leg].packets_received += count
+
+        batch = {name: np.asarray(column) for name, column in columns.items()}
+        batch['extended'] = np.asarray(extended, dtype=np.int64)
+        batch['leg'] = np.full(count, leg, dtype=np.uint8)
+
+        if self._next is not None:
+            late = batch['extended'] < self._next
+            if late.any():
+                self.stats.packets_late += int(np.count_nonzero(late))
+                batch = {name: column[~late] for name, column in batch.items()}
+                if not len(batch['extended']):
+                    return self._emit(None)
+
+        highest = int(batch['extended'].max())
+        if self._highest is None or highest > self._highest:
+            self._highest = highest
+        if self._pending is None:
+            self._pending = batch
+        else:
+            self._pending = {name: np.concatenate((self._pending[name], batch[name]))
+                             for name in batch}
+        return self._emit(self._highest - self.window + 1)
+
+    def finish(self) -> Dict[str, np.ndarray]:
+        """Emit every packet still held in the window.
+
+        Returns:
+            Merged packets in sequence order: the pushed columns plus
+            'extended' (extended sequence number) and 'leg' (leg the packet
+            was taken from)
+        """
+        if self._highest is None:
+            return self._emit(None)
+        return self._emit(self._highest + 1)
+
+    def _emit(self, limit: Optional[int]) -> Dict[str, np.ndarray]:
+        """Remove and return pending packets with extended numbers below limit."""
+        pending = self._pending
+        if pending is None or limit is None:
+            return {}
+        extended = pending['extended']
+        if self._next is None:
+            self._next = int(extended.min()) if len(extended) else limit
+        if limit <= self._next:
+            return {}
+
+        ready = extended < limit
+        taken = {name: column[ready] for name, column in pending.items()}
+        self._pending = {name: column[~ready] for name, column in pending.items()}
+
+        # One packet per sequence number: the earliest arrival (then the first pushed)
+        order = np.lexsort((taken['arrival_ns'], taken['extended']))
+        numbers = taken['extended'][order]
+        numbers, first = np.unique(numbers, return_index=True)
+        legs_seen = np.zeros(len(first), dtype=np.uint8)
+        if len(first):
+            # Bit 0/1 set when leg 0/1 delivered the sequence number
+            leg_bits = np.left_shift(1, taken['leg'][order])
+            legs_seen = np.bitwise_or.reduceat(leg_bits, first)
+
+        slots = limit - self._next
+        stats = self.stats
+        stats.packet_count += len(numbers)
+        stats.packets_lost += slots - len(numbers)
+        for leg, leg_stats in enumerate(stats.legs):
+            bit = 1 << leg
+            leg_stats.packets_lost += slots - int(np.count_nonzero(legs_seen & bit))
+            leg_stats.packets_rescued += int(np.count_nonzero(legs_seen == bit))
+        self._next = limit
+
+        return {name: column[order[first]] for name, column in taken.items()}
+
+
+def merge_flows(first: 'RTPPacketStore', second: 'RTPPacketStore',
+                window: int = DEFAULT_WINDOW) -> Tuple['RTPPacketStore', MergeStats]:
+    """Merge two extracted legs of an ST 2022-7 flow into one stream.
+
+    Both stores must be in sequence order (as left by extraction). They
+    are fed to a SeamlessMerger one window-sized range of sequence numbers
+    at a time, so the merge state stays bounded however long the legs are.
+    When both legs refer to the same buffer (e.g. the same capture) the
+    merged store shares it; otherwise payloads are copied into a store
+    that owns its buffer.
+
+    Args:
+        first: Packets of the first leg
+        second: Packets of the second leg
+        window: Reorder window in packets
+
+    Returns:
+        Tuple of (merged store in sequence order, merge statistics)
+    """
+    from .packet_store import RTPPacketStore
+
+    stores = (first, second)
+    shared = first.buffer is second.buffer
+    merged = RTPPacketStore(first.ssrc, first.buffer if shared else None,
+                            capacity=max(len(first), len(second)))
+    merger = SeamlessMerger(window)
+
+    # Put both legs on one extended sequence scale, anchored on the first leg
+    extended = [store.extended_sequence for store in stores]
+    if len(first) and len(second):
+        step = int(second.sequence[0]) - int(first.sequence[0])
+        offset = ((step + 0x8000) & 0xFFFF) - 0x8000
+        extended[1] = extended[1] + (int(extended[0][0]) + offset - int(extended[1][0]))
+
+    def append(packets: Dict[str, np.ndarray]):
+        if not packets:
+            return
+        if shared:
+            merged.extend(**{name: packets[name] for name in RTPPacketStore.COLUMNS})
+            return
+        for i, leg in enumerate(packets['leg'].tolist()):
+            offset = int(packets['payload_offset'][i])
+            end = offset + int(packets['payload_length'][i])
+            payload = memoryview(stores[leg].buffer)[offset:end]
+            merged.append_packet(int(packets['sequence'][i]),
+                                 int(packets['timestamp'][i]),
+                                 bool(packets['marker'][i]),
+                                 int(packets['payload_type'][i]),
+                                 int(packets['arrival_ns'][i]), payload)
+
+    present = [numbers for numbers in extended if len(numbers)]
+    if present:
+        low = min(int(numbers[0]) for numbers in present)
+        high = max(int(numbers[-1]) for numbers in present)
+        for start in range(low, high + 1, window):
+            for leg, store in enumerate(stores):
+                rows = slice(*np.searchsorted(extended[leg], [start, start + window]))
+                append(merger.push(
+                    leg,
+                    {name: getattr(store, name)[rows] for name in RTPPacketStore.COLUMNS},
+                    extended[leg][rows]
+                ))
+        append(merger.finish())
+
+    return merged, merger.stats
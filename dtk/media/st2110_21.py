@@ -0,0 +1,321 @@
+"""SMPTE ST 2110-21 sender timing analysis (Cinst, VRX and TRO).
+
+ST 2110-21 classifies video senders by how evenly they space the packets
+of each frame, using two receiver models:
+
+- The network compatibility model, a leaky bucket drained slightly faster
+  (by a factor BETA) than the nominal packet rate. Its level at each packet
+  arrival, Cinst, must stay at or below CMAX.
+- The virtual receiver buffer, drained one packet every TRS starting TRO
+  after each frame's nominal start (TPR0, a multiple of the frame period
+  since the PTP epoch). Its level, VRX, must stay at or below VRX_FULL,
+  and it must never underrun (a packet arriving after its drain time).
+
+Narrow gapped (type N) and wide (type W) senders are checked against the
+gapped schedule, where a frame's packets are spread over its active lines
+only; narrow linear (type NL) senders against the linear schedule, where
+they are spread over the whole frame period.
+
+All models are evaluated with vectorized numpy operations over the packet
+arrival arrays of an extracted stream.
+"""
+
+from dataclasses import dataclass
+from fractions import Fraction
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .packet_store import RTPPacketStore
+
+# Drain rate factor of the network compatibility model
+BETA = 1.1
+
+# Sender types, tightest first
+NARROW = "narrow"
+NARROW_LINEAR = "narrow-linear"
+WIDE = "wide"
+NON_COMPLIANT = "non-compliant"
+VERDICTS = (NARROW, NARROW_LINEAR, WIDE, NON_COMPLIANT)
+
+# Frame (or field) rates recognised from the RTP timestamps
+COMMON_RATES = (
+    Fraction(24000, 1001), Fraction(24), Fraction(25), Fraction(30000, 1001),
+    Fraction(30), Fraction(50), Fraction(60000, 1001), Fraction(60), Fraction(100),
+    Fraction(120000, 1001), Fraction(120),
+)
+
+# Raster timing by (active lines, interlaced): total lines per frame or
+# field, and lines between the nominal frame start and the first packet
+# (TRO_DEFAULT)
+RASTERS = {
+    (720, False): (Fraction(750), 28),
+    (1080, False): (Fraction(1125), 43),
+    (1080, True): (Fraction(1125, 2), 22),
+    (2160, False): (Fraction(2250), 86),
+}
+
+VIDEO_CLOCK_RATE = 90000
+
+
+@dataclass
+class SenderModel:
+    """Limits and drain schedule of one ST 2110-21 sender type."""
+    name: str
+    linear: bool  # Linear schedule (packets spread over the whole frame period)
+    cmax: int  # Largest allowed Cinst
+    vrx_full: int  # Largest allowed VRX
+    trs_ns: float  # Drain interval of the virtual receiver buffer
+    tro_ns: float  # Delay of the first drain after the nominal frame start
+
+
+@dataclass
+class TimingReport:
+    """ST 2110-21 timing of one video stream.
+
+    Per-packet arrays are in the order of the store the report was built
+    from (sequence order); per-frame arrays cover the frames delimited by
+    frame_bounds, of which only complete frames get a verdict.
+    """
+    rate: Fraction  # Frames (fields, if interlaced) per second
+    packets_per_frame: int
+    models: Dict[str, SenderModel]  # Keyed by sender type
+    frame_bounds: np.ndarray  # Packet index boundaries of the frames
+    frame_timestamp: np.ndarray  # RTP timestamp of each frame
+    complete: np.ndarray  # Whether each frame has packets_per_frame packets
+    tro_ns: np.ndarray  # First packet time after the frame's nominal start
+    cinst: Dict[bool, np.ndarray]  # Per-packet Cinst, keyed by linear schedule
+    vrx: Dict[bool, np.ndarray]  # Per-packet VRX (negative on underrun), keyed likewise
+    ptp: bool  # Whether packet times were mapped from PTP messages
+
+    def frame_max(self, values: np.ndarray) -> np.ndarray:
+        """Get the largest value of a per-packet array within each frame.
+
+        Args:
+            values: Per-packet array (e.g. cinst[False])
+
+        Returns:
+            Array with one entry per frame
+        """
+        return np.maximum.reduceat(values, self.frame_bounds[:-1])
+
+    def passes(self, sender_type: str) -> np.ndarray:
+        """Get which complete frames satisfy a sender type.
+
+        Args:
+            sender_type: NARROW, NARROW_LINEAR or WIDE
+
+        Returns:
+            Boolean array with one entry per complete frame
+        """
+        model = self.models[sender_type]
+        vrx = self.vrx[model.linear]
+        ok = self.frame_max(self.cinst[model.linear]) <= model.cmax
+        ok &= self.frame_max(vrx) <= model.vrx_full
+        ok &= np.minimum.reduceat(vrx, self.frame_bounds[:-1]) >= 0
+        return ok[self.complete]
+
+    def verdicts(self) -> np.ndarray:
+        """Get the tightest sender type each complete frame satisfies.
+
+        Returns:
+            Array of VERDICTS entries, one per complete frame
+        """
+        verdict = np.full(int(np.count_nonzero(self.complete)), len(VERDICTS) - 1)
+        for rank in reversed(range(len(VERDICTS) - 1)):
+            verdict[self.passes(VERDICTS[rank])] = rank
+        return np.array(VERDICTS, dtype=object)[verdict]
+
+    @property
+    def compliance(self) -> str:
+        """Get the tightest sender type every complete frame satisfies."""
+        for sender_type in VERDICTS[:-1]:
+            if self.passes(sender_type).all():
+                return sender_type
+        return NON_COMPLIANT
+
+
+def detect_rate(timestamps: np.ndarray) -> Fraction:
+    """Recognise the frame (or field) rate from the RTP timestamps of frames.
+
+    Args:
+        timestamps: 90 kHz RTP timestamp of each frame, in order
+
+    Returns:
+        Closest entry of COMMON_RATES to the median timestamp step
+
+    Raises:
+        ValueError: If fewer than two frames are given
+    """
+    if len(timestamps) < 2:
+        raise ValueError("At least two frames are needed to detect the frame rate")
+    steps = np.diff(np.asarray(timestamps, dtype=np.uint32)).astype(np.uint32)
+    step = float(np.median(steps[steps > 0])) if (steps > 0).any() else 0.0
+    if not step:
+        raise ValueError("RTP timestamps do not advance between frames")
+    return min(COMMON_RATES, key=lambda rate: abs(VIDEO_CLOCK_RATE / step - rate))
+
+
+def frame_offsets(times_ns: np.ndarray, rate: Fraction) -> np.ndarray:
+    """Get the time of each instant since the start of its frame period.
+
+    Frame periods are aligned to the PTP epoch (TPR0 = N / rate). The
+    arithmetic is exact in int64 for any time since the epoch.
+
+    Args:
+        times_ns: Times in nanoseconds since the PTP epoch
+        rate: Frame (or field) rate
+
+    Returns:
+        int64 offsets in nanoseconds, in [0, 1 / rate)
+    """
+    num, den = rate.denominator, rate.numerator  # Frame period num / den seconds
+    seconds, nanoseconds = np.divmod(np.asarray(times_ns, dtype=np.int64), 1_000_000_000)
+    # Position in the period is (seconds * den + nanoseconds * den / 1e9) mod num
+    cycle = (seconds % num) * den % num
+    scaled = cycle * 1_000_000_000 + nanoseconds * den
+    return (scaled % (num * 1_000_000_000)) // den
+
+
+def _cinst(arrivals: np.ndarray, drain_ns: float) -> np.ndarray:
+    """Level of the network compatibility bucket after each arrival.
+
+    The bucket drains one packet every drain_ns but never below empty.
+    That clamp is the Lindley recursion, evaluated in closed form: the
+    level of the unclamped bucket, minus its lowest dip below empty so far.
+
+    Args:
+        arrivals: Arrival times in nanoseconds, sorted
+        drain_ns: Drain interval in nanoseconds
+
+    Returns:
+        int64 Cinst at each arrival
+    """
+    drained = np.floor((arrivals - arrivals[0]) / drain_ns).astype(np.int64)
+    level = np.arange(1, len(arrivals) + 1, dtype=np.int64) - drained
+    return level - np.minimum(np.minimum.accumulate(level - 1), 0)
+
+
+def analyze_timing(store: 'RTPPacketStore', rate: Optional[Fraction] = None,
+                   height: int = 1080, interlaced: bool = False,
+                   leap_seconds: int = 37) -> TimingReport:
+    """Analyze the ST 2110-21 timing of a video stream.
+
+    Packet times come from the store's PTP time map when it has one (see
+    RTPStreamExtractor use_ptp). Otherwise the capture clock is assumed to
+    be locked to PTP and to run on UTC, and leap_seconds is added to reach
+    PTP (TAI) time.
+
+    Args:
+        store: Packets of the stream in sequence order
+        rate: Frame rate, or field rate if interlaced (default: detected
+              from the RTP timestamps)
+        height: Active lines per frame (720, 1080 or 2160)
+        interlaced: Whether the stream carries interlaced fields
+        leap_seconds: TAI - UTC offset applied to capture clock times
+
+    Returns:
+        Timing report of the stream
+
+    Raises:
+        ValueError: If the raster is not supported or the stream has fewer
+                    than two frames
+    """
+    raster = RASTERS.get((height, interlaced))
+    if raster is None:
+        kind = "interlaced" if interlaced else "progressive"
+        raise ValueError(f"No ST 2110-21 timing for {height}-line {kind} video")
+    total_lines, tro_lines = raster
+
+    bounds = store.frame_bounds()
+    if len(bounds) < 3:
+        raise ValueError("At least two frames are needed for timing analysis")
+    frame_timestamp = store.timestamp[bounds[:-1]]
+    if rate is None:
+        rate = detect_rate(frame_timestamp)
+
+    ptp = store.ptp_ns
+    times = ptp if ptp is not None else store.arrival_ns + leap_seconds * 1_000_000_000
+
+    sizes = np.diff(bounds)
+    packets_per_frame = int(np.median(sizes))
+    complete = sizes == packets_per_frame
+
+    frame_ns = 1e9 / float(rate)
+    active_lines = height / 2 if interlaced else height
+    r_active = float(active_lines / total_lines)
+    tro_default = frame_ns * tro_lines / float(total_lines)
+    packet_rate = packets_per_frame / (frame_ns / 1e9)  # Nominal packets per second
+    cmax_narrow = max(4, int(packet_rate / (43200 * r_active)))
+    cmax_linear = max(4, int(packet_rate / 43200))
+    cmax_wide = max(16, int(packet_rate / 21600))
+    vrx_narrow = max(8, int(packet_rate / 27000))
+    vrx_wide = max(720, int(packet_rate / 300))
+    trs = {False: frame_ns * r_active / packets_per_frame,
+           True: frame_ns / packets_per_frame}
+    models = {
+        NARROW: SenderModel(NARROW, False, cmax_narrow, vrx_narrow, trs[False],
+                            tro_default),
+        NARROW_LINEAR: SenderModel(NARROW_LINEAR, True, cmax_linear, vrx_narrow,
+                                   trs[True], tro_default),
+        WIDE: SenderModel(WIDE, False, cmax_wide, vrx_wide, trs[False], tro_default),
+    }
+
+    # Nominal start (TPR0) of each frame and each packet's place in its frame
+    first = times[bounds[:-1]]
+    tro = frame_offsets(first, rate)
+    tpr0 = first - tro
+    frame = np.repeat(np.arange(len(sizes)), sizes)
+    position = np.arange(len(times)) - bounds[frame]
+    since_start = (times - tpr0[frame]).astype(np.float64)
+
+    # Cinst follows arrival order, which may differ from sequence order
+    order = np.argsort(times, kind='stable')
+    cinst = {}
+    vrx = {}
+    for linear, interval in trs.items():
+        cinst[linear] = np.empty(len(times), dtype=np.int64)
+        cinst[linear][order] = _cinst(times[order], interval / BETA)
+        drained = np.floor((since_start - tro_default) / interval).astype(np.int64) + 1
+        vrx[linear] = position + 1 - np.maximum(drained, 0)
+
+    return TimingReport(
+        rate=rate,
+        packets_per_frame=packets_per_frame,
+        models=models,
+        frame_bounds=bounds,
+        frame_timestamp=frame_timestamp,
+        complete=complete,
+        tro_ns=tro,
+        cinst=cinst,
+        vrx=vrx,
+        ptp=ptp is not None,
+    )
+
+
+def histogram(values: np.ndarray,
+              max_bins: int = 16) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Count how often each level of Cinst or VRX (or any integer) occurs.
+
+    Levels are counted one by one when there are at most max_bins of them,
+    and in equally wide ranges of levels otherwise.
+
+    Args:
+        values: Integer levels
+        max_bins: Largest number of bins
+
+    Returns:
+        Tuple of (lowest level, highest level, count) arrays for each
+        non-empty bin, in increasing order
+    """
+    values = np.asarray(values, dtype=np.int64)
+    if not len(values):
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+    low = int(values.min())
+    width = -(-(int(values.max()) - low + 1) // max_bins)  # Levels per bin
+    counts = np.bincount((values - low) // width)
+    used = np.flatnonzero(counts)
+    lows = low + used * width
+    return lows, np.minimum(lows + width - 1, values.max()), counts[used]
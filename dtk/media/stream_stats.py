@@ -0,0 +1,247 @@
+"""Running per-stream statistics that do not retain packets."""
+
+from typing import Optional
+
+import numpy as np
+
+from .interarrival import DEFAULT_CLOCK_RATE, ArrivalStats, rfc3550_jitter
+from .online_stats import RunningRegression, RunningStats
+from .rtp_extractor import RTPStreamInfo, StreamType
+from .sequence import extend_sequence_numbers
+
+
+class StreamAccumulator:
+    """Running RTPStreamInfo statistics of one flow.
+
+    Keeps a constant amount of state per stream (counters plus the first,
+    lowest and highest packets seen), so arbitrarily long captures can be
+    inventoried without storing their packets. Packets are fed in arrival
+    order, either as batches of header columns (update) or one at a time
+    (add).
+
+    Statistics follow RFC 3550 appendix A.3 and match those of a full
+    extraction except for duplicates: ``packets_lost`` is the number of
+    expected packets minus the number received, so duplicated packets offset
+    lost ones, and ``packets_out_of_order`` counts packets that arrived
+    after a packet with a higher sequence number.
+
+    Arrival timing is tracked the same way (see arrival_stats): gaps
+    between packets, the RFC 3550 jitter estimate after each packet and
+    payload sizes as online_stats.RunningStats, and the RTP clock drift as a
+    running least squares fit, all in O(1) memory.
+    """
+
+    def __init__(self, ssrc: int, clock_rate: int = DEFAULT_CLOCK_RATE):
+        """Initialize an empty accumulator.
+
+        Args:
+            ssrc: SSRC of the stream
+            clock_rate: RTP clock rate in Hz, for jitter and drift (see
+                        interarrival.CLOCK_RATES)
+        """
+        self.ssrc = ssrc
+        self.clock_rate = clock_rate
+        self.payload_type: Optional[int] = None
+        self.packet_count = 0
+        self.packets_out_of_order = 0
+        self.gaps = RunningStats()  # Nanoseconds between consecutive arrivals
+        self.jitter = RunningStats()  # Jitter estimate after each packet, in nanoseconds
+        self.sizes = RunningStats()  # RTP payload bytes
+        self._drift = RunningRegression()  # RTP time against arrival time, in seconds
+        self._jitter = 0.0  # Current jitter estimate, in RTP timestamp units
+        # Arrival ns and RTP timestamp of the most recent packet, arrival ns of
+        # the first and RTP ticks elapsed since it (unwrapped)
+        self._last_arrival: Optional[int] = None
+        self._last_timestamp = 0
+        self._first_arrival = 0
+        self._rtp_elapsed = 0
+        # Extended sequence number of the most recent packet, for unwrapping
+        self._last_extended: Optional[int] = None
+        # (extended sequence, RTP timestamp, arrival ns) of the extremes
+        self._lowest: Optional[tuple] = None
+        self._highest: Optional[tuple] = None
+
+    def update(self, sequence: np.ndarray, timestamp: np.ndarray,
+               payload_type: np.ndarray, arrival_ns: np.ndarray,
+               payload_length: Optional[np.ndarray] = None):
+        """Add a batch of packets, in arrival order.
+
+        Args:
+            sequence: RTP sequence numbers
+            timestamp: RTP timestamps
+            payload_type: RTP payload types
+            arrival_ns: Arrival times in nanoseconds
+            payload_length: RTP payload sizes in bytes, if known
+        """
+        count = len(sequence)
+        if not count:
+            return
+
+        self._update_timing(np.asarray(timestamp, dtype=np.int64),
+                            np.asarray(arrival_ns, dtype=np.int64))
+        if payload_length is not None:
+            self.sizes.update(payload_length)
+
+        if self._last_extended is None:
+            # Start one cycle up so early reordered packets stay non-negative
+            extended = extend_sequence_numbers(sequence) + 0x10000
+            self.payload_type = int(payload_type[0])
+        else:
+            extended = extend_sequence_numbers(sequence, self._last_extended)
+
+        # Late packets: lower than some packet that arrived before them
+        highest_before = np.maximum.accumulate(extended)
+        if self._highest is not None:
+            np.maximum(highest_before, self._highest[0], out=highest_before)
+            late = int(extended[0] < self._highest[0])
+        else:
+            late = 0
+        late += int(np.count_nonzero(extended[1:] < highest_before[:-1]))
+        self.packets_out_of_order += late
+
+        low = int(np.argmin(extended))
+        if self._lowest is None or extended[low] < self._lowest[0]:
+            self._lowest = (int(extended[low]), int(timestamp[low]), int(arrival_ns[low]))
+        high = int(np.argmax(extended))
+        if self._highest is None or extended[high] > self._highest[0]:
+            self._highest = (int(extended[high]), int(timestamp[high]),
+                             int(arrival_ns[high]))
+
+        self._last_extended = int(extended[-1])
+        self.packet_count += count
+
+    def _update_timing(self, timestamp: np.ndarray, arrival_ns: np.ndarray):
+        """Add a batch of packets to the arrival timing statistics."""
+        if self._last_arrival is None:
+            self._first_arrival = self._last_arrival = int(arrival_ns[0])
+            self._last_timestamp = int(timestamp[0])
+            self._drift.add(0.0, 0.0)
+            timestamp, arrival_ns = timestamp[1:], arrival_ns[1:]
+            if not len(arrival_ns):
+                return
+
+        rate = self.clock_rate
+        gaps = np.diff(arrival_ns, prepend=self._last_arrival)
+        steps = np.diff(timestamp, prepend=self._last_timestamp)
+        steps = ((steps + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+        elapsed = self._rtp_elapsed + np.cumsum(steps)
+
+        self.gaps.update(gaps)
+        jitter = rfc3550_jitter(gaps * (rate / 1e9) - steps, self._jitter)
+        self.jitter.update(jitter * (1e9 / rate))
+        self._drift.update((arrival_ns - self._first_arrival) / 1e9, elapsed / rate)
+
+        self._jitter = float(jitter[-1])
+        self._rtp_elapsed = int(elapsed[-1])
+        self._last_arrival = int(arrival_ns[-1])
+        self._last_timestamp = int(timestamp[-1])
+
+    def add(self, sequence: int, timestamp: int, payload_type: int, arrival_ns: int,
+            size: Optional[int] = None):
+        """Add a single packet in O(1), for live sources.
+
+        Args:
+            sequence: RTP sequence number
+            timestamp: RTP timestamp
+            payload_type: RTP payload type
+            arrival_ns: Arrival time in nanoseconds
+            size: RTP payload size in bytes, if known
+        """
+        rate = self.clock_rate
+        if self._last_arrival is None:
+            self._first_arrival = arrival_ns
+        else:
+            gap = arrival_ns - self._last_arrival
+            step = timestamp - self._last_timestamp
+            step = ((step + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+            self.gaps.add(gap)
+            self._jitter += (abs(gap * (rate / 1e9) - step) - self._jitter) / 16
+            self.jitter.add(self._jitter * (1e9 / rate))
+            self._rtp_elapsed += step
+        self._drift.add((arrival_ns - self._first_arrival) / 1e9,
+                        self._rtp_elapsed / rate)
+        self._last_arrival = arrival_ns
+        self._last_timestamp = timestamp
+        if size is not None:
+            self.sizes.add(size)
+
+        last = self._last_extended
+        if last is None:
+            extended = sequence + 0x10000
+            self.payload_type = payload_type
+        else:
+            extended = last + ((sequence - last + 0x8000) & 0xFFFF) - 0x8000
+
+        highest = self._highest
+        if highest is not None and extended < highest[0]:
+            self.packets_out_of_order += 1
+        if highest is None or extended > highest[0]:
+            self._highest = (extended, timestamp, arrival_ns)
+        if self._lowest is None or extended < self._lowest[0]:
+            self._lowest = (extended, timestamp, arrival_ns)
+
+        self._last_extended = extended
+        self.packet_count += 1
+
+    def stream_info(self, stream_type: StreamType = "unknown") -> RTPStreamInfo:
+        """Build the stream statistics accumulated so far.
+
+        Args:
+            stream_type: Stream type to report
+
+        Returns:
+            Stream information and statistics
+
+        Raises:
+            ValueError: If no packet has been added
+        """
+        if not self.packet_count:
+            raise ValueError("Cannot analyze empty stream")
+
+        lowest, first_timestamp, start_ns = self._lowest
+        highest, last_timestamp, end_ns = self._highest
+        expected = highest - lowest + 1
+
+        return RTPStreamInfo(
+            ssrc=self.ssrc,
+            payload_type=self.payload_type,
+            packet_count=self.packet_count,
+            first_seq=lowest & 0xFFFF,
+            last_seq=highest & 0xFFFF,
+            first_timestamp=first_timestamp,
+            last_timestamp=last_timestamp,
+            packets_lost=max(expected - self.packet_count, 0),
+            packets_out_of_order=self.packets_out_of_order,
+            start_ns=start_ns,
+            end_ns=end_ns,
+            stream_type=stream_type,
+            has_ptp=False,
+            sequence_cycles=(highest - lowest) >> 16
+        )
+
+    def arrival_stats(self) -> ArrivalStats:
+        """Build the arrival timing statistics accumulated so far.
+
+        Matches interarrival.arrival_stats() over the same packets when
+        they were added in arrival order.
+
+        Returns:
+            Arrival statistics
+
+        Raises:
+            ValueError: If fewer than two packets have been added
+        """
+        gaps = self.gaps
+        if not gaps.count:
+            raise ValueError("At least two packets are needed for arrival statistics")
+        slope = self._drift.slope
+        return ArrivalStats(
+            clock_rate=self.clock_rate,
+            jitter_ns=self._jitter * (1e9 / self.clock_rate),
+            max_jitter_ns=self.jitter.max,
+            gap_min_ns=int(gaps.min),
+            gap_mean_ns=gaps.mean,
+            gap_max_ns=int(gaps.max),
+            gap_histogram=gaps.histogram.copy(),
+            drift_ppm=None if slope is None else (slope - 1) * 1e6,
+        )
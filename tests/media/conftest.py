@@ -0,0 +1,108 @@
+import struct
+
+import pytest
+
+
+def rtp_packet(sequence, timestamp, ssrc, payload, payload_type=97, marker=False):
+    """Build a minimal RTP packet (no CSRC, no extension)."""
+    header = struct.pack(
+        '!BBHII', 0x80, (0x80 if marker else 0) | payload_type,
+        sequence & 0xFFFF, timestamp & 0xFFFFFFFF, ssrc
+    )
+    return header + payload
+
+
+def udp_frame(udp_payload, src_ip="192.168.10.1", dst_ip="239.1.1.1",
+              sport=10000, dport=20000, vlans=()):
+    """Build an Ethernet/[802.1Q...]/IPv4/UDP frame around a UDP payload."""
+    eth = bytes.fromhex("01005e010101") + bytes.fromhex("020000000001")
+    for vlan in vlans:
+        eth += struct.pack('!HH', 0x8100, vlan)
+    eth += struct.pack('!H', 0x0800)
+
+    udp = struct.pack('!HHHH', sport, dport, 8 + len(udp_payload), 0) + udp_payload
+    ip = struct.pack(
+        '!BBHHHBBH4s4s', 0x45, 0, 20 + len(udp), 0, 0x4000, 64, 17, 0,
+        bytes(int(x) for x in src_ip.split('.')),
+        bytes(int(x) for x in dst_ip.split('.'))
+    )
+    return eth + ip + udp
+
+
+def _ticks(ts, ticks_per_second):
+    """Convert a timestamp (float seconds, or int nanoseconds) to ticks."""
+    if isinstance(ts, int):
+        return ts * ticks_per_second // 1_000_000_000
+    return int(round(ts * ticks_per_second))
+
+
+def pcap_bytes(records, nanosecond=False, linktype=1):
+    """Serialize (timestamp, frame) records into a classic pcap file.
+
+    Timestamps are float seconds, or int nanoseconds.
+    """
+    magic = 0xA1B23C4D if nanosecond else 0xA1B2C3D4
+    scale = 1_000_000_000 if nanosecond else 1_000_000
+    out = [struct.pack('<IHHiIII', magic, 2, 4, 0, 0, 65535, linktype)]
+    for ts, frame in records:
+        sec, frac = divmod(_ticks(ts, scale), scale)
+        out.append(struct.pack('<IIII', sec, frac, len(frame), len(frame)))
+        out.append(frame)
+    return b''.join(out)
+
+
+def pcapng_bytes(records, tsresol=6, linktype=1):
+    """Serialize (timestamp, frame) records into a pcapng file.
+
+    Timestamps are float seconds, or int nanoseconds.
+    """
+    def block(block_type, body):
+        body += b'\x00' * (-len(body) % 4)
+        length = 12 + len(body)
+        return struct.pack('<II', block_type, length) + body + struct.pack('<I', length)
+
+    shb = block(0x0A0D0D0A, struct.pack('<IHHq', 0x1A2B3C4D, 1, 0, -1))
+    options = struct.pack('<HHB3x', 9, 1, tsresol) + struct.pack('<HH', 0, 0)
+    idb = block(0x00000001, struct.pack('<HHI', linktype, 0, 65535) + options)
+
+    ticks_per_second = 2 ** (tsresol & 0x7F) if tsresol & 0x80 else 10 ** tsresol
+    out = [shb, idb]
+    for ts, frame in records:
+        ticks = _ticks(ts, ticks_per_second)
+        body = struct.pack('<IIIII', 0, ticks >> 32, ticks & 0xFFFFFFFF,
+                           len(frame), len(frame)) + frame
+        out.append(block(0x00000006, body))
+    return b''.join(out)
+
+
+@pytest.fixture
+def write_capture(tmp_path):
+    """Return a helper that writes (timestamp, frame) records to a capture file."""
+    def _write(records, name="capture.pcap", **kwargs):
+        path = tmp_path / name
+        if name.endswith('.pcapng'):
+            path.write_bytes(pcapng_bytes(records, **kwargs))
+        else:
+            path.write_bytes(pcap_bytes(records, **kwargs))
+        return path
+
+    return _write
+
+
+@pytest.fixture
+def rtp_capture(write_capture):
+    """Return a helper that writes a single-flow RTP capture.
+
+    The helper takes the number of packets and optional keyword arguments
+    for the flow, and returns the path of the written pcap.
+    """
+    def _write(count, ssrc=0x1234, payload_type=97, start_seq=0, payload_size=48,
+               name="rtp.pcap", interval=0.000125, **frame_kwargs):
+        records = []
+        for i in range(count):
+            payload = bytes([i & 0xFF]) * payload_size
+            pkt = rtp_packet(start_seq + i, 1000 + i * 6, ssrc, payload, payload_type)
+            records.append((1_700_000_000 + i * interval, udp_frame(pkt, **frame_kwargs)))
+        return write_capture(records, name=name)
+
+    return _write
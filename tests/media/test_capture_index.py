@@ -0,0 +1,44 @@
+"""Tests for the persistent sidecar index."""
+
+import os
+
+import numpy as np
+
+from dtk.media.capture_index import index_path, read_index
+from dtk.media.rtp_extractor import RTPStreamExtractor
+
+
+def test_index_round_trip(rtp_capture):
+    """Test that a second extraction is served from the sidecar index."""
+    path = str(rtp_capture(50, ssrc=0x77, payload_size=16))
+
+    first = RTPStreamExtractor(use_index=True)
+    first.extract_from_pcap(path)
+    assert os.path.exists(index_path(path))
+
+    second = RTPStreamExtractor(use_index=True, payload_type_override={97: "meta"})
+    second.extract_from_pcap(path)
+    store = second.streams[0x77]
+
+    assert np.array_equal(store.sequence, first.streams[0x77].sequence)
+    assert store.payload_data() == first.streams[0x77].payload_data()
+    assert np.array_equal(store.frame_bounds(), first.streams[0x77].frame_bounds())
+    assert second.stream_info[0x77].packet_count == 50
+    # Stream types follow the current overrides rather than the stored ones
+    assert second.stream_info[0x77].stream_type == "meta"
+
+
+def test_index_invalidated_by_capture_change(rtp_capture):
+    """Test that a stale index is ignored and rewritten."""
+    path = str(rtp_capture(10, ssrc=0x77))
+    RTPStreamExtractor(use_index=True).extract_from_pcap(path)
+
+    rtp_capture(12, ssrc=0x78)  # Rewrites the same file
+    extractor = RTPStreamExtractor()
+    extractor.extract_from_pcap(path)
+    assert read_index(path, extractor._capture.buffer) is None
+
+    extractor = RTPStreamExtractor(use_index=True)
+    extractor.extract_from_pcap(path)
+    assert list(extractor.streams) == [0x78]
+    assert read_index(path, extractor._capture.buffer) is not None
@@ -0,0 +1,44 @@
+"""Tests for the incremental feed()/flush() API."""
+
+from dtk.media.flow_filter import FlowFilter
+from dtk.media.rtp_extractor import RTPStreamExtractor
+from tests.media.conftest import rtp_packet, udp_frame
+
+
+def test_feed_datagrams():
+    """Test that fed datagrams update statistics and retain copied payloads."""
+    extractor = RTPStreamExtractor()
+    buffer = bytearray(64)
+    for i, seq in enumerate([10, 11, 13, 12, 14]):
+        datagram = rtp_packet(seq, seq * 6, 0x9, bytes([seq]) * 20, marker=seq == 14)
+        buffer[:len(datagram)] = datagram  # Reused receive buffer
+        received = memoryview(buffer)[:len(datagram)]
+        assert extractor.feed(received, 1_000_000_000 + i * 1000)
+    assert not extractor.feed(b'\x00' * 20, 0)  # Not RTP
+
+    info = extractor.flush()[0x9]
+    assert info.packet_count == 5
+    assert info.packets_lost == 0
+    assert info.packets_out_of_order == 1
+    assert info.start_time == 1.0
+
+    store = extractor.streams[0x9]
+    assert store.sequence.tolist() == [10, 11, 12, 13, 14]
+    assert store.payload_data() == b''.join(bytes([s]) * 20 for s in range(10, 15))
+
+
+def test_feed_raw_frames_with_filter():
+    """Test raw frame parsing and address filtering in header-only mode."""
+    extractor = RTPStreamExtractor(
+        header_only=True,
+        flow_filter=FlowFilter(destinations={("239.1.1.2", 20000)})
+    )
+    for i in range(6):
+        dst = "239.1.1.2" if i % 2 else "239.1.1.1"
+        packet = rtp_packet(i, 0, 0x100 + i % 2, b'x' * 10)
+        frame = udp_frame(packet, dst_ip=dst, vlans=(7,))
+        extractor.feed(frame, i, linktype=1)
+
+    assert list(extractor.flush()) == [0x101]
+    assert extractor.stream_info[0x101].packet_count == 3
+    assert extractor.streams == {}
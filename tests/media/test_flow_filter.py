@@ -0,0 +1,80 @@
+"""Tests for flow filter pushdown during extraction."""
+
+import pytest
+
+from dtk.media.flow_filter import FlowFilter, parse_destination
+from dtk.media.rtp_extractor import RTPStreamExtractor
+from tests.media.conftest import rtp_packet, udp_frame
+
+
+@pytest.fixture
+def mixed_capture(write_capture):
+    """Interleaved video (PT 96, VLAN 10) and audio (PT 97, untagged) flows."""
+    records = []
+    for i in range(40):
+        if i % 4:
+            frame = udp_frame(rtp_packet(i, i, 0x1DE0, b'v' * 100, 96),
+                              dst_ip="239.1.1.1", dport=20000, vlans=(10,))
+        else:
+            frame = udp_frame(rtp_packet(i, i, 0xA0D1, b'a' * 24, 97),
+                              dst_ip="239.1.1.2", dport=20002)
+        records.append((1.0 + i * 0.001, frame))
+    return str(write_capture(records))
+
+
+@pytest.mark.parametrize("flow_filter", [
+    FlowFilter(ssrcs={0xA0D1}),
+    FlowFilter(payload_types={97}),
+    FlowFilter(destinations={("239.1.1.2", None)}),
+    FlowFilter(destinations={("239.1.1.2", 20002), ("239.1.1.1", 5004)}),
+    FlowFilter(vlans={-1}),
+    FlowFilter(stream_types={"audio"}),
+])
+def test_filter_keeps_only_matching_flow(mixed_capture, flow_filter):
+    """Test that each criterion selects the audio flow only."""
+    extractor = RTPStreamExtractor(flow_filter=flow_filter)
+    extractor.extract_from_pcap(mixed_capture)
+
+    assert list(extractor.streams) == [0xA0D1]
+    assert extractor.stream_info[0xA0D1].packet_count == 10
+    # Right whether the filter ran before or after the address lookup
+    assert [(flow.dst_ip, flow.dst_port) for flow in extractor.flows] == [
+        ("239.1.1.2", 20002)]
+
+
+def test_filter_in_parallel_workers(mixed_capture):
+    """Test that the filter and stream type overrides reach worker processes."""
+    extractor = RTPStreamExtractor(
+        workers=2,
+        stream_type_override={0x1DE0: "audio"},
+        flow_filter=FlowFilter(stream_types={"audio"}, vlans={10})
+    )
+    extractor.extract_from_pcap(mixed_capture)
+    assert list(extractor.streams) == [0x1DE0]
+
+
+def test_filter_applied_to_index(mixed_capture):
+    """Test that filters use the index and filtered scans do not write one."""
+    filtered = RTPStreamExtractor(use_index=True, flow_filter=FlowFilter(ssrcs={0x1DE0}))
+    filtered.extract_from_pcap(mixed_capture)
+    assert list(filtered.streams) == [0x1DE0]
+
+    full = RTPStreamExtractor(use_index=True)
+    full.extract_from_pcap(mixed_capture)  # Writes the index
+    assert sorted(full.streams) == [0x1DE0, 0xA0D1]
+
+    indexed = RTPStreamExtractor(use_index=True,
+                                 flow_filter=FlowFilter(payload_types={97}))
+    indexed.extract_from_pcap(mixed_capture)
+    assert list(indexed.streams) == [0xA0D1]
+    assert indexed.stream_info[0xA0D1].packet_count == 10
+
+
+def test_parse_destination():
+    """Test IP[:PORT] parsing for IPv4 and IPv6."""
+    assert parse_destination("239.1.1.1:5004") == ("239.1.1.1", 5004)
+    assert parse_destination("239.1.1.1") == ("239.1.1.1", None)
+    assert parse_destination("[ff0e::1]:5004") == ("ff0e::1", 5004)
+    assert parse_destination("ff0e::1") == ("ff0e::1", None)
+    with pytest.raises(ValueError):
+        parse_destination("239.1.1.1:70000")
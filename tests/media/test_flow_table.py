@@ -0,0 +1,125 @@
+"""Tests for flow identification by addresses, port, SSRC and VLAN."""
+
+import numpy as np
+import pytest
+
+from dtk.media import flow_table
+from dtk.media.flow_filter import FlowFilter, ip_key
+from dtk.media.flow_table import FlowKey, FlowTable
+from dtk.media.rtp_extractor import RTPStreamExtractor
+from tests.media.conftest import rtp_packet, udp_frame
+
+RED = FlowKey("10.0.0.1", "239.1.1.1", 20000, 0x2022, 10)
+BLUE = FlowKey("10.0.1.1", "239.1.2.1", 20000, 0x2022, 20)
+
+
+@pytest.fixture
+def redundant_capture(write_capture):
+    """ST 2022-7 style capture: two legs sharing one SSRC, blue missing packets."""
+    records = []
+    for i in range(50):
+        packet = rtp_packet(i, i * 10, 0x2022, bytes([i]) * 30, 96)
+        for leg in (RED, BLUE):
+            if leg is BLUE and i % 10 == 3:
+                continue
+            frame = udp_frame(packet, src_ip=leg.src_ip, dst_ip=leg.dst_ip,
+                              dport=leg.dst_port, vlans=(leg.vlan,))
+            records.append((1.0 + i * 0.001, frame))
+    return str(write_capture(records))
+
+
+def headers_for(keys):
+    """Build flow key columns for a list of FlowKeys."""
+    return {
+        'src_ip': np.array([ip_key(k.src_ip) for k in keys], dtype='V16'),
+        'dst_ip': np.array([ip_key(k.dst_ip) for k in keys], dtype='V16'),
+        'dst_port': np.array([k.dst_port for k in keys], dtype=np.uint16),
+        'ssrc': np.array([k.ssrc for k in keys], dtype=np.uint32),
+        'vlan': np.array([k.vlan for k in keys], dtype=np.int32),
+    }
+
+
+@pytest.mark.parametrize("multiplier", [flow_table._HASH_MULTIPLIER, np.uint64(0)])
+def test_flow_ids_across_batches(monkeypatch, multiplier):
+    """Test that IDs follow first appearance and stay stable, even on collisions."""
+    monkeypatch.setattr(flow_table, '_HASH_MULTIPLIER', multiplier)
+    keys = [FlowKey(f"10.0.{i // 250}.{i % 250}", "239.1.1.1", 20000 + i % 3, i % 7,
+                    i % 2 - 1)
+            for i in range(2000)]
+    table = FlowTable()
+
+    assert table.flow_ids(headers_for(keys[:1000] * 2)).tolist() == list(range(1000)) * 2
+    order = [keys[1500], keys[3], keys[1999], keys[3]]
+    assert table.flow_ids(headers_for(order)).tolist() == [1000, 3, 1001, 3]
+    assert table.keys[1000] == keys[1500]
+    assert len(table) == 1002
+
+    # The single-packet path shares the same IDs
+    key = keys[1999]
+    assert table.flow_id(ip_key(key.src_ip), ip_key(key.dst_ip), key.dst_port,
+                         key.ssrc, key.vlan) == 1001
+
+
+def test_legs_sharing_ssrc_stay_apart(redundant_capture):
+    """Test that flows with one SSRC on different groups are extracted separately."""
+    extractor = RTPStreamExtractor()
+    extractor.extract_from_pcap(redundant_capture)
+
+    assert list(extractor.flows) == [RED, BLUE]
+    assert [flow for flow, _ in extractor.list_flows()] == [RED, BLUE]
+    assert extractor.flow_info[RED].packets_lost == 0
+    assert extractor.flow_info[BLUE].packet_count == 45
+    assert extractor.flow_info[BLUE].packets_lost == 5
+    assert extractor.flows[BLUE].payload_data() == b''.join(
+        bytes([i]) * 30 for i in range(50) if i % 10 != 3)
+
+    # The per-SSRC view keeps the first flow
+    assert extractor.streams[0x2022] is extractor.flows[RED]
+    assert extractor.stream_info[0x2022] is extractor.flow_info[RED]
+
+
+@pytest.mark.parametrize("flow_filter", [
+    FlowFilter(sources={"10.0.1.1"}),
+    FlowFilter(destinations={("239.1.2.1", 20000)}),
+    FlowFilter(vlans={20}),
+])
+@pytest.mark.parametrize("use_index", [False, True])
+def test_select_one_leg(redundant_capture, flow_filter, use_index):
+    """Test selecting a leg by address or VLAN, from a scan and from the index."""
+    if use_index:
+        RTPStreamExtractor(use_index=True).extract_from_pcap(redundant_capture)
+
+    extractor = RTPStreamExtractor(use_index=use_index, flow_filter=flow_filter)
+    extractor.extract_from_pcap(redundant_capture)
+
+    assert list(extractor.flows) == [BLUE]
+    assert extractor.stream_info[0x2022].packet_count == 45
+
+
+def test_parallel_and_header_only_keep_flows(redundant_capture):
+    """Test that sharded and header-only extraction group packets by flow too."""
+    parallel = RTPStreamExtractor(workers=2)
+    parallel.extract_from_pcap(redundant_capture)
+    assert list(parallel.flows) == [RED, BLUE]
+    assert parallel.flows[BLUE].sequence.tolist() == [i for i in range(50) if i % 10 != 3]
+
+    header_only = RTPStreamExtractor(header_only=True)
+    header_only.extract_from_pcap(redundant_capture)
+    assert header_only.flows == {}
+    assert header_only.flow_info[BLUE].packets_lost == 5
+
+
+def test_feed_raw_frames_by_flow():
+    """Test that fed frames are grouped by flow."""
+    extractor = RTPStreamExtractor()
+    for i in range(4):
+        leg = RED if i % 2 else BLUE
+        frame = udp_frame(rtp_packet(i // 2, 0, leg.ssrc, b'x' * 8), src_ip=leg.src_ip,
+                          dst_ip=leg.dst_ip, dport=leg.dst_port, vlans=(leg.vlan,))
+        extractor.feed(frame, i, linktype=1)
+    extractor.feed(rtp_packet(0, 0, 0x2022, b'x' * 8), 5)  # Datagram: no addresses
+
+    extractor.flush()
+    assert list(extractor.flow_info) == [BLUE, RED, FlowKey("", "", 0, 0x2022, -1)]
+    assert extractor.flows[RED].sequence.tolist() == [0, 1]
+    assert extractor.streams[0x2022] is extractor.flows[BLUE]
@@ -0,0 +1,39 @@
+"""Tests for following a capture file that is still being written."""
+
+import pytest
+
+from dtk.media.rtp_extractor import RTPStreamExtractor
+from tests.media.conftest import pcap_bytes, pcapng_bytes, rtp_packet, udp_frame
+
+
+def _records(start, count):
+    return [(5.0 + i * 0.001, udp_frame(rtp_packet(i, i * 6, 0x31, b'x' * 12)))
+            for i in range(start, start + count)]
+
+
+@pytest.mark.parametrize("writer", [pcap_bytes, pcapng_bytes])
+def test_follow_reads_only_appended_records(tmp_path, writer):
+    """Test that appended and partially written records are picked up incrementally."""
+    data = writer(_records(0, 30))
+    first_part = writer(_records(0, 10))
+    path = tmp_path / "growing.cap"
+    # Start with ten complete records and half of the eleventh
+    cut = len(first_part) + 20
+    path.write_bytes(data[:cut])
+
+    extractor = RTPStreamExtractor()
+    updates = extractor.follow_pcap(str(path), interval=0, idle_timeout=0)
+
+    info = next(updates)[0x31]
+    assert info.packet_count == 10
+
+    with open(path, 'ab') as f:
+        f.write(data[cut:])
+    info = next(updates)[0x31]
+    assert info.packet_count == 30
+    assert info.last_seq == 29
+    assert info.packets_lost == 0
+    assert info.packets_out_of_order == 0
+
+    # No growth: the generator stops once idle_timeout is reached
+    assert list(updates) == []
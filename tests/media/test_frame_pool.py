@@ -0,0 +1,25 @@
+"""Tests for the reusable frame buffer pool."""
+
+import numpy as np
+import pytest
+
+from dtk.media.frame_pool import FramePool
+
+
+def test_pool_recycles_released_buffers():
+    """Test that released buffers are handed out again, up to the pool depth."""
+    pool = FramePool((4, 6, 3), depth=2)
+    first, second, third = pool.acquire(), pool.acquire(), pool.acquire()
+    assert pool.allocated == 3 and first.shape == (4, 6, 3) and first.dtype == np.uint8
+
+    for buffer in (first, second, third, third):
+        pool.release(buffer)
+    assert len(pool) == 2  # Beyond the depth, released buffers are dropped
+    assert {id(pool.acquire()), id(pool.acquire())} == {id(first), id(second)}
+    pool.acquire()
+    assert pool.allocated == 4
+
+    with pytest.raises(ValueError):
+        pool.release(np.empty((4, 6, 3), dtype=np.uint16))
+    with pytest.raises(ValueError):
+        FramePool((1,), depth=-1)
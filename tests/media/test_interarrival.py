@@ -0,0 +1,92 @@
+"""Tests for RTP arrival statistics: jitter, gaps and drift."""
+
+import numpy as np
+import pytest
+
+from dtk.media.flow_table import FlowKey
+from dtk.media.interarrival import GAP_BUCKETS, arrival_stats, rfc3550_jitter
+from dtk.media.packet_store import RTPPacketStore
+from dtk.media.rtp_extractor import RTPStreamExtractor
+from tests.media.conftest import rtp_packet, udp_frame
+
+
+def stream_store(timestamps, arrival_ns):
+    """Store of one stream with the given RTP timestamps and arrival times."""
+    count = len(timestamps)
+    store = RTPPacketStore(0x1234, b'', capacity=count)
+    store.extend(
+        np.arange(count).astype(np.uint16),
+        np.asarray(timestamps).astype(np.uint32),
+        np.zeros(count, dtype=bool),
+        np.full(count, 97, dtype=np.uint8),
+        np.asarray(arrival_ns, dtype=np.int64),
+        np.zeros(count, dtype=np.int64),
+        np.zeros(count, dtype=np.uint32),
+    )
+    return store
+
+
+def test_jitter_matches_rfc3550_recursion():
+    """Test that the vectorized jitter equals the RFC 3550 per-packet recursion."""
+    rng = np.random.default_rng(3)
+    deltas = rng.normal(0, 50, 5000)
+    deltas[1000:1010] = 10_000  # A burst the estimate has to decay from
+
+    expected = []
+    jitter = 0.0
+    for delta in deltas:
+        jitter += (abs(delta) - jitter) / 16
+        expected.append(jitter)
+
+    assert np.allclose(rfc3550_jitter(deltas), expected, rtol=1e-12, atol=1e-9)
+    assert len(rfc3550_jitter(deltas[:3])) == 3
+
+
+def test_gap_histogram_and_jitter_in_nanoseconds():
+    """Test that gaps are bucketed by power of two and jitter reported in ns."""
+    # 48 kHz audio, 1 ms packets of 48 samples; every other packet arrives 100 us late
+    count = 1001
+    arrival = np.arange(count, dtype=np.int64) * 1_000_000
+    arrival[1::2] += 100_000
+    stats = arrival_stats(stream_store(np.arange(count) * 48, arrival), 48000)
+
+    assert (stats.gap_min_ns, stats.gap_max_ns) == (900_000, 1_100_000)
+    assert stats.gap_histogram.sum() == count - 1
+    assert len(stats.gap_histogram) == GAP_BUCKETS
+    assert list(stats.gap_buckets()) == [(524288, 1048575, 500), (1048576, 2097151, 500)]
+    # |D| is 100 us for every packet: the estimate converges to it
+    assert stats.jitter_ns == pytest.approx(100_000, rel=1e-6)
+    assert stats.as_dict()['gap_histogram'][0] == [524288, 1048575, 500]
+
+
+def test_drift_against_capture_clock():
+    """Test that an RTP clock running 100 ppm fast is measured across a timestamp wrap."""
+    count = 10000
+    arrival = np.arange(count, dtype=np.int64) * 1_000_000
+    ticks = np.round(np.arange(count) * 90 * 1.0001)
+    timestamps = (2 ** 32 - 5000 + ticks).astype(np.int64)
+    stats = arrival_stats(stream_store(timestamps % 2 ** 32, arrival), 90000)
+
+    assert stats.drift_ppm == pytest.approx(100, abs=0.1)
+    assert stats.jitter_ns < 10_000
+
+    with pytest.raises(ValueError):
+        arrival_stats(stream_store([0], [0]))
+
+
+def test_extractor_arrival_stats(write_capture):
+    """Test that extracted flows get statistics at their stream type's clock rate."""
+    records = [(1_000_000 * i, udp_frame(rtp_packet(i, i * 48, 0x30, b'x' * 48, 97)))
+               for i in range(100)]
+    extractor = RTPStreamExtractor(payload_type_override={97: 'audio'})
+    extractor.extract_from_pcap(str(write_capture(records, nanosecond=True)))
+
+    flow, info = extractor.list_flows()[0]
+    stats = extractor.get_arrival_stats(flow)
+    assert stats.clock_rate == 48000
+    assert stats.gap_mean_ns == 1_000_000
+    assert stats.drift_ppm == pytest.approx(0, abs=1e-6)
+    assert extractor.get_arrival_stats(flow, clock_rate=90000).clock_rate == 90000
+
+    with pytest.raises(ValueError):
+        extractor.get_arrival_stats(FlowKey("10.0.0.1", "239.1.1.1", 5004, 0x30, -1))
@@ -0,0 +1,90 @@
+"""Tests for media latency measurement."""
+
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from dtk.media.latency import analyze_latency, media_latency
+from dtk.media.packet_store import RTPPacketStore
+from dtk.media.ptp import PTPTimeMap
+
+LEAP_NS = 37_000_000_000
+# PTP time of the first packet's media instant: a multiple of both clock periods
+ORIGIN = 1_700_000_037 * 10 ** 9
+
+
+def stream_store(timestamps, ptp_ns):
+    """Store of one stream, arrival times given in PTP time."""
+    count = len(timestamps)
+    store = RTPPacketStore(0x1234, b'', capacity=count)
+    store.extend(
+        np.arange(count).astype(np.uint16),
+        np.asarray(timestamps, dtype=np.int64).astype(np.uint32),
+        np.zeros(count, dtype=bool),
+        np.full(count, 97, dtype=np.uint8),
+        np.asarray(ptp_ns, dtype=np.int64) - LEAP_NS,  # Capture clock on UTC
+        np.zeros(count, dtype=np.int64),
+        np.zeros(count, dtype=np.uint32),
+    )
+    return store
+
+
+def test_media_latency_is_exact_across_wrap():
+    """Test that latencies match exact rational arithmetic, around the 2^32 wrap."""
+    rng = np.random.default_rng(7)
+    for clock_rate in (90000, 48000):
+        wrap = ORIGIN * clock_rate // 10 ** 9 >> 32 << 32  # A wrap of the RTP clock
+        ticks = [wrap + int(t) for t in rng.integers(-10 ** 6, 10 ** 6, 1000)]
+        latency = rng.integers(-5_000_000, 50_000_000, 1000).tolist()
+        times = [-(-t * 10 ** 9 // clock_rate) + d for t, d in zip(ticks, latency)]
+        expected = [time - Fraction(t * 10 ** 9, clock_rate)
+                    for time, t in zip(times, ticks)]
+
+        result = media_latency(np.array(times), np.array(ticks) % 2 ** 32, clock_rate)
+        assert max(abs(r - float(e)) for r, e in zip(result.tolist(), expected)) < 1e-3
+
+
+def test_audio_latency_statistics():
+    """Test the summary of a 48 kHz stream arriving 1 ms after its media time."""
+    count = 2000
+    timestamps = ORIGIN * 48 // 10 ** 6 + np.arange(count) * 48
+    times = ORIGIN + np.arange(count) * 1_000_000 + 1_000_000
+    report = analyze_latency(stream_store(timestamps, times), clock_rate=48000)
+
+    assert not report.ptp
+    assert report.min_ns == report.max_ns == pytest.approx(1_000_000)
+    assert report.percentiles[50.0] == pytest.approx(1_000_000)
+    assert len(report.frame_latency_ns) == count  # One timestamp per packet
+    assert len(report.outliers) == 0
+
+
+def test_late_frames_are_outliers_and_ptp_is_used():
+    """Test that frames arriving late are flagged, with times mapped through PTP."""
+    frames, packets = 50, 100
+    ticks = np.arange(frames) * 3003 // 2  # 59.94 Hz
+    frame_timestamps = ORIGIN * 9 // 10 ** 5 + ticks
+    first = ORIGIN - (-ticks * 10 ** 5 // 9)  # Media time of each frame
+    rng = np.random.default_rng(2)
+    offset = 500_000 + rng.integers(0, 2000, frames)  # About 500 us, a little jitter
+    offset[[7, 31]] += 300_000
+    times = (first + offset)[:, None] + np.arange(packets) * 150_000
+
+    store = stream_store(np.repeat(frame_timestamps, packets), times.reshape(-1) - 4000)
+    # PTP runs 4 us ahead of the capture clock's UTC + leap seconds
+    store.time_map = PTPTimeMap(np.array([store.arrival_ns[0]]),
+                                np.array([store.arrival_ns[0] + LEAP_NS + 4000]))
+    report = analyze_latency(store)
+
+    assert report.ptp
+    assert len(report.frame_bounds) == frames + 1
+    assert report.outliers.tolist() == [7, 31]
+    assert report.median_frame_latency_ns == pytest.approx(501_000, abs=1500)
+    assert report.max_ns == pytest.approx(report.frame_latency_ns.max() + 99 * 150_000,
+                                          abs=20)
+
+
+def test_empty_stream():
+    """Test that a stream without packets is rejected."""
+    with pytest.raises(ValueError):
+        analyze_latency(stream_store([], []))
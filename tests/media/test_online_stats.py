@@ -0,0 +1,52 @@
+"""Tests for constant-memory running statistics."""
+
+import numpy as np
+import pytest
+
+from dtk.media.online_stats import (
+    LOG_BUCKETS, RunningRegression, RunningStats, log_buckets
+)
+
+
+def test_running_stats_batches_and_single_values():
+    """Test that batched and single updates give the exact moments and histogram."""
+    rng = np.random.default_rng(11)
+    values = rng.lognormal(8, 2, 10000)
+    values[:3] = [0, 0.5, 1]
+
+    batched = RunningStats()
+    for chunk in np.array_split(values, 7):
+        batched.update(chunk)
+    single = RunningStats()
+    for value in values.tolist():
+        single.add(value)
+
+    expected = np.bincount(log_buckets(values), minlength=LOG_BUCKETS)
+    for stats in (batched, single):
+        assert stats.count == len(values)
+        assert stats.mean == pytest.approx(values.mean(), rel=1e-12)
+        assert stats.std == pytest.approx(values.std(), rel=1e-9)
+        assert (stats.min, stats.max) == (values.min(), values.max())
+        assert stats.histogram.tolist() == expected.tolist()
+    assert list(batched.buckets())[:2] == [(0, 0, 2), (1, 1, 1)]
+
+
+def test_log_buckets_bounds():
+    """Test the edges of the power-of-two buckets."""
+    values = np.array([-5, 0, 0.99, 1, 2, 3, 4, 1023, 1024, 2.0 ** 70])
+    assert log_buckets(values).tolist() == [0, 0, 0, 1, 2, 2, 3, 10, 11, LOG_BUCKETS - 1]
+
+
+def test_running_regression_slope():
+    """Test that the running fit matches a least squares fit over all points."""
+    rng = np.random.default_rng(4)
+    x = np.cumsum(rng.uniform(0, 1, 5000))
+    y = 1.0001 * x + rng.normal(0, 0.01, 5000)
+
+    fit = RunningRegression()
+    fit.add(float(x[0]), float(y[0]))
+    for chunk in np.array_split(np.arange(1, 5000), 9):
+        fit.update(x[chunk], y[chunk])
+
+    assert fit.slope == pytest.approx(np.polyfit(x, y, 1)[0], rel=1e-12)
+    assert RunningRegression().slope is None
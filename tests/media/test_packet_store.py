@@ -0,0 +1,102 @@
+"""Tests for the columnar RTP packet store."""
+
+import numpy as np
+
+from dtk.media.packet_store import RTPPacketStore
+from dtk.media.rtp_extractor import RTPStreamExtractor
+
+
+def _store(sequences, buffer=b'abcdefghij'):
+    store = RTPPacketStore(0x99, buffer, capacity=2)
+    for i, seq in enumerate(sequences):
+        store.append(seq, seq * 10, i == len(sequences) - 1, 97, i, i, 1)
+    return store
+
+
+def test_append_grows_columns():
+    """Test that appending past the initial capacity keeps every packet."""
+    store = _store(range(7))
+    assert len(store) == 7
+    assert store.capacity >= 7
+    assert store.sequence.tolist() == list(range(7))
+    assert store.timestamp.dtype == np.uint32
+    assert store.marker.tolist() == [False] * 6 + [True]
+
+
+def test_compatibility_view():
+    """Test that iterating yields RTPPacketInfo with payload views."""
+    store = _store([5, 6, 7])
+    packets = list(store)
+
+    assert [p.sequence for p in packets] == [5, 6, 7]
+    assert all(p.ssrc == 0x99 for p in packets)
+    assert [bytes(p.payload) for p in packets] == [b'a', b'b', b'c']
+    assert store[-1].marker
+    assert [p.sequence for p in store[1:]] == [6, 7]
+    assert store.payload_data() == b'abc'
+
+    # The packet class is still importable from its original module
+    from dtk.media.rtp_extractor import RTPPacketInfo
+    assert all(isinstance(p, RTPPacketInfo) for p in packets)
+
+
+def test_sort_by_sequence():
+    """Test that sorting permutes every column together."""
+    store = _store([3, 1, 2])
+    store.sort_by_sequence()
+
+    assert store.sequence.tolist() == [1, 2, 3]
+    assert store.timestamp.tolist() == [10, 20, 30]
+    assert store.payload_data() == b'bca'
+
+
+def test_sort_in_order_store_keeps_columns():
+    """Test that sorting leaves in-order packets in place and resorts after appends."""
+    store = _store([1, 2, 3])
+    columns = dict(store._columns)
+    store.sort_by_sequence()
+    store.sort_by_sequence()
+    assert all(store._columns[name] is column for name, column in columns.items())
+
+    store.append(0, 0, False, 97, 3, 3, 1)  # Late packet
+    store.sort_by_sequence()
+    assert store.sequence.tolist() == [0, 1, 2, 3]
+    assert store.payload_data() == b'dabc'
+
+
+def test_analyze_stream_counts_loss_and_reordering():
+    """Test vectorized loss and out-of-order counting."""
+    store = _store([0, 1, 3, 2, 6])  # 4 and 5 missing, 3 arrives before 2
+    store.sort_by_sequence()
+
+    info = RTPStreamExtractor()._analyze_stream(store)
+    assert info.packet_count == 5
+    assert info.first_seq == 0
+    assert info.last_seq == 6
+    assert info.packets_lost == 2
+    assert info.packets_out_of_order == 1
+
+
+def test_frame_bounds():
+    """Test marker-delimited frame boundaries, including a trailing partial frame."""
+    store = RTPPacketStore(0x99, b'abcde')
+    for i, marker in enumerate([False, True, False, True, False]):
+        store.append(i, 0, marker, 96, i, i, 1)
+
+    assert store.frame_bounds().tolist() == [0, 2, 4, 5]
+    assert store.payload_data(2, 4) == b'cd'
+
+    store.append(5, 0, True, 96, 5, 4, 1)
+    assert store.frame_bounds().tolist() == [0, 2, 4, 6]
+
+
+def test_owned_buffer_grows_and_keeps_views():
+    """Test that owned payload buffers grow while earlier views stay valid."""
+    store = RTPPacketStore(0x99)
+    store.append_packet(0, 0, False, 96, 0, b'a' * 40000)
+    first = store.payload(0)
+    store.append_packet(1, 0, True, 96, 0, b'b' * 40000)
+
+    assert bytes(first) == b'a' * 40000
+    assert store.payload_data() == b'a' * 40000 + b'b' * 40000
+    assert len(store.buffer) >= 80000
@@ -0,0 +1,131 @@
+"""Tests for the raw pcap/pcapng reader and UDP header fast path."""
+
+import pytest
+
+from dtk.media.pcap_reader import (
+    CaptureReader,
+    PcapFormatError,
+    NEEDS_DISSECTION,
+    udp_payload_bounds,
+)
+from dtk.media.rtp_extractor import RTPStreamExtractor
+from tests.media.conftest import rtp_packet, udp_frame
+
+
+def test_read_pcap_records(write_capture):
+    """Test that classic pcap records are read with their timestamps."""
+    frames = [udp_frame(b'abc'), udp_frame(b'defgh')]
+    path = write_capture([(10.5, frames[0]), (11.25, frames[1])])
+
+    with CaptureReader(str(path)) as reader:
+        records = list(reader)
+
+    assert reader.format == 'pcap'
+    assert [r[2] for r in records] == frames
+    assert [r[1] for r in records] == [1, 1]
+    assert records[0][0] == 10_500_000_000
+    assert records[1][0] == 11_250_000_000
+
+
+@pytest.mark.parametrize("tsresol, resolution_ns", [(9, 1), (6, 1000), (0x80 | 30, 1)])
+def test_read_pcapng_records(write_capture, tsresol, resolution_ns):
+    """Test that pcapng timestamps are exact nanoseconds at the interface resolution."""
+    frames = [udp_frame(b'abc'), udp_frame(b'xyz')]
+    timestamps = [1_700_000_000_123_456_789, 1_700_000_000_123_457_001]
+    path = write_capture(list(zip(timestamps, frames)), name="capture.pcapng",
+                         tsresol=tsresol)
+
+    with CaptureReader(str(path)) as reader:
+        records = list(reader)
+
+    assert reader.format == 'pcapng'
+    assert [r[2] for r in records] == frames
+    for record, ts in zip(records, timestamps):
+        assert isinstance(record[0], int)
+        assert ts - resolution_ns <= record[0] <= ts
+
+
+def test_reject_non_capture(tmp_path):
+    """Test that arbitrary files are rejected."""
+    path = tmp_path / "not_a_capture.pcap"
+    path.write_bytes(b'hello world')
+    with pytest.raises(PcapFormatError):
+        CaptureReader(str(path))
+
+
+def test_udp_payload_bounds_vlan():
+    """Test that UDP payloads are located behind 802.1Q and QinQ tags."""
+    for vlans in ((), (100,), (100, 200)):
+        frame = udp_frame(b'payload', vlans=vlans)
+        start, end = udp_payload_bounds(frame, 1)
+        assert frame[start:end] == b'payload'
+
+
+def test_udp_payload_bounds_ignores_ethernet_padding():
+    """Test that Ethernet trailer padding is not returned as payload."""
+    frame = udp_frame(b'xy') + b'\x00' * 16
+    start, end = udp_payload_bounds(frame, 1)
+    assert frame[start:end] == b'xy'
+
+
+def test_udp_payload_bounds_non_udp():
+    """Test that non-UDP and unknown encapsulations are reported."""
+    frame = bytearray(udp_frame(b'payload'))
+    frame[14 + 9] = 6  # TCP
+    assert udp_payload_bounds(bytes(frame), 1) is None
+
+    frame[14 + 9] = 47  # GRE
+    assert udp_payload_bounds(bytes(frame), 1) is NEEDS_DISSECTION
+    assert udp_payload_bounds(b'\x00' * 64, 147) is NEEDS_DISSECTION
+
+
+def test_dissected_payload_offset_with_repeated_bytes():
+    """Test that the Scapy fallback locates zero-filled payloads by header lengths."""
+    inner = udp_frame(rtp_packet(1, 90, 0xABCD, bytes(64), 96))[14:]
+    gre = b'\x00\x00\x08\x00' + inner
+    outer = bytearray(udp_frame(b'')[:34])
+    outer[14 + 2:14 + 4] = (20 + len(gre)).to_bytes(2, 'big')
+    outer[14 + 9] = 47  # GRE
+    frame = bytes(outer) + gre + bytes(16)  # Ethernet trailer padding
+
+    start, end, ip_offset, vlan = RTPStreamExtractor._dissect_udp_payload(
+        memoryview(frame), 1)
+    assert (start, end) == (14 + 20 + 4 + 28, 14 + 20 + 4 + 28 + 12 + 64)
+    assert frame[start:end] == inner[28:]
+    assert (ip_offset, vlan) == (14 + 20 + 4, -1)
+
+
+def test_extract_matches_header_fields(write_capture):
+    """Test that the fast path extracts RTP fields from each record."""
+    records = [
+        (100.0 + i * 0.001, udp_frame(rtp_packet(i, 90 * i, 0xABCD, bytes([i]) * 10, 96),
+                                      vlans=(10,)))
+        for i in range(5)
+    ]
+    path = write_capture(records)
+
+    extractor = RTPStreamExtractor()
+    streams = extractor.extract_from_pcap(str(path))
+
+    assert list(streams) == [0xABCD]
+    packets = streams[0xABCD]
+    assert [p.sequence for p in packets] == list(range(5))
+    assert [p.timestamp for p in packets] == [90 * i for i in range(5)]
+    assert [bytes(p.payload) for p in packets] == [bytes([i]) * 10 for i in range(5)]
+    assert extractor.stream_info[0xABCD].stream_type == "video"
+
+
+def test_payloads_are_views_into_capture(rtp_capture):
+    """Test that payloads reference the mapped capture and survive close()."""
+    path = rtp_capture(10, ssrc=0x42, payload_size=32)
+
+    extractor = RTPStreamExtractor()
+    extractor.extract_from_pcap(str(path))
+    packets = extractor.streams[0x42]
+
+    assert all(isinstance(p.payload, memoryview) for p in packets)
+    expected = b''.join(bytes([i]) * 32 for i in range(10))
+    assert extractor.get_payload_data(0x42) == expected
+
+    extractor.close()
+    assert b''.join(p.payload for p in packets) == expected
@@ -0,0 +1,114 @@
+"""Tests for mapping arrival times to PTP time."""
+
+import struct
+
+import numpy as np
+import pytest
+
+from dtk.media.pcap_reader import CaptureReader
+from dtk.media.ptp import PTP_FOLLOW_UP, PTP_SYNC, PTPTimeMap
+from dtk.media.rtp_extractor import RTPStreamExtractor
+from tests.media.conftest import rtp_packet, udp_frame
+
+# PTP runs 37 s ahead of the capture clock, which drifts by 100 ppm
+TAI_OFFSET = 37_000_000_000
+START = 1_700_000_000_000_000_000
+MASTER = bytes.fromhex("08028efffe9b97a5") + b'\x00\x01'
+
+
+def ptp_time(arrival_ns):
+    """PTP time at which a Sync arriving at arrival_ns was sent."""
+    return arrival_ns + TAI_OFFSET + (arrival_ns - START) // 10_000
+
+
+def ptp_message(kind, sequence_id, timestamp_ns, two_step=False, correction_ns=0,
+                domain=127, port=MASTER):
+    """Build a PTPv2 Sync or Follow_Up message."""
+    seconds, nanoseconds = divmod(timestamp_ns, 1_000_000_000)
+    return struct.pack(
+        '!BBHBxHq4x10sHBbHIL', kind, 2, 44, domain, 0x0200 if two_step else 0,
+        correction_ns << 16, port, sequence_id, 0, 0, seconds >> 32,
+        seconds & 0xFFFFFFFF, nanoseconds
+    )
+
+
+def ptp_over_ethernet(message):
+    """Wrap a PTP message in an Ethernet frame (EtherType 0x88F7)."""
+    header = bytes.fromhex("011b19000000") + bytes.fromhex("020000000002") + b'\x88\xf7'
+    return header + message
+
+
+def sync_records(count, interval_ns=125_000_000, **kwargs):
+    """Two-step Sync/Follow_Up records over UDP, starting at START."""
+    records = []
+    for i in range(count):
+        arrival = START + i * interval_ns
+        # Half the precise time goes in each correction field
+        sync = ptp_message(PTP_SYNC, i, 0, True, 500, **kwargs)
+        follow_up = ptp_message(PTP_FOLLOW_UP, i, ptp_time(arrival) - 1000,
+                                correction_ns=500, **kwargs)
+        records.append((arrival, udp_frame(sync, dport=319)))
+        records.append((arrival + 20_000, udp_frame(follow_up, dport=320)))
+    return records
+
+
+def test_map_two_step_and_one_step_syncs(write_capture):
+    """Test that both Sync forms are decoded and arrival times interpolated."""
+    records = sync_records(4)
+    one_step = START + 10 * 125_000_000
+    sync = ptp_message(PTP_SYNC, 10, ptp_time(one_step))
+    records.append((one_step, ptp_over_ethernet(sync)))
+
+    with CaptureReader(str(write_capture(records, nanosecond=True))) as reader:
+        time_map = PTPTimeMap.from_capture(reader)
+
+    expected = [START + i * 125_000_000 for i in (0, 1, 2, 3, 10)]
+    assert time_map.arrival_ns.tolist() == expected
+    assert time_map.ptp_ns.tolist() == [ptp_time(int(t)) for t in time_map.arrival_ns]
+
+    arrivals = START + np.arange(0, 10 * 125_000_000, 999_999, dtype=np.int64)
+    expected = [ptp_time(int(t)) for t in arrivals]
+    assert np.abs(time_map.to_ptp(arrivals) - expected).max() <= 1
+    assert time_map.to_ptp(START) == ptp_time(START)
+    # Before the first Sync the offset is held
+    assert time_map.to_ptp(START - 5000) == ptp_time(START) - 5000
+
+
+def test_map_prefers_busiest_master_of_domain(write_capture):
+    """Test that one master is used, chosen by domain and number of Syncs."""
+    other = b'\x11' * 10
+    records = sorted(sync_records(2, domain=0, port=other)
+                     + sync_records(3)
+                     + sync_records(4, interval_ns=100_000_000, domain=0))
+    path = str(write_capture(records, nanosecond=True))
+
+    with CaptureReader(path) as reader:
+        assert len(PTPTimeMap.from_capture(reader)) == 4
+        assert len(PTPTimeMap.from_capture(reader, domain=127)) == 3
+        assert len(PTPTimeMap.from_capture(reader, domain=5)) == 0
+
+
+@pytest.mark.parametrize("header_only", [False, True])
+def test_extract_maps_rtp_arrivals(write_capture, header_only):
+    """Test that extracted streams carry PTP time when the capture holds Syncs."""
+    rtp = [(START + 1_000_000 * i,
+            udp_frame(rtp_packet(i, i * 90, 0x2110, b'x' * 20, 96)))
+           for i in range(500)]
+    path = str(write_capture(sorted(rtp + sync_records(5)), nanosecond=True))
+
+    extractor = RTPStreamExtractor(use_ptp=True, header_only=header_only)
+    extractor.extract_from_pcap(path)
+    assert extractor.stream_info[0x2110].has_ptp
+    if header_only:
+        return
+
+    store = extractor.streams[0x2110]
+    expected = np.array([ptp_time(START + 1_000_000 * i) for i in range(500)])
+    assert np.abs(store.ptp_ns - expected).max() <= 1
+    assert store[3].ptp_timestamp == store.ptp_ns[3]
+
+    without_ptp = RTPStreamExtractor(use_ptp=True)
+    without_ptp.extract_from_pcap(str(write_capture(rtp, nanosecond=True)))
+    assert not without_ptp.stream_info[0x2110].has_ptp
+    assert without_ptp.streams[0x2110].ptp_ns is None
+    assert without_ptp.streams[0x2110][0].ptp_timestamp is None
@@ -0,0 +1,47 @@
+"""Tests for extended sequence numbers and reorder handling."""
+
+import numpy as np
+
+from dtk.media.rtp_extractor import RTPStreamExtractor
+from dtk.media.sequence import extend_sequence_numbers, in_order_permutation
+
+
+def test_extend_sequence_numbers_across_rollovers():
+    """Test that sequence numbers are unwrapped over several 2^16 cycles."""
+    expected = np.arange(65000, 65000 + 3 * 65536)
+    extended = extend_sequence_numbers((expected & 0xFFFF).astype(np.uint16))
+    assert np.array_equal(extended, expected)
+
+
+def test_extend_sequence_numbers_reordered_first_packet():
+    """Test that a packet older than the first one does not go negative."""
+    extended = extend_sequence_numbers(np.array([1, 0xFFFF, 2, 3], dtype=np.uint16))
+    assert extended.tolist() == [65537, 65535, 65538, 65539]
+    assert ((extended & 0xFFFF) == [1, 0xFFFF, 2, 3]).all()
+
+
+def test_in_order_permutation():
+    """Test that late packets are inserted and duplicates keep arrival order."""
+    keys = np.array([0, 1, 4, 2, 5, 3, 5, 9, 6])
+    order = in_order_permutation(keys)
+    assert keys[order].tolist() == [0, 1, 2, 3, 4, 5, 5, 6, 9]
+    assert order.tolist() == [0, 1, 3, 5, 2, 4, 6, 8, 7]
+    assert in_order_permutation(np.arange(5)).tolist() == list(range(5))
+
+
+def test_long_stream_keeps_order_across_wrap(rtp_capture):
+    """Test that a stream longer than 2^16 packets is not scrambled by sorting."""
+    count = 70000
+    path = rtp_capture(count, start_seq=65530, payload_size=1, interval=0.00001)
+
+    extractor = RTPStreamExtractor()
+    extractor.extract_from_pcap(str(path))
+    store = extractor.streams[0x1234]
+    info = extractor.stream_info[0x1234]
+
+    assert np.all(np.diff(store.arrival_time) > 0)
+    assert store.extended_sequence[-1] - store.extended_sequence[0] == count - 1
+    assert info.packets_lost == 0
+    assert info.packets_out_of_order == 0
+    assert info.sequence_cycles == 1
+    assert info.packet_loss_rate == 0.0
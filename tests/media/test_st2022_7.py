@@ -0,0 +1,149 @@
+"""Tests for ST 2022-7 seamless merging of redundant legs."""
+
+import numpy as np
+import pytest
+
+from dtk.media.flow_table import FlowKey
+from dtk.media.packet_store import RTPPacketStore
+from dtk.media.rtp_extractor import RTPStreamExtractor
+from dtk.media.st2022_7 import SeamlessMerger, merge_flows
+from tests.media.conftest import rtp_packet, udp_frame
+
+RED = FlowKey("10.0.0.1", "239.1.1.1", 20000, 0x77, -1)
+BLUE = FlowKey("10.0.1.1", "239.2.1.1", 20000, 0x77, -1)
+COUNT = 3000
+
+
+def red_lost(i):
+    return i % 50 == 3
+
+
+def blue_lost(i):
+    return i % 70 == 3
+
+
+def leg_packets(count=COUNT, start_seq=65000):
+    """Yield (index, leg, packet) in arrival order; blue trails red slightly."""
+    for i in range(count):
+        packet = rtp_packet(start_seq + i, i // 10 * 1500, 0x77, i.to_bytes(4, 'big') * 8,
+                            96, marker=i % 10 == 9)
+        if not red_lost(i):
+            yield i, 0, packet
+        if not blue_lost(i):
+            yield i, 1, packet
+
+
+@pytest.fixture
+def redundant_extractor(write_capture):
+    """Extractor holding both legs of a stream whose sequence numbers wrap."""
+    records = []
+    for i, leg, packet in leg_packets():
+        flow = (RED, BLUE)[leg]
+        frame = udp_frame(packet, src_ip=flow.src_ip, dst_ip=flow.dst_ip,
+                          dport=flow.dst_port)
+        records.append((1.0 + i * 1e-4 + leg * 3e-5, frame))
+
+    extractor = RTPStreamExtractor()
+    extractor.extract_from_pcap(str(write_capture(records)))
+    return extractor
+
+
+def expected_payload(indices):
+    return b''.join(i.to_bytes(4, 'big') * 8 for i in indices)
+
+
+def test_merge_extracted_legs(redundant_extractor):
+    """Test that merging fills each leg's gaps and reports per-leg loss and rescues."""
+    merged, info, stats = redundant_extractor.merge_flows(RED, BLUE, window=256)
+
+    both_lost = [i for i in range(COUNT) if red_lost(i) and blue_lost(i)]
+    kept = [i for i in range(COUNT) if i not in both_lost]
+    assert merged.payload_data() == expected_payload(kept)
+    assert merged.sequence.tolist() == [(65000 + i) & 0xFFFF for i in kept]
+    assert info.packet_count == len(kept)
+    assert info.packets_lost == len(both_lost)
+
+    assert stats.packets_lost == len(both_lost)
+    red, blue = stats.legs
+    assert red.packets_lost == 60 and blue.packets_lost == 43
+    assert red.packets_rescued == 43 - len(both_lost)
+    assert blue.packets_rescued == 60 - len(both_lost)
+    assert red.packets_received + red.packets_lost == COUNT
+
+    # Merged packets come from whichever leg arrived first: red, unless it lost them
+    assert merged.arrival_ns[0] == redundant_extractor.flows[RED].arrival_ns[0]
+
+
+def test_merge_extracted_legs_shares_buffer(write_capture):
+    """Test that legs first seen in different batches still share the capture."""
+    records = []
+    for i, leg, packet in leg_packets(200):
+        flow = (RED, BLUE)[leg]
+        frame = udp_frame(packet, src_ip=flow.src_ip, dst_ip=flow.dst_ip,
+                          dport=flow.dst_port)
+        records.append((1.0 + i * 1e-4 + leg * 3e-5, frame))
+
+    extractor = RTPStreamExtractor()
+    extractor.BATCH_SIZE = 1
+    extractor.extract_from_pcap(str(write_capture(records)))
+    red, blue = extractor.flows[RED], extractor.flows[BLUE]
+    assert red.buffer is blue.buffer
+
+    merged, _, _ = extractor.merge_flows(RED, BLUE, window=256)
+    assert merged.buffer is red.buffer
+    assert merged.payload_data() == expected_payload(i for i in range(200) if i != 3)
+
+
+def test_merge_rejects_unrelated_flows(redundant_extractor):
+    """Test that only extracted legs sharing an SSRC can be merged."""
+    with pytest.raises(ValueError):
+        redundant_extractor.merge_flows(RED, RED._replace(ssrc=0x78))
+
+
+@pytest.mark.parametrize("skew", [0, 40])
+def test_live_merge_keeps_window_bounded(skew):
+    """Test arrival-order pushes with a skewed leg match the offline merge."""
+    arrivals = list(leg_packets())
+    # Delay the blue leg by `skew` packets
+    arrivals.sort(key=lambda item: item[0] + (skew if item[1] else 0))
+
+    merger = SeamlessMerger(window=64)
+    merged = []
+    for index, leg, packet in arrivals:
+        columns = {
+            'sequence': np.array([int.from_bytes(packet[2:4], 'big')], dtype=np.uint16),
+            'arrival_ns': np.array([len(merged)]),
+            'index': np.array([index]),
+        }
+        out = merger.push(leg, columns)
+        merged.extend(out.get('index', []))
+        assert len(merger._pending['extended']) <= 2 * 64
+    merged.extend(merger.finish()['index'])
+
+    assert merged == [i for i in range(COUNT) if not (red_lost(i) and blue_lost(i))]
+    assert merger.stats.packets_late == 0
+
+
+def test_late_packets_outside_window():
+    """Test that packets later than the window are dropped and counted."""
+    merger = SeamlessMerger(window=4)
+    sequence = np.arange(100, 120, dtype=np.uint16)
+    merger.push(0, {'sequence': sequence[sequence % 5 != 0], 'arrival_ns': np.zeros(16)})
+    merger.push(1, {'sequence': sequence, 'arrival_ns': np.ones(20)})
+    merged = merger.finish()
+
+    assert merger.stats.packets_late == 20 - 4
+    assert merger.stats.packets_lost == 3
+    assert merged['extended'].tolist() == [0x10000 + s for s in range(116, 120)]
+
+
+def test_merge_owned_stores_copies_payloads():
+    """Test merging legs fed from a live source (separate owned buffers)."""
+    legs = (RTPPacketStore(0x77), RTPPacketStore(0x77))
+    for i, leg, packet in leg_packets(200, start_seq=0):
+        legs[leg].append_packet(i, 0, False, 96, i, packet[12:])
+
+    merged, stats = merge_flows(*legs)
+    assert merged.buffer is not legs[0].buffer
+    assert merged.payload_data() == expected_payload(i for i in range(200) if i != 3)
+    assert stats.legs[1].packets_rescued == 3  # 53, 103, 153; 3 is lost on both legs
@@ -0,0 +1,332 @@
+"""Tests for ST 2110-20 depacketization."""
+
+import struct
+
+import numpy as np
+import pytest
+
+from dtk.media.decoders.st2110_20 import (
+    PGROUPS, ST211020Decoder, VideoStreamParams, copy_blocks, parse_srd_headers,
+    srd_table, unpack_planes, unpack_samples
+)
+from dtk.media.packet_store import RTPPacketStore
+
+WIDTH, HEIGHT = 64, 8
+
+
+def params(**kwargs):
+    """Parameters of a small 8-bit 4:2:2 test raster."""
+    values = dict(width=WIDTH, height=HEIGHT, pixel_format='YCbCr-4:2:2', bit_depth=8,
+                  frame_rate=50.0)
+    values.update(kwargs)
+    return VideoStreamParams(**values)
+
+
+def packetize(packed, pgroup=(4, 2), data_size=100, field=0):
+    """Split packed lines of pixel groups into RFC 4175 payloads.
+
+    Packets are filled up to data_size bytes of whole pixel groups, so runs
+    that cross the end of a line continue in a second SRD.
+    """
+    pgroup_bytes, pgroup_pixels = pgroup
+    packets = [[]]
+    room = data_size - data_size % pgroup_bytes
+    for row, line in enumerate(packed):
+        position = 0
+        while position < len(line):
+            if not room:
+                packets.append([])
+                room = data_size - data_size % pgroup_bytes
+            size = min(room, len(line) - position)
+            packets[-1].append((row, position, line[position:position + size].tobytes()))
+            position += size
+            room -= size
+    payloads = []
+    for sequence, srds in enumerate(packets):
+        header = struct.pack('!H', sequence >> 16)
+        for i, (row, position, data) in enumerate(srds):
+            continued = 0x8000 if i < len(srds) - 1 else 0
+            header += struct.pack('!HHH', len(data), field << 15 | row,
+                                  continued | position // pgroup_bytes * pgroup_pixels)
+        payloads.append(header + b''.join(data for _, _, data in srds))
+    return payloads
+
+
+def pack_samples(samples, bit_depth):
+    """Pack lines of samples most significant bit first, one bit at a time."""
+    lines = []
+    for line in samples.tolist():
+        value = 0
+        for sample in line:
+            value = value << bit_depth | sample
+        size = len(line) * bit_depth // 8
+        lines.append(np.frombuffer(value.to_bytes(size, 'big'), dtype=np.uint8))
+    return np.array(lines)
+
+
+def video_store(payloads, order=None):
+    """Store of one frame's payloads, marker on the last, in the given order."""
+    store = RTPPacketStore(0x2110)
+    last = len(payloads) - 1
+    for i in order if order is not None else range(len(payloads)):
+        store.append_packet(i, 9000, i == last, 96, i * 1000, payloads[i])
+    return store
+
+
+def test_parse_srd_headers():
+    """Test that continued SRD headers are all read, in order."""
+    packed = np.arange(HEIGHT * 128).astype(np.uint8).reshape(HEIGHT, 128)
+    payloads = packetize(packed)
+
+    headers, position = parse_srd_headers(payloads[1])
+    assert headers == [(28, 0, 0, 50), (72, 0, 1, 0)]
+    assert position == 2 + 2 * 6
+
+    store = video_store(payloads)
+    table = srd_table(np.frombuffer(store.buffer, dtype=np.uint8), store.payload_offset,
+                      store.payload_length)
+    assert table['packet'][:3].tolist() == [0, 1, 1]
+    assert table['row'][:3].tolist() == [0, 0, 1]
+    assert table['offset'][:3].tolist() == [0, 50, 0]
+    assert table['length'].sum() == packed.size
+    start = table['start'][2]
+    assert bytes(store.buffer[start:start + 4]) == packed[1, :4].tobytes()
+
+
+def test_depacketize_reordered_and_lossy_frame():
+    """Test that pixel groups land at their line and offset whatever the packet order."""
+    rng = np.random.default_rng(9)
+    packed = rng.integers(0, 256, (HEIGHT, 128), dtype=np.uint8)
+    payloads = packetize(packed)
+    order = rng.permutation(len(payloads)).tolist()
+    order.remove(3)  # Lost: the end of line 2 and the start of line 3
+
+    decoder = ST211020Decoder(params())
+    out = np.zeros((HEIGHT, 128), dtype=np.uint8)
+    store = video_store(payloads, order)
+    written = decoder.depacketize(store, out)
+
+    expected = packed.copy()
+    expected.reshape(-1)[300:400] = 0
+    assert written == packed.size - 100
+    assert (out == expected).all()
+
+    # Lists of RTPPacketInfo take the same path through per-packet parsing
+    listed = np.zeros_like(out)
+    assert decoder.depacketize(list(store), listed) == written
+    assert (listed == expected).all()
+
+
+def test_depacketize_interlaced_fields_and_clipping():
+    """Test that fields interleave and SRDs beyond the buffer are dropped."""
+    packed = np.full((HEIGHT // 2, 128), 7, dtype=np.uint8)
+    decoder = ST211020Decoder(params(interlaced=True))
+    out = np.zeros((HEIGHT, 128), dtype=np.uint8)
+
+    decoder.depacketize(video_store(packetize(packed, field=1)), out)
+    assert (out[1::2] == 7).all() and (out[0::2] == 0).all()
+
+    # Rows past the frame are ignored
+    tall = np.full((HEIGHT + 4, 128), 1, dtype=np.uint8)
+    out[:] = 0
+    store = video_store(packetize(tall))
+    assert ST211020Decoder(params()).depacketize(store, out) == out.size
+
+
+def test_copy_blocks_in_runs():
+    """Test that blocks copied as strided runs land where single copies would."""
+    source = np.arange(200, dtype=np.uint8)
+    # A forward run, a backward run, a lone block of another size, overlapping writes
+    src = np.array([0, 10, 20, 90, 80, 70, 150, 100, 110])
+    dst = np.array([0, 5, 10, 40, 35, 30, 60, 70, 72])
+    length = np.array([5, 5, 5, 5, 5, 5, 9, 4, 4])
+    expected = np.zeros(80, dtype=np.uint8)
+    for s, d, n in zip(src, dst, length):
+        expected[d:d + n] = source[s:s + n]
+
+    out = np.zeros(80, dtype=np.uint8)
+    assert copy_blocks(source, src, out, dst, length) == length.sum()
+    assert (out == expected).all()
+    with pytest.raises(ValueError):
+        copy_blocks(source, src, np.zeros((8, 20), dtype=np.uint8)[:, :10], dst, length)
+
+
+def test_decode_uyvy_frames():
+    """Test that decoded 8-bit 4:2:2 frames come from the depacketized pixel groups."""
+    rng = np.random.default_rng(1)
+    packed = rng.integers(0, 256, (HEIGHT, 128), dtype=np.uint8)
+    payloads = packetize(packed) * 2
+    store = RTPPacketStore(0x2110)
+    for i, payload in enumerate(payloads):
+        store.append_packet(i, 9000 * (i // 11), i % 11 == 10, 96, i * 1000, payload)
+
+    decoder = ST211020Decoder(params())
+    frames = decoder.decode(store, None)
+
+    assert len(frames) == 2
+    uyvy = packed.reshape(HEIGHT, WIDTH // 2, 4)
+    assert (frames[1][:, 0::2, 0] == uyvy[:, :, 1]).all()  # Y0
+    assert (frames[1][:, 1::2, 2] == uyvy[:, :, 2]).all()  # Cr
+    assert VideoStreamParams(1920, 1080, 'YCbCr-4:2:2', 10, 50.0).line_bytes == 4800
+    with pytest.raises(ValueError):
+        params(bit_depth=9).pgroup
+
+
+@pytest.mark.parametrize("pixel_format, bit_depth", sorted(PGROUPS))
+def test_unpack_planes(pixel_format, bit_depth):
+    """Test that every sampling and bit depth unpacks to its planes at full precision."""
+    rng = np.random.default_rng(bit_depth)
+    video = params(pixel_format=pixel_format, bit_depth=bit_depth, width=12)
+    divisors = (1, 2, 2) if pixel_format == 'YCbCr-4:2:2' else (1, 1, 1)
+    first, second, third = (rng.integers(0, 1 << bit_depth, (HEIGHT, 12 // n),
+                                         dtype=np.uint16)
+                            for n in divisors)
+    if pixel_format == 'YCbCr-4:2:2':
+        samples = np.stack([second, first[:, 0::2], third, first[:, 1::2]], axis=2)
+    elif pixel_format == 'YCbCr-4:4:4':
+        samples = np.stack([second, first, third], axis=2)
+    else:
+        samples = np.stack([first, second, third], axis=2)
+    packed = pack_samples(samples.reshape(HEIGHT, -1), bit_depth)
+    assert packed.shape == (HEIGHT, video.line_bytes)
+
+    planes = unpack_planes(packed, video)
+    for plane, expected in zip(planes, (first, second, third)):
+        assert plane.dtype == np.uint16 and plane.flags.c_contiguous
+        assert (plane == expected).all()
+    planes = unpack_planes(packed, video, to_8bit=True)
+    for plane, expected in zip(planes, (first, second, third)):
+        assert plane.dtype == np.uint8
+        assert (plane == expected >> (bit_depth - 8)).all()
+    assert (unpack_samples(packed, bit_depth) == samples.reshape(HEIGHT, -1)).all()
+
+
+def test_decode_10bit_frame():
+    """Test that 10-bit 4:2:2 frames decode from 5-byte pgroups to 8 bits."""
+    rng = np.random.default_rng(3)
+    samples = rng.integers(0, 1024, (HEIGHT, WIDTH * 2), dtype=np.uint16)
+    packed = pack_samples(samples, 10)
+    decoder = ST211020Decoder(params(bit_depth=10))
+    store = video_store(packetize(packed, pgroup=(5, 2), data_size=120))
+
+    frame, = decoder.decode(store, None)
+    y, cb, cr = decoder.unpack_frame(packed)
+    assert (y == samples[:, 1::2]).all() and (cb == samples[:, 0::4]).all()
+    assert (frame[:, :, 0] == samples[:, 1::2] >> 2).all()
+    assert (frame[:, 0::2, 1] == samples[:, 0::4] >> 2).all()
+    assert (frame[:, 1::2, 2] == samples[:, 2::4] >> 2).all()
+    with pytest.raises(ValueError):
+        unpack_samples(packed, 9)
+
+
+@pytest.mark.parametrize("width, height", [(1280, 720), (1920, 1080), (3840, 2160)])
+def test_detect_10bit_422_params(width, height):
+    """Test that auto-detection sizes 10-bit samples at their packed size."""
+    line_bytes = VideoStreamParams(width, height, 'YCbCr-4:2:2', 10, 50.0).line_bytes
+    payloads = packetize(np.zeros((height, line_bytes), dtype=np.uint8), pgroup=(5, 2),
+                         data_size=1200)
+    store = RTPPacketStore(0x2110)
+    for number in range(2):
+        for i, payload in enumerate(payloads):
+            store.append_packet(len(store), 1800 * number, i == len(payloads) - 1, 96,
+                                20_000_000 * number, payload)
+
+    decoder = ST211020Decoder()
+    decoder.iter_frames(store, None)
+    assert (decoder.params.width, decoder.params.height) == (width, height)
+    assert (decoder.params.pixel_format, decoder.params.bit_depth) == ('YCbCr-4:2:2', 10)
+    assert decoder.params.frame_size_bytes == line_bytes * height
+    assert decoder.params.frame_rate == 50
+
+
+def test_detect_params_samples_leading_frames():
+    """Test that detection sizes a few complete frames, skipping a partial first."""
+    line_bytes = VideoStreamParams(1280, 720, 'YCbCr-4:2:2', 10, 50.0).line_bytes
+    payloads = packetize(np.zeros((720, line_bytes), dtype=np.uint8), pgroup=(5, 2),
+                         data_size=1200)
+    # Capture starts mid-frame, then full frames, then frames cut to one packet
+    frames = [payloads[len(payloads) // 2:]]
+    frames += [payloads] * ST211020Decoder.DETECT_FRAMES
+    frames += [payloads[:1]] * 20
+    store = RTPPacketStore(0x2110)
+    for number, frame in enumerate(frames):
+        for i, payload in enumerate(frame):
+            store.append_packet(len(store), 1800 * number, i == len(frame) - 1, 96,
+                                20_000_000 * number, payload)
+
+    decoder = ST211020Decoder()
+    decoder.iter_frames(store, None)
+    assert (decoder.params.width, decoder.params.height) == (1280, 720)
+    assert decoder.params.bit_depth == 10
+    assert decoder.params.frame_rate == 50
+
+
+def test_iter_frames_decodes_lazily():
+    """Test that iter_frames() sets parameters up front and decodes on demand."""
+    packed = np.random.default_rng(2).integers(0, 256, (HEIGHT, 128), dtype=np.uint8)
+    store = RTPPacketStore(0x2110)
+    for i, payload in enumerate(packetize(packed) * 3):
+        store.append_packet(i, 9000 * (i // 11), i % 11 == 10, 96, i * 1000, payload)
+
+    decoder = ST211020Decoder(params())
+    frames = decoder.iter_frames(store, None)
+    assert decoder.params.width == WIDTH and decoder.frame_count == 0
+    first = next(frames)
+    assert decoder.frame_count == 1
+    assert len(list(frames)) == 2
+    assert decoder.get_video_info()['num_frames'] == 3
+    assert all((frame == first).all() for frame in decoder.decode(store, None))
+
+
+def test_released_frames_are_reused():
+    """Test that frames handed back with release() back the next ones."""
+    rng = np.random.default_rng(4)
+    lines = [rng.integers(0, 256, (HEIGHT, 128), dtype=np.uint8) for _ in range(4)]
+    store = RTPPacketStore(0x2110)
+    for number, packed in enumerate(lines):
+        payloads = packetize(packed)
+        for i, payload in enumerate(payloads):
+            store.append_packet(len(store), 9000 * number, i == len(payloads) - 1, 96, 0,
+                                payload)
+
+    decoder = ST211020Decoder(params(), pool_depth=1)
+    buffers = set()
+    for number, frame in enumerate(decoder.iter_frames(store, None)):
+        uyvy = lines[number].reshape(HEIGHT, WIDTH // 2, 4)
+        assert (frame[:, 1::2, 0] == uyvy[:, :, 3]).all()  # Y1
+        assert (frame[:, 0::2, 1] == uyvy[:, :, 0]).all()  # Cb, both pixels
+        assert (frame[:, 1::2, 1] == uyvy[:, :, 0]).all()
+        buffers.add(id(frame))
+        decoder.release(frame)
+    assert decoder.frame_pool.allocated == 1 and len(buffers) == 1
+
+    # Frames that are kept are not overwritten
+    frames = decoder.decode(store, None)
+    assert decoder.frame_pool.allocated == 4
+    assert (frames[0][:, 0::2, 0] == lines[0].reshape(HEIGHT, -1, 4)[:, :, 1]).all()
+
+
+def test_parallel_decode_keeps_frame_order():
+    """Test that frames decoded by several threads come out in stream order."""
+    rng = np.random.default_rng(6)
+    lines = [rng.integers(0, 256, (HEIGHT, 128), dtype=np.uint8) for _ in range(12)]
+    store = RTPPacketStore(0x2110)
+    for number, packed in enumerate(lines):
+        payloads = packetize(packed)
+        for i, payload in enumerate(payloads):
+            store.append_packet(len(store), 9000 * number, i == len(payloads) - 1, 96, 0,
+                                payload)
+
+    decoder = ST211020Decoder(params(), workers=3)
+    expected = [frame.copy() for frame in ST211020Decoder(params()).decode(store, None)]
+    for number, frame in enumerate(decoder.iter_frames(store, None)):
+        assert (frame == expected[number]).all()
+        decoder.release(frame)
+    assert decoder.frame_count == 12
+    assert decoder.frame_pool.allocated <= 2 * 3 + 1
+
+    # Stopping early leaves no thread behind
+    frames = decoder.iter_frames(store, None)
+    assert (next(frames) == expected[0]).all()
+    frames.close()
+    assert decoder.frame_count == 1
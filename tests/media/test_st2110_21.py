@@ -0,0 +1,142 @@
+"""Tests for ST 2110-21 sender timing analysis."""
+
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from dtk.media.packet_store import RTPPacketStore
+from dtk.media.ptp import PTPTimeMap
+from dtk.media.st2110_21 import (
+    NARROW, NARROW_LINEAR, NON_COMPLIANT, WIDE, analyze_timing, detect_rate,
+    frame_offsets, histogram
+)
+
+RATE = Fraction(60000, 1001)
+PACKETS = 4320
+LEAP_NS = 37_000_000_000
+# First frame period starting after 2023-11-14 (PTP time)
+FIRST_FRAME = (1_700_000_037_000_000_000 * RATE.numerator
+               // (RATE.denominator * 10 ** 9) + 1)
+
+
+def ideal_times(linear, frames, lead=2):
+    """PTP arrival times of a sender following the gapped or linear schedule.
+
+    Each packet is sent `lead` drain intervals ahead of its drain time.
+    """
+    period = 10 ** 9 / RATE
+    trs = period / PACKETS * (1 if linear else Fraction(1080, 1125))
+    tro = period * Fraction(43, 1125)
+    times = []
+    for frame in range(frames):
+        tpr0 = (FIRST_FRAME + frame) * period
+        times.append([int(tpr0 + tro + (k - lead) * trs) for k in range(PACKETS)])
+    return np.array(times, dtype=np.int64)
+
+
+def video_store(times):
+    """Store of one video stream, frames given as rows of PTP arrival times."""
+    frames, packets = times.shape
+    count = frames * packets
+    store = RTPPacketStore(0x2110, b'', capacity=count)
+    sequence = np.arange(count)
+    store.extend(
+        sequence.astype(np.uint16),
+        (sequence // packets * 1501.5).astype(np.uint32),
+        sequence % packets == packets - 1,
+        np.full(count, 96, dtype=np.uint8),
+        times.reshape(-1) - LEAP_NS,  # Capture clock on UTC
+        np.zeros(count, dtype=np.int64),
+        np.zeros(count, dtype=np.uint32),
+    )
+    return store
+
+
+@pytest.mark.parametrize("linear, expected", [(False, NARROW), (True, NARROW_LINEAR)])
+def test_ideal_senders(linear, expected):
+    """Test that ideal gapped and linear senders get the matching verdict."""
+    report = analyze_timing(video_store(ideal_times(linear, 8)))
+
+    assert report.rate == RATE
+    assert report.packets_per_frame == PACKETS
+    assert not report.ptp
+    assert report.compliance == expected
+    assert (report.verdicts() == expected).all()
+    # 2 packets ahead of the schedule: TRO is 2 TRS early, VRX holds about 3 packets
+    model = report.models[expected]
+    assert np.allclose(report.tro_ns, model.tro_ns - 2 * model.trs_ns, atol=1)
+    assert report.frame_max(report.vrx[linear]).max() == 3
+
+
+def test_burst_makes_frame_wide_then_non_compliant():
+    """Test that bursts beyond the narrow, then the wide CMAX fail their frames."""
+    times = ideal_times(False, 6)
+    times[2, 100:110] = times[2, 100]  # 10-packet burst: within the wide CMAX only
+    times[4, 100:130] = times[4, 100]  # 30-packet burst: exceeds both
+    report = analyze_timing(video_store(times))
+
+    assert report.models[NARROW].cmax == 6 and report.models[WIDE].cmax == 16
+    assert report.frame_max(report.cinst[False]).tolist() == [1, 1, 10, 1, 30, 1]
+    assert report.verdicts().tolist() == [NARROW, NARROW, WIDE, NARROW, NON_COMPLIANT,
+                                          NARROW]
+    assert report.compliance == NON_COMPLIANT
+
+
+def test_late_packets_underrun_vrx():
+    """Test that packets arriving after their drain time fail the VRX model."""
+    times = ideal_times(False, 4)
+    times[1] += 20_000  # 20 us late: about 5 drain intervals
+    report = analyze_timing(video_store(times))
+
+    frame_min = np.minimum.reduceat(report.vrx[False], report.frame_bounds[:-1])
+    assert frame_min.tolist()[1] < 0
+    assert report.verdicts().tolist() == [NARROW, NON_COMPLIANT, NARROW, NARROW]
+
+
+def test_incomplete_frames_and_ptp_times():
+    """Test that frames with lost packets get no verdict and PTP times are used."""
+    times = ideal_times(False, 4)
+    store = video_store(times)
+    store.reorder(np.delete(np.arange(len(store)), [5, 6]))
+    # PTP runs a little ahead of the capture clock's UTC + leap seconds
+    store.time_map = PTPTimeMap(np.array([store.arrival_ns[0]]),
+                                np.array([store.arrival_ns[0] + LEAP_NS + 5000]))
+    report = analyze_timing(store)
+
+    assert report.ptp
+    assert report.complete.tolist() == [False, True, True, True]
+    assert len(report.verdicts()) == 3
+    unshifted = analyze_timing(video_store(times))
+    assert np.allclose(report.tro_ns, unshifted.tro_ns + 5000, atol=1)
+
+
+def test_frame_offsets_are_exact():
+    """Test that epoch-aligned frame offsets match exact integer arithmetic."""
+    rng = np.random.default_rng(1)
+    times = rng.integers(1_600_000_000 * 10 ** 9, 1_900_000_000 * 10 ** 9, 1000)
+    for rate in (RATE, Fraction(50), Fraction(24000, 1001)):
+        expected = [t * rate.numerator % (rate.denominator * 10 ** 9) // rate.numerator
+                    for t in times.tolist()]
+        assert frame_offsets(times, rate).tolist() == expected
+
+
+def test_detect_rate_and_histogram():
+    """Test that rates are recognised from timestamps and histograms bin levels."""
+    assert detect_rate(np.array([0, 1501, 3003, 4504], dtype=np.uint32)) == RATE
+    assert detect_rate(np.array([2 ** 32 - 1800, 0, 1800], dtype=np.uint32)) == 50
+    with pytest.raises(ValueError):
+        detect_rate(np.array([7]))
+
+    lows, highs, counts = histogram(np.array([1, 1, 2, 5]))
+    assert lows.tolist() == highs.tolist() == [1, 2, 5]
+    assert counts.tolist() == [2, 1, 1]
+    lows, highs, counts = histogram(np.arange(100), max_bins=4)
+    assert (lows.tolist(), highs.tolist(), counts.tolist()) == (
+        [0, 25, 50, 75], [24, 49, 74, 99], [25, 25, 25, 25])
+
+
+def test_unsupported_raster():
+    """Test that rasters without ST 2110-21 timing are rejected."""
+    with pytest.raises(ValueError):
+        analyze_timing(video_store(ideal_times(False, 2)), height=576)
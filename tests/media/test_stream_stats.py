@@ -0,0 +1,112 @@
+"""Tests for running (header-only) stream statistics."""
+
+import numpy as np
+import pytest
+
+from dtk.media.rtp_extractor import RTPStreamExtractor
+from dtk.media.stream_stats import StreamAccumulator
+from tests.media.conftest import rtp_packet, udp_frame
+
+
+def _lossy_records(count, start_seq=65500):
+    """One flow wrapping its sequence numbers, with a loss and a reordered pair."""
+    records = []
+    for i in range(count):
+        seq = (start_seq + i) & 0xFFFF
+        frame = udp_frame(rtp_packet(seq, i * 90, 0x5, b'x' * 8))
+        records.append((10.0 + i * 0.001, frame))
+    (ts_a, frame_a), (ts_b, frame_b) = records[40], records[41]
+    records[40], records[41] = (ts_a, frame_b), (ts_b, frame_a)
+    del records[70]
+    return records
+
+
+@pytest.mark.parametrize("batch_size", [7, 65536])
+def test_header_only_matches_full_extraction(write_capture, batch_size):
+    """Test that header-only statistics equal those of a full extraction."""
+    path = str(write_capture(_lossy_records(200)))
+
+    full = RTPStreamExtractor()
+    full.extract_from_pcap(path)
+    header_only = RTPStreamExtractor(header_only=True)
+    header_only.BATCH_SIZE = batch_size
+    streams = header_only.extract_from_pcap(path)
+
+    assert streams == {}
+    assert header_only.stream_info == full.stream_info
+    info = header_only.stream_info[0x5]
+    assert info.packets_lost == info.packets_out_of_order == 1
+    assert info.sequence_cycles == 0
+
+
+def test_accumulator_counts_late_packets_across_batches():
+    """Test that a packet arriving in a later batch is still counted as late."""
+    accumulator = StreamAccumulator(0x1)
+    for sequence in ([65534, 65535, 1], [0, 2]):
+        n = len(sequence)
+        accumulator.update(np.array(sequence, dtype=np.uint16),
+                           np.zeros(n, dtype=np.uint32), np.full(n, 97, dtype=np.uint8),
+                           np.arange(n, dtype=np.float64))
+
+    info = accumulator.stream_info()
+    assert info.packet_count == 5
+    assert info.packets_out_of_order == 1
+    assert info.packets_lost == 0
+    assert (info.first_seq, info.last_seq) == (65534, 2)
+    assert info.packet_loss_rate == 0.0
+
+
+def test_running_arrival_stats_match_vectorized():
+    """Test that running arrival statistics equal those computed over all packets."""
+    from dtk.media.interarrival import arrival_stats
+    from dtk.media.packet_store import RTPPacketStore
+
+    rng = np.random.default_rng(5)
+    count = 3000
+    arrival = 10 ** 18 + np.cumsum(rng.integers(900_000, 1_100_000, count))
+    timestamp = (2 ** 32 - 48 * 1000 + np.arange(count) * 48) % 2 ** 32
+    sequence = np.arange(count).astype(np.uint16)
+    store = RTPPacketStore(0x5, b'', capacity=count)
+    store.extend(sequence, timestamp.astype(np.uint32), np.zeros(count, dtype=bool),
+                 np.full(count, 97, dtype=np.uint8), arrival,
+                 np.zeros(count, dtype=np.int64), np.full(count, 288, dtype=np.uint32))
+    expected = arrival_stats(store, 48000)
+
+    batched = StreamAccumulator(0x5, 48000)
+    for rows in np.array_split(np.arange(count), [1, 2, 700, 701, 2000]):
+        batched.update(sequence[rows], timestamp[rows], np.full(len(rows), 97),
+                       arrival[rows], np.full(len(rows), 288))
+    single = StreamAccumulator(0x5, 48000)
+    for i in range(count):
+        single.add(int(sequence[i]), int(timestamp[i]), 97, int(arrival[i]), 288)
+
+    for accumulator in (batched, single):
+        stats = accumulator.arrival_stats()
+        assert stats.jitter_ns == pytest.approx(expected.jitter_ns, rel=1e-9)
+        assert stats.max_jitter_ns == pytest.approx(expected.max_jitter_ns, rel=1e-9)
+        assert stats.gap_min_ns == expected.gap_min_ns
+        assert stats.gap_max_ns == expected.gap_max_ns
+        assert stats.gap_mean_ns == pytest.approx(expected.gap_mean_ns)
+        assert (stats.gap_histogram == expected.gap_histogram).all()
+        assert stats.drift_ppm == pytest.approx(expected.drift_ppm, abs=1e-3)
+        assert (accumulator.sizes.count, accumulator.sizes.mean) == (count, 288)
+        assert accumulator.jitter.count == count - 1
+
+
+def test_header_only_arrival_stats(write_capture):
+    """Test that header-only extraction provides arrival statistics of each flow."""
+    path = str(write_capture(_lossy_records(200)))
+    full = RTPStreamExtractor()
+    full.extract_from_pcap(path)
+    header_only = RTPStreamExtractor(header_only=True)
+    header_only.BATCH_SIZE = 16
+    header_only.extract_from_pcap(path)
+
+    flow = header_only.list_flows()[0][0]
+    assert header_only.get_running_stats(flow).sizes.max == 8
+    # The running statistics follow arrival order, like the vectorized pass
+    running, expected = header_only.get_arrival_stats(flow), full.get_arrival_stats(flow)
+    assert running.gap_mean_ns == pytest.approx(expected.gap_mean_ns)
+    assert running.jitter_ns == pytest.approx(expected.jitter_ns, rel=1e-9)
+    with pytest.raises(ValueError):
+        full.get_running_stats(flow)
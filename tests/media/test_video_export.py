@@ -0,0 +1,79 @@
+"""Tests for streaming video export."""
+
+import io
+import subprocess
+
+import numpy as np
+import pytest
+
+from dtk.media.exporters import VideoExporter
+
+
+class FakeFFmpeg:
+    """Stand-in for an FFmpeg process that records the raw video it is sent."""
+
+    instances = []
+
+    def __init__(self, cmd, stdin, stdout, stderr):
+        self.cmd = cmd
+        self.stdin = io.BytesIO()
+        self.stdin.close = lambda: None  # Keep the written bytes readable
+        self.stderr = stderr
+        self.returncode = None
+        FakeFFmpeg.instances.append(self)
+
+    def wait(self):
+        """Exit, failing when the output file name asks for it."""
+        self.returncode = 1 if '-fail' in self.cmd[-1] else 0
+        if self.returncode:
+            self.stderr.write(b'Conversion failed!')
+        return self.returncode
+
+
+@pytest.fixture
+def ffmpeg(monkeypatch):
+    """Replace FFmpeg with FakeFFmpeg; returns the processes started."""
+    FakeFFmpeg.instances = []
+    monkeypatch.setattr(subprocess, 'Popen', FakeFFmpeg)
+    return FakeFFmpeg.instances
+
+
+def frame(value, height=4, width=6):
+    """YCbCr frame with Y = value, Cb = value + 1, Cr = value + 2."""
+    frame = np.full((height, width, 3), value, dtype=np.uint8)
+    return frame + np.arange(3, dtype=np.uint8)
+
+
+def test_export_stream_writes_frames_as_they_come(ffmpeg, tmp_path):
+    """Test that each frame is sent to FFmpeg before the next is produced."""
+    exporter = VideoExporter()
+    sent = []
+
+    def frames():
+        for i in range(3):
+            if ffmpeg:
+                sent.append(len(ffmpeg[0].stdin.getvalue()))
+            yield frame(10 * i)
+
+    released = []
+    path = exporter.export_stream(frames(), 50.0, str(tmp_path / 'out'),
+                                  release=released.append, pixel_format='yuv422')
+    assert path.endswith('out.mp4')
+    assert exporter.frames_written == 3
+    assert [frame[0, 0, 0] for frame in released] == [0, 10, 20]
+    # yuv422p: a full Y plane, then Cb and Cr of even pixels
+    plane_bytes = 4 * 6 + 2 * 4 * 3
+    assert sent == [plane_bytes, 2 * plane_bytes]
+    data = np.frombuffer(ffmpeg[0].stdin.getvalue(), dtype=np.uint8)
+    y, cb, cr = np.split(data[plane_bytes:2 * plane_bytes], [24, 36])
+    assert (y == 10).all() and (cb == 11).all() and (cr == 12).all()
+    assert ffmpeg[0].cmd[ffmpeg[0].cmd.index('-s') + 1] == '6x4'
+
+
+def test_export_stream_errors(ffmpeg, tmp_path):
+    """Test that empty streams and FFmpeg failures are reported."""
+    exporter = VideoExporter()
+    with pytest.raises(ValueError):
+        exporter.export_stream(iter([]), 50.0, str(tmp_path / 'out.mp4'))
+    with pytest.raises(RuntimeError, match='Conversion failed'):
+        exporter.export([frame(0)], 50.0, str(tmp_path / 'out-fail.mp4'))